@@ -1,12 +1,24 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file
-from parsers.xml_parser import XMLParser
+from flask import Flask, Response, g, render_template, request, redirect, session, url_for, send_file, jsonify
+from parsers.xml_parser import XMLParser, PATRON_INSTRUCCION
+from parsers.indice_xml import indexar
 from generators.salida_writer import SalidaWriter
 from generators.graphviz_gen import GraphvizGenerator
+from simulator.lote import simular_todos, simular_por_invernadero
+from services.cache import CacheResultados
+from services.metricas import metricas
+from services.almacen import AlmacenCompartido, edicion, id_resultado
+from services.archivos import LectorCopia
+from services.trabajos import ColaTrabajos, TERMINADO, ERROR
+from config import Config
+from concurrent.futures import ProcessPoolExecutor
+import atexit
 import os
+import tempfile
 
 
 def create_app():
     app = Flask(__name__)
+    app.config.from_object(Config)
     app.config["UPLOAD_FOLDER"] = os.path.join(os.getcwd(), "uploads")
     app.config["OUTPUT_FOLDER"] = os.path.join(os.getcwd(), "outputs")
 
@@ -15,86 +27,264 @@ def create_app():
         if not os.path.exists(folder):
             os.makedirs(folder)
 
-    # Estructura global para almacenar datos y resultados
-    datos = {"invernaderos": None, "ultimo_resultado": None}
+    # Configuraciones y resultados compartidos entre procesos; cada sesión
+    # guarda solo su carga (el XML subido y sus ediciones) y su último plan simulado
+    almacen = AlmacenCompartido(
+        app.config["ALMACEN_DB"] or os.path.join(app.config["OUTPUT_FOLDER"], "almacen.db"),
+        max_invernaderos=app.config["INVERNADEROS_EN_MEMORIA"],
+    )
+
+    # Caché de resultados del proceso: (configuración, edición, invernadero, plan) -> resultado
+    cache = CacheResultados(
+        max_entradas=app.config["CACHE_MAX_ENTRADAS"],
+        max_bytes=app.config["CACHE_MAX_BYTES"],
+    )
+
+    # Métricas por etapa; se exportan en /metrics junto con las de la caché
+    metricas.activo = app.config["METRICAS_ACTIVAS"]
+    metricas.registrar_colector("cache", cache.exportar_metricas)
+
+    # Trabajos en segundo plano: carga de XML y simulaciones con progreso
+    trabajos = ColaTrabajos(
+        app.config["TRABAJOS_DB"] or os.path.join(app.config["OUTPUT_FOLDER"], "trabajos.db"),
+        workers=app.config["TRABAJOS_WORKERS"],
+    )
+
+    @app.before_request
+    def iniciar_medicion():
+        if metricas.activo and app.config["METRICAS_SERVER_TIMING"]:
+            metricas.iniciar_peticion()
+
+    @app.after_request
+    def agregar_server_timing(response):
+        valor = metricas.terminar_peticion()
+        if valor:
+            response.headers["Server-Timing"] = valor
+        return response
+
+    def configuracion_actual():
+        """{"id", "carga", "ediciones", "invernaderos"} de la carga de la sesión, o None"""
+        if "configuracion" not in g:
+            carga = session.get("carga")
+            g.configuracion = almacen.configuracion(carga) if carga else None
+        return g.configuracion
+
+    def invernaderos_actuales():
+        config = configuracion_actual()
+        return config["invernaderos"] if config else None
+
+    def usar_carga(carga):
+        """Deja la carga como la actual de la sesión"""
+        if session.get("carga") != carga:
+            session["carga"] = carga
+            session.pop("ultima_clave", None)
+        g.pop("configuracion", None)
+
+    def trabajo_parse(parametros, progreso):
+        """Trabajo de carga: indexa el XML informando bytes leídos y elementos"""
+        indice = indexar(
+            parametros["ruta"],
+            progreso=lambda leidos, total, elementos: progreso(leidos, total, f"{elementos} elementos"),
+        )
+        if not indice.invernaderos:
+            raise ValueError("El archivo XML no contiene invernaderos válidos")
+        almacen.guardar_configuracion(parametros["hash"], parametros["ruta"], indice, parametros.get("archivo"))
+        print(f"✓ Se indexaron {len(indice.invernaderos)} invernaderos")
+        return len(indice.invernaderos)
+
+    def trabajo_simular(parametros, progreso):
+        """Trabajo de simulación: informa las entradas del plan ya simuladas"""
+        config = almacen.configuracion(parametros["carga"])
+        invernadero = buscar_invernadero(parametros["invernadero"], config["invernaderos"] if config else None)
+        if invernadero is None:
+            raise ValueError("Invernadero no encontrado")
+        resultado = invernadero.simular_plan(
+            parametros["plan"],
+            app.config["SIMULACION_MOTOR"],
+            progreso=lambda hechos, total: progreso(hechos, total, "entradas del plan"),
+        )
+        if resultado is None:
+            raise ValueError(f"Plan '{parametros['plan']}' no encontrado")
+        print(f"✓ Simulación completada: {resultado['tiempo_optimo']} segundos")
+        # El resultado queda en el almacén; el trabajo solo devuelve su id
+        return almacen.guardar_resultado(config, resultado)
+
+    # Pool de procesos de /simulate_all: uno para toda la aplicación, se cierra al salir
+    pool_lote = None
+    if app.config["SIMULACION_MODO"] == "procesos" and app.config["SIMULACION_WORKERS"] > 1:
+        pool_lote = ProcessPoolExecutor(max_workers=app.config["SIMULACION_WORKERS"])
+        atexit.register(pool_lote.shutdown)
+
+    trabajos.registrar("parse", trabajo_parse)
+    trabajos.registrar("simular", trabajo_simular)
+    trabajos.reanudar()
+
+    def buscar_invernadero(nombre, invernaderos=None):
+        """Busca un invernadero por nombre (por defecto en la configuración de la sesión); lo carga si hace falta"""
+        if invernaderos is None:
+            invernaderos = invernaderos_actuales()
+        if not invernaderos:
+            return None
+        return invernaderos.buscar(nombre)
+
+    def obtener_resultado(invernadero, plan_nombre, config=None):
+        """
+        Resultado del plan: de la caché del proceso, si no del almacén
+        compartido (calculado por otro proceso) y si no lo simula y lo guarda
+        """
+        config = config or configuracion_actual()
+        clave = (config["id"], edicion(config, invernadero.nombre), invernadero.nombre, plan_nombre)
+
+        def calcular():
+            resultado = almacen.cargar_resultado(config, invernadero.nombre, plan_nombre)
+            if resultado is not None:
+                resultado["invernadero"] = invernadero
+                return resultado
+            resultado = invernadero.simular_plan(plan_nombre, app.config["SIMULACION_MOTOR"])
+            if resultado is not None:
+                almacen.guardar_resultado(config, resultado)
+            return resultado
+
+        return cache.obtener_o_calcular(clave, calcular)
+
+    def guardar_resultado(resultado):
+        """Guarda un resultado nuevo de la configuración de la sesión en la caché y el almacén"""
+        config = configuracion_actual()
+        nombre = resultado["invernadero"].nombre
+        cache.guardar((config["id"], edicion(config, nombre), nombre, resultado["plan_nombre"]), resultado)
+        almacen.guardar_resultado(config, resultado)
+
+    def enviar_salida(escribir):
+        """
+        Escribe la salida con escribir(stream) en un archivo temporal propio de
+        la petición (sin nombre: se borra al cerrarlo) y lo envía como salida.xml
+        """
+        temporal = tempfile.TemporaryFile(dir=app.config["OUTPUT_FOLDER"], suffix=".xml")
+        try:
+            escribir(temporal)
+            temporal.seek(0)
+        except BaseException:
+            temporal.close()
+            raise
+        return send_file(temporal, mimetype="application/xml", as_attachment=True, download_name="salida.xml")
+
+    def render_reporte(resultado, error=None):
+        """Muestra el reporte de un resultado con su primera página de acciones"""
+        config = configuracion_actual()
+        nombre = resultado["invernadero"].nombre
+        return render_template(
+            "report_invernadero.html",
+            results=resultado,
+            resultado_id=id_resultado(config["id"], edicion(config, nombre), nombre, resultado["plan_nombre"]),
+            pagina=app.config["PAGINA_SEGUNDOS"],
+            error=error,
+        )
+
+    def resultado_por_id(resultado_id):
+        """Resultado de un id con la versión vigente de su carga (se vuelve a simular si cambió)"""
+        encontrado = almacen.buscar_resultado(resultado_id)
+        if encontrado is None:
+            return None
+        config_id, version, invernadero_nombre, plan_nombre = encontrado
+        if version:
+            config = almacen.configuracion(version.split(":")[0])
+        else:
+            config = almacen.configuracion_original(config_id)
+        if config is None or config["id"] != config_id:
+            return None
+        invernadero = buscar_invernadero(invernadero_nombre, config["invernaderos"])
+        if not invernadero or invernadero.buscar_plan(plan_nombre) is None:
+            return None
+        return obtener_resultado(invernadero, plan_nombre, config)
+
+    def resultado_actual():
+        """Resultado pedido en el formulario (invernadero/plan) o el último simulado"""
+        invernadero_nombre = request.form.get("invernadero")
+        plan_nombre = request.form.get("plan")
+        if not invernadero_nombre and session.get("ultima_clave"):
+            invernadero_nombre, plan_nombre = session["ultima_clave"]
+        invernadero = buscar_invernadero(invernadero_nombre)
+        if not invernadero or invernadero.buscar_plan(plan_nombre) is None:
+            return None
+        return obtener_resultado(invernadero, plan_nombre)
 
     @app.route("/")
     def index():
         """Página principal"""
-        return render_template("index.html", invernaderos=datos["invernaderos"])
+        return render_template("index.html", invernaderos=invernaderos_actuales())
 
     @app.route("/upload", methods=["POST"])
     def upload():
-        """Carga y parsea el archivo XML"""
-        if "file" not in request.files:
-            return render_template(
-                "index.html",
-                invernaderos=datos["invernaderos"],
-                error="No se seleccionó ningún archivo",
-            )
+        """
+        Carga el archivo XML mientras se lee la subida: el mismo recorrido lo
+        indexa, calcula el sha256 y guarda la copia en uploads/<sha256>.xml. Acepta un formulario multipart o el XML directo
+        como cuerpo (Content-Type application/xml), que se parsea a medida que llega
+        """
+        if request.mimetype in ("application/xml", "text/xml"):
+            stream = request.stream
+            total = request.content_length
+            archivo = None
+        else:
+            if "file" not in request.files:
+                return render_template(
+                    "index.html",
+                    invernaderos=invernaderos_actuales(),
+                    error="No se seleccionó ningún archivo",
+                )
 
-        file = request.files["file"]
+            file = request.files["file"]
 
-        if file.filename == "":
-            return render_template(
-                "index.html",
-                invernaderos=datos["invernaderos"],
-                error="No se seleccionó ningún archivo",
-            )
+            if file.filename == "":
+                return render_template(
+                    "index.html",
+                    invernaderos=invernaderos_actuales(),
+                    error="No se seleccionó ningún archivo",
+                )
 
-        if file and file.filename.endswith(".xml"):
-            filepath = os.path.join(app.config["UPLOAD_FOLDER"], file.filename)
-            file.save(filepath)
-
-            try:
-                # Parsear XML
-                parser = XMLParser(filepath)
-                parser.parse()
-
-                # Verificar que se cargaron invernaderos
-                if parser.invernaderos and parser.invernaderos.tamano > 0:
-                    datos["invernaderos"] = parser.invernaderos
-                    print(f"✓ Se cargaron {parser.invernaderos.tamano} invernaderos")
-
-                    # Preparar datos para JavaScript
-                    inv_dict = {}
-                    for inv in parser.invernaderos.iter():
-                        planes_list = []
-                        for plan_nombre, secuencia in inv.planes.iter():
-                            planes_list.append(plan_nombre)
-                        inv_dict[inv.nombre] = planes_list
-
-                    import json
-
-                    inv_json = json.dumps(inv_dict)
-
-                    return render_template(
-                        "index.html",
-                        invernaderos=parser.invernaderos,
-                        invernaderos_json=inv_json,
-                        mensaje=f"Archivo cargado exitosamente - {parser.invernaderos.tamano} invernadero(s)",
-                    )
-                else:
-                    return render_template(
-                        "index.html",
-                        invernaderos=None,
-                        error="El archivo XML no contiene invernaderos válidos",
-                    )
-            except Exception as e:
-                print(f"✗ Error al parsear: {str(e)}")
-                import traceback
-
-                traceback.print_exc()
+            if not file.filename.endswith(".xml"):
+                return render_template(
+                    "index.html",
+                    invernaderos=invernaderos_actuales(),
+                    error="Por favor selecciona un archivo XML válido",
+                )
+            stream = file.stream
+            total = None
+            archivo = file.filename
+
+        lector = LectorCopia(stream, app.config["UPLOAD_FOLDER"])
+        try:
+            # Indexar el XML: los invernaderos se parsean al pedirlos
+            indice = indexar(lector, total=total)
+            filepath, hash_xml = lector.terminar()
+            print(f"✓ Archivo guardado en {filepath}")
+
+            # Verificar que se cargaron invernaderos
+            if indice.invernaderos:
+                # Cada subida es una carga nueva: las ediciones de otras sesiones no se ven ni se borran
+                almacen.guardar_configuracion(hash_xml, filepath, indice, archivo)
+                usar_carga(almacen.crear_carga(hash_xml))
+                print(f"✓ Se indexaron {len(indice.invernaderos)} invernaderos")
+                return render_template(
+                    "index.html",
+                    invernaderos=invernaderos_actuales(),
+                    mensaje=f"Archivo cargado exitosamente - {len(indice.invernaderos)} invernadero(s)",
+                )
+            else:
                 return render_template(
                     "index.html",
                     invernaderos=None,
-                    error=f"Error al parsear XML: {str(e)}",
+                    error="El archivo XML no contiene invernaderos válidos",
                 )
-        else:
+        except Exception as e:
+            lector.descartar()
+            print(f"✗ Error al parsear: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
             return render_template(
                 "index.html",
-                invernaderos=datos["invernaderos"],
-                error="Por favor selecciona un archivo XML válido",
+                invernaderos=None,
+                error=f"Error al parsear XML: {str(e)}",
             )
 
     @app.route("/simulate", methods=["POST"])
@@ -105,45 +295,42 @@ def create_app():
 
         print(f"Simulando: {invernadero_nombre} - {plan_nombre}")
 
-        if not datos["invernaderos"]:
+        invernaderos = invernaderos_actuales()
+        if not invernaderos:
             return redirect(url_for("index"))
 
-        # Buscar invernadero
-        invernadero = None
-        for inv in datos["invernaderos"].iter():
-            if inv.nombre == invernadero_nombre:
-                invernadero = inv
-                break
+        try:
+            # Buscar invernadero (su modelo se parsea aquí la primera vez)
+            invernadero = buscar_invernadero(invernadero_nombre)
 
-        if not invernadero:
-            return render_template(
-                "index.html",
-                invernaderos=datos["invernaderos"],
-                error="Invernadero no encontrado",
-            )
+            if not invernadero:
+                return render_template(
+                    "index.html",
+                    invernaderos=invernaderos,
+                    error="Invernadero no encontrado",
+                )
 
-        # Verificar que el plan existe
-        plan = invernadero.buscar_plan(plan_nombre)
-        if not plan:
-            return render_template(
-                "index.html",
-                invernaderos=datos["invernaderos"],
-                error=f"Plan '{plan_nombre}' no encontrado",
-            )
+            # Verificar que el plan existe
+            plan = invernadero.buscar_plan(plan_nombre)
+            if plan is None:
+                return render_template(
+                    "index.html",
+                    invernaderos=invernaderos,
+                    error=f"Plan '{plan_nombre}' no encontrado",
+                )
 
-        # Ejecutar simulación
-        try:
-            resultados = invernadero.simular_plan(plan_nombre)
+            # Ejecutar simulación
+            resultados = obtener_resultado(invernadero, plan_nombre)
             if resultados:
-                datos["ultimo_resultado"] = resultados
+                session["ultima_clave"] = [invernadero_nombre, plan_nombre]
                 print(
                     f"✓ Simulación completada: {resultados['tiempo_optimo']} segundos"
                 )
-                return render_template("report_invernadero.html", results=resultados)
+                return render_reporte(resultados)
             else:
                 return render_template(
                     "index.html",
-                    invernaderos=datos["invernaderos"],
+                    invernaderos=invernaderos_actuales(),
                     error="Error: La simulación no produjo resultados",
                 )
         except Exception as e:
@@ -153,22 +340,106 @@ def create_app():
             traceback.print_exc()
             return render_template(
                 "index.html",
-                invernaderos=datos["invernaderos"],
+                invernaderos=invernaderos_actuales(),
                 error=f"Error en simulación: {str(e)}",
             )
 
+    @app.route("/editar_plan", methods=["POST"])
+    def editar_plan():
+        """
+        Agrega, inserta o reemplaza una entrada del plan y vuelve a simular solo
+        desde el último punto de control anterior al cambio
+        """
+        # El modelo compartido no se modifica: se edita una copia y se publica como
+        # nueva versión en la carga de la sesión, solo si nadie la editó desde que se leyó
+        g.pop("configuracion", None)
+        config = configuracion_actual()
+        invernadero = buscar_invernadero(request.form.get("invernadero"))
+        plan_nombre = request.form.get("plan")
+        if not invernadero or invernadero.buscar_plan(plan_nombre) is None:
+            return redirect(url_for("index"))
+
+        anterior = obtener_resultado(invernadero, plan_nombre)
+        accion = request.form.get("accion", "agregar")
+        try:
+            coincidencia = PATRON_INSTRUCCION.fullmatch(request.form.get("instruccion", "").strip())
+            if not coincidencia:
+                raise ValueError("Instrucción inválida, use el formato H1-P2")
+            entrada = request.form.get("entrada")
+            indice = int(entrada) - 1 if entrada else None  # La entrada se muestra desde 1
+            editado, desde = invernadero.editar_plan(
+                plan_nombre, accion, int(coincidencia.group(1)), int(coincidencia.group(2)), indice
+            )
+        except ValueError as e:
+            return render_reporte(anterior, error=str(e))
+
+        try:
+            version = almacen.guardar_invernadero(
+                config["carga"], editado, config["ediciones"].get(editado.nombre, 0)
+            )
+            if version is None:
+                return render_reporte(anterior, error="El plan cambió mientras se editaba, vuelva a intentarlo")
+            g.pop("configuracion", None)
+            resultado = editado.resimular_plan(anterior, desde, app.config["SIMULACION_MOTOR"])
+            guardar_resultado(resultado)
+            session["ultima_clave"] = [editado.nombre, plan_nombre]
+            print(f"✓ Plan editado ({accion}, entrada {desde + 1}): {resultado['tiempo_optimo']} segundos")
+            return render_reporte(resultado)
+        except Exception as e:
+            print(f"✗ Error al editar el plan: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            return render_template(
+                "index.html",
+                invernaderos=invernaderos_actuales(),
+                error=f"Error al editar el plan: {str(e)}",
+            )
+
+    @app.route("/simulate_all", methods=["POST"])
+    def simulate_all():
+        """Simula todos los planes de todos los invernaderos cargados"""
+        config = configuracion_actual()
+        if not config:
+            return redirect(url_for("index"))
+
+        try:
+            # Cada proceso del pool carga por su cuenta los invernaderos que simula
+            resultados = simular_todos(
+                config["invernaderos"],
+                workers=app.config["SIMULACION_WORKERS"],
+                modo=app.config["SIMULACION_MODO"],
+                motor=app.config["SIMULACION_MOTOR"],
+                ejecutor=pool_lote,
+                fuente=almacen.fuente(config),
+            )
+            resultados = [r for r in resultados if r]
+            for r in resultados:
+                guardar_resultado(r)
+            print(f"✓ Simulación por lotes completada: {len(resultados)} planes")
+            return render_template("report_lote.html", resultados=resultados)
+        except Exception as e:
+            print(f"✗ Error en simulación por lotes: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            return render_template(
+                "index.html",
+                invernaderos=invernaderos_actuales(),
+                error=f"Error en simulación por lotes: {str(e)}",
+            )
+
     @app.route("/generar_salida", methods=["POST"])
     def generar_salida():
         """Genera archivo XML de salida con los resultados"""
-        if not datos["ultimo_resultado"]:
+        resultado = resultado_actual()
+        if not resultado:
             return redirect(url_for("index"))
 
         try:
-            writer = SalidaWriter()
-            outpath = os.path.join(app.config["OUTPUT_FOLDER"], "salida.xml")
-            writer.write(datos["ultimo_resultado"], outpath)
-            print(f"✓ XML generado: {outpath}")
-            return send_file(outpath, as_attachment=True, download_name="salida.xml")
+            respuesta = enviar_salida(lambda stream: SalidaWriter().write_stream(resultado, stream))
+            print("✓ XML generado")
+            return respuesta
         except Exception as e:
             print(f"✗ Error al generar XML: {str(e)}")
             import traceback
@@ -176,21 +447,48 @@ def create_app():
             traceback.print_exc()
             return f"<h3>Error al generar XML</h3><p>{str(e)}</p><a href='/'>Volver</a>"
 
+    @app.route("/generar_salida_completa", methods=["POST"])
+    def generar_salida_completa():
+        """Genera un XML de salida con todos los planes de todos los invernaderos"""
+        invernaderos = invernaderos_actuales()
+        if not invernaderos:
+            return redirect(url_for("index"))
+
+        try:
+            # Cada plan se simula justo antes de escribirlo
+            grupos = simular_por_invernadero(invernaderos, app.config["SIMULACION_MOTOR"])
+            respuesta = enviar_salida(lambda stream: SalidaWriter().write_stream_varios(grupos, stream))
+            print("✓ XML completo generado")
+            return respuesta
+        except Exception as e:
+            print(f"✗ Error al generar XML completo: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            return f"<h3>Error al generar XML</h3><p>{str(e)}</p><a href='/'>Volver</a>"
+
     @app.route("/generar_grafo", methods=["POST"])
     def generar_grafo():
         """Genera gráfico Graphviz del estado de TDAs"""
-        if not datos["ultimo_resultado"]:
+        resultado = resultado_actual()
+        if not resultado:
             return redirect(url_for("index"))
 
         try:
             tiempo_t = request.form.get("tiempo_t")
             tiempo_t = int(tiempo_t) if tiempo_t else None
 
+            # Estado en t: se calcula una vez para el grafo y para la página
+            estado_t = None
+            if tiempo_t:
+                estado_t = resultado["invernadero"].estado_en(resultado, tiempo_t, app.config["SIMULACION_MOTOR"])
+
             gen = GraphvizGenerator()
             img_path = gen.generate_tda_graph(
-                datos["ultimo_resultado"],
+                resultado,
                 time_t=tiempo_t,
                 outpath=os.path.join("static", "tda_graph"),
+                estado_t=estado_t,
             )
 
             if img_path:
@@ -199,7 +497,8 @@ def create_app():
                     "graph_view.html",
                     image_path="tda_graph.png",
                     tiempo=tiempo_t,
-                    results=datos["ultimo_resultado"],
+                    results=resultado,
+                    estado_t=estado_t,
                 )
             else:
                 return "<h3>Error: Graphviz no está instalado</h3><p>Instala Graphviz: <a href='https://graphviz.org/download/'>https://graphviz.org/download/</a></p><a href='/'>Volver</a>"
@@ -210,6 +509,155 @@ def create_app():
             traceback.print_exc()
             return f"<h3>Error al generar grafo</h3><p>{str(e)}</p><p>Asegúrate de tener Graphviz instalado</p><a href='/'>Volver</a>"
 
+    @app.route("/api/resultado/<resultado_id>/resumen")
+    def api_resumen(resultado_id):
+        """Datos generales de un resultado: tiempo óptimo y totales por dron"""
+        resultado = resultado_por_id(resultado_id)
+        if not resultado:
+            return jsonify({"error": "Resultado no encontrado"}), 404
+
+        estado = resultado["estado"]
+        linea = resultado["linea_tiempo"]
+        return jsonify(
+            {
+                "invernadero": resultado["invernadero"].nombre,
+                "plan": resultado["plan_nombre"],
+                "tiempo_optimo": resultado["tiempo_optimo"],
+                "ultimo_segundo": linea.ultimo_segundo(),
+                "drones": [
+                    {"nombre": nombre, "hilera": hilera, "litros": litros, "gramos": gramos}
+                    for (nombre, litros, gramos), hilera in zip(estado.eficiencia(), estado.hileras)
+                ],
+                "total_litros": estado.total_litros(),
+                "total_gramos": estado.total_gramos(),
+            }
+        )
+
+    @app.route("/api/resultado/<resultado_id>/acciones")
+    def api_acciones(resultado_id):
+        """Una ventana de segundos de la tabla de acciones (?desde=&hasta=)"""
+        resultado = resultado_por_id(resultado_id)
+        if not resultado:
+            return jsonify({"error": "Resultado no encontrado"}), 404
+
+        try:
+            desde = max(1, int(request.args.get("desde", 1)))
+            hasta = request.args.get("hasta")
+            hasta = int(hasta) if hasta else desde + app.config["PAGINA_SEGUNDOS"] - 1
+        except ValueError:
+            return jsonify({"error": "desde y hasta deben ser enteros"}), 400
+        hasta = min(hasta, desde + app.config["PAGINA_MAX_SEGUNDOS"] - 1)
+
+        linea = resultado["linea_tiempo"]
+        tabla = linea.tabla(desde, hasta)
+        ultimo = linea.ultimo_segundo()
+        return jsonify(
+            {
+                "desde": desde,
+                "hasta": hasta,
+                "drones": tabla.nombres,
+                "filas": [[segundo, celdas] for segundo, celdas in tabla.filas()],
+                "siguiente": hasta + 1 if hasta < ultimo else None,
+            }
+        )
+
+    @app.route("/cache_stats")
+    def cache_stats():
+        """Contadores de la caché de resultados (aciertos, fallos, desalojos)"""
+        return jsonify(cache.estadisticas())
+
+    @app.route("/trabajos/upload", methods=["POST"])
+    def trabajo_upload():
+        """Guarda el XML y encola su carga; responde al instante con el id del trabajo"""
+        file = request.files.get("file")
+        if not file or not file.filename.endswith(".xml"):
+            return jsonify({"error": "Por favor selecciona un archivo XML válido"}), 400
+
+        # Copia y hash en una sola lectura; el nombre por contenido no pisa otras subidas
+        lector = LectorCopia(file.stream, app.config["UPLOAD_FOLDER"])
+        try:
+            filepath, hash_xml = lector.terminar()
+        except Exception:
+            lector.descartar()
+            raise
+        trabajo_id = trabajos.enviar(
+            "parse", {"ruta": filepath, "hash": hash_xml, "archivo": file.filename}, clave=hash_xml
+        )
+        return jsonify({"id": trabajo_id, "estado": url_for("estado_trabajo", trabajo_id=trabajo_id)}), 202
+
+    @app.route("/trabajos/simular", methods=["POST"])
+    def trabajo_simular_plan():
+        """Encola la simulación de un plan del XML cargado"""
+        config = configuracion_actual()
+        if not config:
+            return jsonify({"error": "No hay un archivo cargado"}), 400
+        invernadero = buscar_invernadero(request.form.get("invernadero"))
+        plan_nombre = request.form.get("plan")
+        if not invernadero or invernadero.buscar_plan(plan_nombre) is None:
+            return jsonify({"error": "Invernadero o plan no encontrado"}), 404
+
+        # Sin ediciones el mismo plan del mismo XML es el mismo trabajo para todas las sesiones
+        parametros = {
+            "hash": config["id"], "carga": config["carga"], "invernadero": invernadero.nombre, "plan": plan_nombre
+        }
+        clave = f"{config['id']}|{edicion(config, invernadero.nombre)}|{invernadero.nombre}|{plan_nombre}"
+        trabajo_id = trabajos.enviar("simular", parametros, clave=clave)
+        return jsonify({"id": trabajo_id, "estado": url_for("estado_trabajo", trabajo_id=trabajo_id)}), 202
+
+    @app.route("/trabajos/<trabajo_id>")
+    def estado_trabajo(trabajo_id):
+        """Estado y progreso de un trabajo (para consultar periódicamente)"""
+        estado = trabajos.estado(trabajo_id)
+        if estado is None:
+            return jsonify({"error": "Trabajo no encontrado"}), 404
+        if estado["estado"] == TERMINADO:
+            estado["resultado"] = url_for("resultado_trabajo", trabajo_id=trabajo_id)
+        return jsonify(estado)
+
+    @app.route("/trabajos/<trabajo_id>/resultado")
+    def resultado_trabajo(trabajo_id):
+        """Recoge el resultado de un trabajo terminado y muestra su página"""
+        estado = trabajos.estado(trabajo_id)
+        if estado is None:
+            return jsonify({"error": "Trabajo no encontrado"}), 404
+        if estado["estado"] == ERROR:
+            return jsonify(estado), 409
+        if estado["estado"] != TERMINADO:
+            return jsonify(estado), 202
+
+        # La sesión sigue con su carga si es del mismo XML; si no, empieza una carga nueva
+        hash_xml = estado["parametros"]["hash"]
+        config = configuracion_actual()
+        if config is None or config["id"] != hash_xml:
+            carga = almacen.crear_carga(hash_xml)
+            if carga is None:
+                return jsonify({"error": "El archivo del trabajo ya no está disponible"}), 410
+            usar_carga(carga)
+        invernaderos = invernaderos_actuales()
+
+        if estado["tipo"] == "parse":
+            return render_template(
+                "index.html",
+                invernaderos=invernaderos,
+                mensaje=f"Archivo cargado exitosamente - {invernaderos.tamano} invernadero(s)",
+            )
+
+        invernadero = buscar_invernadero(estado["parametros"]["invernadero"])
+        plan_nombre = estado["parametros"]["plan"]
+        if not invernadero or invernadero.buscar_plan(plan_nombre) is None:
+            return jsonify({"error": "Invernadero o plan no encontrado"}), 404
+        # Viene del almacén; si el plan se editó después del trabajo se vuelve a simular
+        resultado = obtener_resultado(invernadero, plan_nombre)
+        session["ultima_clave"] = [invernadero.nombre, plan_nombre]
+        return render_reporte(resultado)
+
+    @app.route("/metrics")
+    def metrics():
+        """Métricas en el formato de texto de Prometheus"""
+        if not metricas.activo:
+            return "Métricas desactivadas", 404
+        return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
+
     @app.route("/ayuda")
     def ayuda():
         """Página de ayuda y acerca de"""
@@ -0,0 +1,218 @@
+"""
+Benchmark de punta a punta por etapas sobre una entrada sintética:
+XMLParser.parse, el indexado para la carga diferida, la recarga desde las
+instantáneas binarias de cada invernadero, simular_plan (todos los planes), SalidaWriter.write,
+GraphvizGenerator.generate_tda_graph y el reporte HTML vía el cliente de
+pruebas de Flask. Por etapa guarda el mejor tiempo de varias repeticiones y
+el pico de memoria (tracemalloc, en una corrida aparte para no afectar el tiempo).
+
+Uso: python benchmarks/bench_etapas.py [opciones de generar_entrada.py]
+     [--entrada archivo.xml] [--repeticiones N] [--json resultados.json]
+     [--comparar base.json]
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+from benchmarks.generar_entrada import generar_entrada, argumentos, opciones_generador
+from parsers.xml_parser import XMLParser
+from parsers.instantanea import guardar_instantanea, cargar_instantanea, ruta_instantanea
+from parsers.indice_xml import indexar
+from generators.salida_writer import SalidaWriter
+
+
+def medir(funcion, repeticiones):
+    """(mejor tiempo en segundos, pico de memoria en bytes, último valor devuelto)"""
+    mejor = None
+    valor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        valor = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mejor, pico, valor
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, timeout=10
+        )
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def etapas(entrada, carpeta, repeticiones):
+    """Corre cada etapa y devuelve {etapa: {"segundos", "pico_bytes", ...}}"""
+    resultados = {}
+
+    def parsear():
+        parser = XMLParser(entrada)
+        parser.parse()
+        return parser
+
+    segundos, pico, parser = medir(parsear, repeticiones)
+    resultados["parse"] = {"segundos": segundos, "pico_bytes": pico}
+
+    segundos, pico, _ = medir(lambda: indexar(entrada), repeticiones)
+    resultados["indexar"] = {"segundos": segundos, "pico_bytes": pico}
+
+    # Una instantánea por invernadero, como las deja InvernaderosDiferidos junto al XML
+    copia = os.path.join(carpeta, "entrada.xml")
+    instantaneas = [
+        guardar_instantanea([inv], ruta_instantanea(copia, posicion))
+        for posicion, inv in enumerate(parser.invernaderos.iter())
+    ]
+    segundos, pico, _ = medir(lambda: [cargar_instantanea(ruta) for ruta in instantaneas], repeticiones)
+    resultados["instantanea"] = {
+        "segundos": segundos,
+        "pico_bytes": pico,
+        "bytes": sum(os.path.getsize(ruta) for ruta in instantaneas),
+    }
+
+    invernaderos = list(parser.invernaderos.iter())
+    tareas = [(inv, nombre) for inv in invernaderos for nombre, _ in inv.planes.iter()]
+
+    def simular():
+        return [inv.simular_plan(nombre) for inv, nombre in tareas]
+
+    segundos, pico, simulados = medir(simular, repeticiones)
+    resultados["simular_plan"] = {
+        "segundos": segundos,
+        "pico_bytes": pico,
+        "planes": len(tareas),
+        "segundos_simulados": sum(r["tiempo_optimo"] for r in simulados if r),
+    }
+
+    resultado = simulados[0]
+    salida = os.path.join(carpeta, "salida.xml")
+    segundos, pico, _ = medir(lambda: SalidaWriter().write(resultado, salida), repeticiones)
+    resultados["salida_xml"] = {"segundos": segundos, "pico_bytes": pico, "bytes": os.path.getsize(salida)}
+
+    try:
+        from generators.graphviz_gen import GraphvizGenerator
+    except ImportError:
+        resultados["grafo"] = {"omitida": "paquete graphviz no instalado"}
+    else:
+        generador = GraphvizGenerator()
+        mitad = max(1, resultado["tiempo_optimo"] // 2)
+        grafo = os.path.join(carpeta, "tda_graph")
+        segundos, pico, imagen = medir(
+            lambda: generador.generate_tda_graph(resultado, time_t=mitad, outpath=grafo), repeticiones
+        )
+        # Sin el ejecutable dot solo se guarda el .dot
+        resultados["grafo"] = {"segundos": segundos, "pico_bytes": pico, "renderizado": imagen is not None}
+
+    try:
+        from app import create_app
+    except ImportError:
+        resultados["reporte_html"] = {"omitida": "Flask no instalado"}
+    else:
+        anterior = os.getcwd()
+        os.chdir(carpeta)  # La app crea uploads/, outputs/ y static/ en el directorio actual
+        try:
+            cliente = create_app().test_client()
+            with open(entrada, "rb") as f:
+                datos = f.read()
+            cliente.post(
+                "/upload",
+                data={"file": (io.BytesIO(datos), "entrada.xml")},
+                content_type="multipart/form-data",
+            )
+            formulario = {"invernadero": resultado["invernadero"].nombre, "plan": resultado["plan_nombre"]}
+            cliente.post("/simulate", data=formulario)  # Deja el resultado en la caché
+
+            # Con la caché caliente se mide solo el armado del reporte
+            segundos, pico, respuesta = medir(lambda: cliente.post("/simulate", data=formulario), repeticiones)
+            resultados["reporte_html"] = {
+                "segundos": segundos,
+                "pico_bytes": pico,
+                "estado_http": respuesta.status_code,
+                "bytes": len(respuesta.data),
+            }
+        finally:
+            os.chdir(anterior)
+
+    return resultados
+
+
+def comparar(actual, base):
+    """Imprime la razón actual/base del tiempo de cada etapa"""
+    print(f"\nComparación contra {base.get('commit') or 'base'}:")
+    for etapa, datos in actual["etapas"].items():
+        previo = base.get("etapas", {}).get(etapa, {})
+        if "segundos" in datos and previo.get("segundos"):
+            razon = datos["segundos"] / previo["segundos"]
+            marca = "  ⚠ más lento" if razon > 1.10 else ""
+            print(f"{etapa:>14} {previo['segundos']:>10.4f} -> {datos['segundos']:>10.4f}  x{razon:.2f}{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta por etapas")
+    argumentos(parser)
+    parser.add_argument("--entrada", help="usar este XML en lugar de generar uno")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        entrada = args.entrada
+        if entrada is None:
+            entrada = os.path.join(carpeta, "entrada.xml")
+            with open(entrada, "w", encoding="utf-8") as f:
+                generar_entrada(f, **opciones_generador(args))
+        entrada = os.path.abspath(entrada)
+
+        informe = {
+            "commit": commit_actual(),
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "entrada": args.entrada or opciones_generador(args),
+            "entrada_bytes": os.path.getsize(entrada),
+            "repeticiones": args.repeticiones,
+            "etapas": etapas(entrada, carpeta, args.repeticiones),
+        }
+    # ru_maxrss está en KB en Linux
+    informe["rss_max_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    print(f"Entrada: {informe['entrada_bytes'] / 1e6:.1f} MB, commit {informe['commit']}")
+    print(f"{'etapa':>14} {'segundos':>10} {'pico MB':>9}")
+    for etapa, datos in informe["etapas"].items():
+        if "omitida" in datos:
+            print(f"{etapa:>14} {'omitida: ' + datos['omitida']:>20}")
+        else:
+            print(f"{etapa:>14} {datos['segundos']:>10.4f} {datos['pico_bytes'] / 1e6:>9.1f}")
+    print(f"RSS máximo: {informe['rss_max_bytes'] / 1e6:.1f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"✓ Resultados en {args.json}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(informe, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark de simulación por lotes: tiempo de pared de simular_todos con
+1, 2, 4, ... procesos sobre invernaderos sintéticos.
+
+Uso: python benchmarks/bench_lote.py [invernaderos] [planes] [instrucciones]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.dominio import Invernadero, Planta, Dron, PlanRiego
+from models.tda import ListaEnlazada
+from simulator.lote import simular_todos
+
+
+def invernadero_sintetico(nombre, hileras, plantas, planes, instrucciones, semilla):
+    azar = random.Random(semilla)
+    inv = Invernadero(nombre)
+    inv.numero_hileras = hileras
+    inv.plantas_por_hilera = plantas
+    for h in range(1, hileras + 1):
+        for p in range(1, plantas + 1):
+            inv.agregar_planta(Planta("planta", h, p, azar.randint(1, 5), azar.randint(1, 500)))
+        dron = Dron(str(h), f"DR{h:02d}")
+        dron.hilera = h
+        inv.agregar_dron(dron)
+    for k in range(planes):
+        plan = PlanRiego(f"Plan {k}")
+        for _ in range(instrucciones):
+            plan.agregar(azar.randint(1, hileras), azar.randint(1, plantas))
+        inv.agregar_plan(plan.nombre, plan)
+    return inv
+
+
+def main():
+    n_inv = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n_planes = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    n_instr = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+
+    invernaderos = ListaEnlazada()
+    for i in range(n_inv):
+        invernaderos.append(invernadero_sintetico(f"Inv {i}", 20, 500, n_planes, n_instr, i))
+
+    cpus = os.cpu_count() or 1
+    print(f"{n_inv} invernaderos x {n_planes} planes x {n_instr} instrucciones, {cpus} CPU(s)")
+    print(f"{'workers':>8} {'segundos':>10} {'speedup':>8}")
+    base = None
+    niveles = [w for w in (1, 2, 4, 8, 16, 32, 64) if w < cpus] + [cpus]
+    for workers in niveles:
+        inicio = time.perf_counter()
+        resultados = simular_todos(invernaderos, workers=workers, modo="procesos")
+        duracion = time.perf_counter() - inicio
+        base = base or duracion
+        print(f"{workers:>8} {duracion:>10.3f} {base / duracion:>8.2f}")
+        assert len(resultados) == n_inv * n_planes
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark de memoria: bytes que quedan retenidos (tracemalloc) al cargar una
+entrada sintética con XMLParser y desde las instantáneas binarias de sus
+invernaderos, y el costo
+por elemento de las representaciones de models.tda y models.dominio:
+TablaPlantas (columnas) contra una ListaEnlazada de objetos Planta (con y
+sin __slots__), y ArregloDinamico contra ListaEnlazada.
+
+Uso: python benchmarks/bench_memoria.py [opciones de generar_entrada.py]
+     [--entrada archivo.xml] [--elementos N] [--json resultados.json]
+     [--comparar base.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_etapas import commit_actual
+from benchmarks.generar_entrada import generar_entrada, argumentos, opciones_generador
+from models.dominio import Planta, TablaPlantas
+from models.tda import ListaEnlazada, ArregloDinamico
+from parsers.instantanea import guardar_instantanea, cargar_instantanea, ruta_instantanea
+from parsers.xml_parser import XMLParser
+
+
+class PlantaConDict:
+    """Planta como era antes de __slots__ (un __dict__ por objeto), solo para comparar"""
+
+    def __init__(self, nombre, hilera, posicion, litros, gramos):
+        self.nombre = nombre
+        self.hilera = hilera
+        self.posicion = posicion
+        self.litros = litros
+        self.gramos = gramos
+
+
+def retenido(funcion):
+    """(bytes retenidos por lo que devuelve funcion, valor devuelto)"""
+    tracemalloc.start()
+    antes, _ = tracemalloc.get_traced_memory()
+    valor = funcion()
+    despues, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return despues - antes, valor
+
+
+def plantas_de_prueba(n):
+    # Nombres repetidos como en una entrada real (misma especie en muchas posiciones)
+    return [(f"planta {i % 50}", i // 100 + 1, i % 100 + 1, i % 7, i % 500) for i in range(n)]
+
+
+def representaciones(n):
+    """{representacion: {"bytes", "por_elemento"}} para n plantas y n elementos de lista"""
+    filas = plantas_de_prueba(n)
+    resultados = {}
+
+    def lista_de(clase):
+        def construir():
+            lista = ListaEnlazada()
+            for fila in filas:
+                lista.append(clase(*fila))
+            return lista
+        return construir
+
+    def tabla():
+        plantas = TablaPlantas()
+        for fila in filas:
+            plantas.agregar(*fila)
+        return plantas
+
+    def coleccion(clase):
+        dato = object()  # El mismo elemento en todas las posiciones: se mide solo la estructura
+
+        def construir():
+            lista = clase()
+            for _ in range(n):
+                lista.append(dato)
+            return lista
+        return construir
+
+    casos = {
+        "plantas_dict_en_lista": lista_de(PlantaConDict),
+        "plantas_slots_en_lista": lista_de(Planta),
+        "tabla_plantas": tabla,
+        "lista_enlazada": coleccion(ListaEnlazada),
+        "arreglo_dinamico": coleccion(ArregloDinamico),
+    }
+    for nombre, construir in casos.items():
+        bytes_retenidos, _ = retenido(construir)
+        resultados[nombre] = {"bytes": bytes_retenidos, "por_elemento": bytes_retenidos / n}
+    return resultados
+
+
+def configuracion(entrada, carpeta):
+    """Bytes retenidos por los invernaderos parseados del XML y cargados desde sus instantáneas"""
+    def parsear():
+        parser = XMLParser(entrada)
+        parser.parse()
+        return parser.invernaderos
+
+    parseado, invernaderos = retenido(parsear)
+    plantas = sum(inv.plantas.tamano for inv in invernaderos.iter())
+    copia = os.path.join(carpeta, "entrada.xml")
+    instantaneas = [
+        guardar_instantanea([inv], ruta_instantanea(copia, posicion))
+        for posicion, inv in enumerate(invernaderos.iter())
+    ]
+    cargado, _ = retenido(lambda: [cargar_instantanea(ruta) for ruta in instantaneas])
+    return {
+        "plantas": plantas,
+        "parse": {"bytes": parseado, "por_planta": parseado / max(plantas, 1)},
+        "instantanea": {"bytes": cargado, "por_planta": cargado / max(plantas, 1)},
+    }
+
+
+def comparar(actual, base):
+    """Imprime la razón actual/base de los bytes retenidos por la configuración"""
+    print(f"\nComparación contra {base.get('commit') or 'base'}:")
+    for etapa in ("parse", "instantanea"):
+        previo = base.get("configuracion", {}).get(etapa, {})
+        if previo.get("bytes"):
+            datos = actual["configuracion"][etapa]
+            razon = datos["bytes"] / previo["bytes"]
+            print(f"{etapa:>14} {previo['bytes'] / 1e6:>9.2f} -> {datos['bytes'] / 1e6:>9.2f} MB  x{razon:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de los modelos")
+    argumentos(parser)
+    parser.add_argument("--entrada", help="usar este XML en lugar de generar uno")
+    parser.add_argument("--elementos", type=int, default=100000, help="elementos para comparar representaciones")
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        entrada = args.entrada
+        if entrada is None:
+            entrada = os.path.join(carpeta, "entrada.xml")
+            with open(entrada, "w", encoding="utf-8") as f:
+                generar_entrada(f, **opciones_generador(args))
+        informe = {
+            "commit": commit_actual(),
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "entrada": args.entrada or opciones_generador(args),
+            "entrada_bytes": os.path.getsize(entrada),
+            "configuracion": configuracion(entrada, carpeta),
+            "representaciones": representaciones(args.elementos),
+        }
+
+    config = informe["configuracion"]
+    print(f"Entrada: {informe['entrada_bytes'] / 1e6:.1f} MB, {config['plantas']} plantas, commit {informe['commit']}")
+    print(f"{'carga':>14} {'MB':>9} {'bytes/planta':>13}")
+    for etapa in ("parse", "instantanea"):
+        print(f"{etapa:>14} {config[etapa]['bytes'] / 1e6:>9.2f} {config[etapa]['por_planta']:>13.1f}")
+    print(f"\n{args.elementos} elementos:")
+    print(f"{'representación':>24} {'MB':>9} {'bytes/elem':>11}")
+    for nombre, datos in informe["representaciones"].items():
+        print(f"{nombre:>24} {datos['bytes'] / 1e6:>9.2f} {datos['por_elemento']:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"✓ Resultados en {args.json}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(informe, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
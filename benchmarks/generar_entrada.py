@@ -0,0 +1,114 @@
+"""
+Generador de archivos de entrada sintéticos (mismo formato que entrada.xml)
+válidos a cualquier escala: todas las plantas existen, cada hilera con plan
+tiene dron asignado y todas las instrucciones son regables.
+
+Uso: python benchmarks/generar_entrada.py salida.xml [--invernaderos N]
+     [--hileras N] [--plantas N] [--drones N] [--planes N]
+     [--instrucciones N] [--semilla N]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators.salida_writer import EscritorXMLIndentado
+
+NOMBRES_PLANTAS = ("matilisguate", "ciprés", "ciprés italiano", "pino", "caoba", "madre cacao", "aripín")
+
+
+def generar_entrada(stream, invernaderos=2, hileras=10, plantas=50, drones=None,
+                    planes=2, instrucciones=1000, semilla=0):
+    """
+    Escribe la configuración en un stream de texto, invernadero por
+    invernadero, sin armar el documento en memoria.
+    drones: drones por invernadero (uno por hilera, desde la 1); por defecto uno en cada hilera
+    """
+    azar = random.Random(semilla)
+    drones = hileras if drones is None else max(1, min(drones, hileras))
+    xml = EscritorXMLIndentado(stream, indent="    ")
+    xml.declaracion()
+    xml.abrir("configuracion")
+
+    xml.abrir("listaDrones")
+    for i in range(1, drones + 1):
+        xml.vacio("dron", {"id": str(i), "nombre": f"DR{i:02d}"})
+    xml.cerrar()
+
+    xml.abrir("listaInvernaderos")
+    for k in range(invernaderos):
+        xml.abrir("invernadero", {"nombre": f"Invernadero {k + 1}"})
+        xml.texto("numeroHileras", str(hileras))
+        xml.texto("plantasXhilera", str(plantas))
+
+        xml.abrir("listaPlantas")
+        for h in range(1, hileras + 1):
+            for p in range(1, plantas + 1):
+                xml.texto(
+                    "planta",
+                    azar.choice(NOMBRES_PLANTAS),
+                    {
+                        "hilera": str(h),
+                        "posicion": str(p),
+                        "litrosAgua": str(azar.randint(1, 5)),
+                        "gramosFertilizante": str(azar.randint(1, 500)),
+                    },
+                )
+        xml.cerrar()
+
+        xml.abrir("asignacionDrones")
+        for h in range(1, drones + 1):
+            xml.vacio("dron", {"id": str(h), "hilera": str(h)})
+        xml.cerrar()
+
+        # Solo se riegan hileras con dron
+        xml.abrir("planesRiego")
+        for n in range(planes):
+            texto = ", ".join(
+                f"H{azar.randint(1, drones)}-P{azar.randint(1, plantas)}" for _ in range(instrucciones)
+            )
+            xml.texto("plan", texto, {"nombre": f"Plan {n + 1}"})
+        xml.cerrar()
+
+        xml.cerrar()  # invernadero
+    xml.cerrar()  # listaInvernaderos
+    xml.cerrar()  # configuracion
+
+
+def argumentos(parser):
+    """Opciones de tamaño compartidas con bench_etapas.py"""
+    parser.add_argument("--invernaderos", type=int, default=2)
+    parser.add_argument("--hileras", type=int, default=10)
+    parser.add_argument("--plantas", type=int, default=50, help="plantas por hilera")
+    parser.add_argument("--drones", type=int, default=None, help="drones por invernadero (def.: uno por hilera)")
+    parser.add_argument("--planes", type=int, default=2, help="planes por invernadero")
+    parser.add_argument("--instrucciones", type=int, default=1000, help="instrucciones por plan")
+    parser.add_argument("--semilla", type=int, default=0)
+
+
+def opciones_generador(args):
+    return {
+        "invernaderos": args.invernaderos,
+        "hileras": args.hileras,
+        "plantas": args.plantas,
+        "drones": args.drones,
+        "planes": args.planes,
+        "instrucciones": args.instrucciones,
+        "semilla": args.semilla,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un entrada.xml sintético")
+    parser.add_argument("salida")
+    argumentos(parser)
+    args = parser.parse_args()
+    with open(args.salida, "w", encoding="utf-8") as f:
+        generar_entrada(f, **opciones_generador(args))
+    print(f"✓ {args.salida}: {os.path.getsize(args.salida) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
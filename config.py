@@ -3,3 +3,25 @@ import os
 class Config:
     SECRET_KEY = "guateriegos_secret"
     UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
+    # Simulación por lotes (/simulate_all): procesos en paralelo y modo del pool
+    SIMULACION_WORKERS = int(os.environ.get("GUATERIEGOS_WORKERS", os.cpu_count() or 1))
+    SIMULACION_MODO = os.environ.get("GUATERIEGOS_MODO_LOTE", "procesos")
+    # Motor de simulación: "eventos" (rápido), "vectorial" (NumPy en planes largos si está instalado)
+    # o "referencia" (segundo a segundo)
+    SIMULACION_MOTOR = os.environ.get("GUATERIEGOS_MOTOR", "eventos")
+    # Caché LRU de resultados de simulación
+    CACHE_MAX_ENTRADAS = int(os.environ.get("GUATERIEGOS_CACHE_ENTRADAS", 64))
+    CACHE_MAX_BYTES = int(os.environ.get("GUATERIEGOS_CACHE_MB", 256)) * 1024 * 1024
+    # Trabajos en segundo plano (/trabajos/...): base SQLite (por defecto outputs/trabajos.db) e hilos
+    TRABAJOS_DB = os.environ.get("GUATERIEGOS_TRABAJOS_DB")
+    TRABAJOS_WORKERS = int(os.environ.get("GUATERIEGOS_TRABAJOS_WORKERS", 2))
+    # Configuraciones y resultados compartidos entre workers (por defecto outputs/almacen.db)
+    ALMACEN_DB = os.environ.get("GUATERIEGOS_ALMACEN_DB")
+    # Invernaderos parseados que cada proceso mantiene en memoria por archivo (el resto se carga al pedirlo)
+    INVERNADEROS_EN_MEMORIA = int(os.environ.get("GUATERIEGOS_INVERNADEROS_MEMORIA", 8))
+    # Métricas (/metrics) y encabezado Server-Timing por petición
+    METRICAS_ACTIVAS = os.environ.get("GUATERIEGOS_METRICAS", "1") != "0"
+    METRICAS_SERVER_TIMING = os.environ.get("GUATERIEGOS_SERVER_TIMING", "0") == "1"
+    # Paginación de la tabla de acciones (/api/resultado/<id>/acciones)
+    PAGINA_SEGUNDOS = 200
+    PAGINA_MAX_SEGUNDOS = 5000
@@ -1,14 +1,21 @@
 from graphviz import Digraph
+from services.metricas import metricas
+
+# Segundos que se muestran alrededor del tiempo t
+VENTANA_SEGUNDOS = 10
 
 
 class GraphvizGenerator:
     """Generador de gráficos Graphviz para visualizar TDAs"""
 
-    def generate_tda_graph(self, result, time_t=None, outpath="static/tda_graph"):
+    @metricas.cronometrar("grafo")
+    def generate_tda_graph(self, result, time_t=None, outpath="static/tda_graph", estado_t=None):
         """
         Genera un grafo mostrando el estado de los TDAs en un tiempo t
-        - Plan de riego (secuencia)
-        - Acciones ejecutadas hasta el tiempo t
+        - Plan de riego (secuencia, desde la instrucción en curso en t)
+        - Estado de cada dron en t (posición, litros, gramos)
+        - Acciones de la ventana de segundos alrededor de t
+        estado_t: estado en t ya calculado con Invernadero.estado_en (si no, se calcula aquí)
         """
         dot = Digraph(comment="Estado de TDAs", format="png")
         dot.attr(rankdir="TB", size="10,8")
@@ -23,34 +30,60 @@ class GraphvizGenerator:
             fontname="Arial Bold",
         )
 
+        # Estado en t a partir de los puntos de control de la simulación
+        linea = result["linea_tiempo"]
+        if time_t and estado_t is None:
+            estado_t = result["invernadero"].estado_en(result, time_t)
+
         # Obtener secuencia del plan
         secuencia_plan = result["invernadero"].buscar_plan(result["plan_nombre"])
 
         if secuencia_plan:
-            # Crear nodos para cada elemento de la secuencia
+            # Crear nodos para la secuencia desde la entrada que sigue en t
+            inicio_plan = estado_t.indice if estado_t else 0
             prev_node = "plan"
-            idx = 0
-            for item in secuencia_plan.iter():
+            if inicio_plan:
+                dot.node("seq_prev", f"... {inicio_plan} instrucciones anteriores", fillcolor="lightgray")
+                dot.edge(prev_node, "seq_prev")
+                prev_node = "seq_prev"
+            for idx in range(inicio_plan, len(secuencia_plan)):
+                hilera, posicion = secuencia_plan[idx]
                 node_id = f"seq_{idx}"
-                dot.node(node_id, item, fillcolor="lightyellow")
+                dot.node(node_id, f"H{hilera}-P{posicion}", fillcolor="lightyellow")
                 dot.edge(prev_node, node_id)
                 prev_node = node_id
-                idx += 1
                 # Limitar a 15 nodos para no saturar
-                if idx >= 15:
+                if idx - inicio_plan + 1 >= 15 and idx + 1 < len(secuencia_plan):
                     dot.node("seq_more", "...más elementos", fillcolor="lightgray")
                     dot.edge(prev_node, "seq_more")
                     break
 
-        # Filtrar acciones hasta tiempo t (si se especifica)
-        acciones_mostrar = result["acciones_lista"]
-        if time_t is not None:
-            acciones_mostrar = [
-                (s, acc) for s, acc in result["acciones_lista"] if s <= time_t
-            ]
+        # Estado de cada dron al terminar el segundo t
+        if estado_t:
+            dot.node(
+                "estado_title",
+                f"Estado en t={time_t}s",
+                fillcolor="lightpink",
+                fontsize="12",
+                fontname="Arial Bold",
+            )
+            for idx, (nombre, litros, gramos) in enumerate(estado_t.eficiencia()):
+                estado_id = f"estado_{idx}"
+                label = (
+                    f"{nombre}\\nH{estado_t.hileras[idx]}P{estado_t.posiciones[idx]}"
+                    f"\\n{litros} L - {gramos} g"
+                )
+                dot.node(estado_id, label, fillcolor="white", shape="box", fontsize="10")
+                dot.edge("estado_title", estado_id)
+
+        # Ventana de segundos alrededor de t (o los primeros si no hay t)
+        desde = max(1, time_t - VENTANA_SEGUNDOS // 2 + 1) if time_t else 1
+        hasta = desde + VENTANA_SEGUNDOS - 1
+        segundos_antes, segundos_despues = linea.contar_fuera(desde, hasta)
 
         # Crear subgrafo para acciones por tiempo
-        if acciones_mostrar:
+        ventana = list(linea.ventana(desde, hasta))
+        if ventana:
             dot.node(
                 "acciones_title",
                 "Acciones por Tiempo",
@@ -59,11 +92,22 @@ class GraphvizGenerator:
                 fontname="Arial Bold",
             )
 
-            # Limitar a los primeros 10 segundos para no saturar el grafo
-            for segundo, acciones in acciones_mostrar[:10]:
+            if segundos_antes:
+                dot.node(
+                    "prev_actions",
+                    f"... {segundos_antes} segundos antes",
+                    fillcolor="lightgray",
+                    shape="plaintext",
+                )
+                dot.edge("acciones_title", "prev_actions")
+
+            for segundo, acciones in ventana:
                 tiempo_id = f"tiempo_{segundo}"
                 dot.node(
-                    tiempo_id, f"Segundo {segundo}", fillcolor="orange", shape="ellipse"
+                    tiempo_id,
+                    f"Segundo {segundo}",
+                    fillcolor="red" if segundo == time_t else "orange",
+                    shape="ellipse",
                 )
                 dot.edge("acciones_title", tiempo_id)
 
@@ -77,10 +121,10 @@ class GraphvizGenerator:
                     dot.edge(tiempo_id, accion_id)
 
             # Si hay más acciones, indicarlo
-            if len(acciones_mostrar) > 10:
+            if segundos_despues:
                 dot.node(
                     "more_actions",
-                    f"... {len(acciones_mostrar) - 10} segundos más",
+                    f"... {segundos_despues} segundos más",
                     fillcolor="lightgray",
                     shape="plaintext",
                 )
@@ -90,7 +134,7 @@ class GraphvizGenerator:
         if time_t:
             dot.node(
                 "time_info",
-                f"Visualizando hasta t={time_t}s",
+                f"Visualizando alrededor de t={time_t}s",
                 fillcolor="pink",
                 shape="note",
             )
@@ -1,5 +1,71 @@
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+import io
+from services.metricas import metricas
+
+
+def escapar_xml(texto):
+    """Escapa texto y atributos igual que minidom (&, <, ", >)"""
+    return (
+        texto.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+class EscritorXMLIndentado:
+    """
+    Emite XML indentado directamente sobre un stream, elemento por elemento,
+    con el mismo formato que minidom.toprettyxml(indent="  ")
+    """
+
+    def __init__(self, stream, indent="  "):
+        self.stream = stream
+        self.indent = indent
+        self.abiertos = []  # Pila de etiquetas abiertas
+        self.pendiente = False  # La última etiqueta abierta aún no tiene hijos
+
+    def declaracion(self):
+        self.stream.write('<?xml version="1.0" ?>\n')
+
+    def _cerrar_apertura(self):
+        if self.pendiente:
+            self.stream.write(">\n")
+            self.pendiente = False
+
+    def _etiqueta(self, tag, atributos):
+        partes = [self.indent * len(self.abiertos), "<", tag]
+        if atributos:
+            for nombre, valor in atributos.items():
+                partes.append(f' {nombre}="{escapar_xml(valor)}"')
+        return "".join(partes)
+
+    def abrir(self, tag, atributos=None):
+        """Abre un elemento; se cierra como <tag/> si no recibe hijos"""
+        self._cerrar_apertura()
+        self.stream.write(self._etiqueta(tag, atributos))
+        self.abiertos.append(tag)
+        self.pendiente = True
+
+    def cerrar(self):
+        tag = self.abiertos.pop()
+        if self.pendiente:
+            self.stream.write("/>\n")
+            self.pendiente = False
+        else:
+            self.stream.write(f"{self.indent * len(self.abiertos)}</{tag}>\n")
+
+    def vacio(self, tag, atributos=None):
+        """Elemento sin hijos: <tag .../>"""
+        self.abrir(tag, atributos)
+        self.cerrar()
+
+    def texto(self, tag, texto, atributos=None):
+        """Elemento con solo texto: <tag>texto</tag>"""
+        if not texto:
+            self.vacio(tag, atributos)
+            return
+        self._cerrar_apertura()
+        self.stream.write(f"{self._etiqueta(tag, atributos)}>{escapar_xml(texto)}</{tag}>\n")
 
 
 class SalidaWriter:
@@ -10,66 +76,91 @@ class SalidaWriter:
         Genera el archivo XML de salida con los resultados de la simulación
         según el formato especificado en el documento
         """
-        # Crear estructura XML
-        root = ET.Element("datosSalida")
-        lista_inv = ET.SubElement(root, "listaInvernaderos")
+        return self.write_varios([(result["invernadero"], [result])], outpath)
 
-        # Datos del invernadero
-        inv_elem = ET.SubElement(
-            lista_inv, "invernadero", {"nombre": result["invernadero"].nombre}
-        )
-        lista_planes = ET.SubElement(inv_elem, "listaPlanes")
+    def write_stream(self, result, stream):
+        """Escribe la salida de un solo resultado en un stream"""
+        self.write_stream_varios([(result["invernadero"], [result])], stream)
+
+    def write_varios(self, grupos, outpath="salida.xml"):
+        """
+        Genera un único XML con varios invernaderos y planes.
+        grupos: iterable de (invernadero, resultados); resultados puede ser un
+        generador que simula cada plan justo antes de escribirlo, así la memoria
+        no crece con la cantidad de planes
+        """
+        with open(outpath, "w", encoding="utf-8") as f:
+            self.write_stream_varios(grupos, f)
 
+        return outpath
+
+    @metricas.cronometrar("salida_xml")
+    def write_stream_varios(self, grupos, stream):
+        """
+        Escribe la salida en un stream (archivo, socket, respuesta HTTP) a
+        medida que recorre las líneas de tiempo, sin construir el documento en
+        memoria. Los streams binarios se envuelven para escribir UTF-8
+        """
+        if not isinstance(stream, io.TextIOBase):
+            stream = io.TextIOWrapper(stream, encoding="utf-8", write_through=True)
+            try:
+                self._escribir(grupos, EscritorXMLIndentado(stream))
+            finally:
+                stream.flush()
+                stream.detach()
+        else:
+            self._escribir(grupos, EscritorXMLIndentado(stream))
+
+    def _escribir(self, grupos, xml):
+        xml.declaracion()
+        xml.abrir("datosSalida")
+        xml.abrir("listaInvernaderos")
+
+        for invernadero, resultados in grupos:
+            # Datos del invernadero
+            xml.abrir("invernadero", {"nombre": invernadero.nombre})
+            xml.abrir("listaPlanes")
+            for result in resultados:
+                if result:
+                    self._escribir_plan(result, xml)
+            xml.cerrar()  # listaPlanes
+            xml.cerrar()  # invernadero
+
+        xml.cerrar()  # listaInvernaderos
+        xml.cerrar()  # datosSalida
+
+    def _escribir_plan(self, result, xml):
         # Datos del plan
-        plan_elem = ET.SubElement(
-            lista_planes, "plan", {"nombre": result["plan_nombre"]}
-        )
+        xml.abrir("plan", {"nombre": result["plan_nombre"]})
 
         # Tiempo óptimo
-        tiempo_elem = ET.SubElement(plan_elem, "tiempoOptimoSegundos")
-        tiempo_elem.text = str(result["tiempo_optimo"])
-
-        # Calcular totales de agua y fertilizante
-        total_agua = 0
-        total_fertilizante = 0
-
-        # Eficiencia de drones
-        eficiencia_elem = ET.SubElement(plan_elem, "eficienciaDronesRegadores")
-        for dron in result["invernadero"].drones.iter():
-            ET.SubElement(
-                eficiencia_elem,
+        xml.texto("tiempoOptimoSegundos", str(result["tiempo_optimo"]))
+
+        # Eficiencia de drones (totales propios de esta simulación)
+        estado = result["estado"]
+        xml.abrir("eficienciaDronesRegadores")
+        for nombre, litros, gramos in estado.eficiencia():
+            xml.vacio(
                 "dron",
                 {
-                    "nombre": dron.nombre,
-                    "litrosAgua": str(dron.litros_total),
-                    "gramosFertilizante": str(dron.gramos_total),
+                    "nombre": nombre,
+                    "litrosAgua": str(litros),
+                    "gramosFertilizante": str(gramos),
                 },
             )
-            total_agua += dron.litros_total
-            total_fertilizante += dron.gramos_total
-
-        # Totales
-        agua_elem = ET.SubElement(plan_elem, "aguaRequeridaLitros")
-        agua_elem.text = str(total_agua)
+        xml.cerrar()
 
-        fertilizante_elem = ET.SubElement(plan_elem, "fertilizanteRequeridoGramos")
-        fertilizante_elem.text = str(total_fertilizante)
+        # Totales de agua y fertilizante
+        xml.texto("aguaRequeridaLitros", str(estado.total_litros()))
+        xml.texto("fertilizanteRequeridoGramos", str(estado.total_gramos()))
 
-        # Instrucciones detalladas
-        instrucciones_elem = ET.SubElement(plan_elem, "instrucciones")
-        for segundo, acciones in result["acciones_lista"]:
-            tiempo_elem = ET.SubElement(
-                instrucciones_elem, "tiempo", {"segundos": str(segundo)}
-            )
+        # Instrucciones detalladas, generadas segundo a segundo
+        xml.abrir("instrucciones")
+        for segundo, acciones in result["linea_tiempo"]:
+            xml.abrir("tiempo", {"segundos": str(segundo)})
             for dron_nombre, accion in acciones:
-                ET.SubElement(
-                    tiempo_elem, "dron", {"nombre": dron_nombre, "accion": accion}
-                )
-
-        # Formatear y guardar XML
-        xml_str = minidom.parseString(ET.tostring(root)).toprettyxml(indent="  ")
+                xml.vacio("dron", {"nombre": dron_nombre, "accion": accion})
+            xml.cerrar()
+        xml.cerrar()
 
-        with open(outpath, "w", encoding="utf-8") as f:
-            f.write(xml_str)
-
-        return outpath
+        xml.cerrar()  # plan
@@ -1,7 +1,12 @@
-from models.tda import ListaEnlazada
+from array import array
+from models.tda import ListaEnlazada, ArregloDinamico, TablaHash
+from simulator.motores import crear_motor
+from services.metricas import metricas
 
 class Planta:
     """Representa una planta en el invernadero"""
+    __slots__ = ("nombre", "hilera", "posicion", "litros", "gramos")
+
     def __init__(self, nombre, hilera, posicion, litros, gramos):
         self.nombre = nombre
         self.hilera = hilera
@@ -15,167 +20,398 @@ class Planta:
 
 class Dron:
     """Representa un dron regador"""
+    __slots__ = ("id", "nombre", "hilera")
+
     def __init__(self, id, nombre):
         self.id = id
         self.nombre = nombre
         self.hilera = None  # Hilera asignada
-        self.posicion_actual = 1  # Todos inician en posición 1
-        self.litros_total = 0  # Agua acumulada
-        self.gramos_total = 0  # Fertilizante acumulado
 
     def __str__(self):
         return f"{self.nombre} (Hilera {self.hilera})"
 
 
+class TablaPlantas:
+    """
+    Plantas de un invernadero guardadas como columnas enteras paralelas
+    (hilera, posicion, litros, gramos, id de nombre) en lugar de un objeto
+    por planta; cada nombre distinto se guarda una sola vez. iter() y
+    __getitem__ devuelven objetos Planta armados al vuelo desde la fila
+    """
+    __slots__ = ("hileras", "posiciones", "litros", "gramos", "nombre_ids", "nombres", "ids_nombre")
+
+    def __init__(self):
+        self.hileras = array('i')
+        self.posiciones = array('i')
+        self.litros = array('i')
+        self.gramos = array('i')
+        self.nombre_ids = array('i')
+        self.nombres = []  # id -> nombre
+        self.ids_nombre = {}  # nombre -> id
+
+    def _id_nombre(self, nombre):
+        nombre_id = self.ids_nombre.get(nombre)
+        if nombre_id is None:
+            nombre_id = self.ids_nombre[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return nombre_id
+
+    def agregar(self, nombre, hilera, posicion, litros, gramos):
+        """Agrega una fila al final y devuelve su número"""
+        self.hileras.append(hilera)
+        self.posiciones.append(posicion)
+        self.litros.append(litros)
+        self.gramos.append(gramos)
+        self.nombre_ids.append(self._id_nombre(nombre))
+        return len(self.hileras) - 1
+
+    def extender(self, nombres, hileras, posiciones, litros, gramos):
+        """Agrega varias filas a partir de columnas del mismo largo"""
+        self.nombre_ids.extend(self._id_nombre(nombre) for nombre in nombres)
+        self.hileras.extend(hileras)
+        self.posiciones.extend(posiciones)
+        self.litros.extend(litros)
+        self.gramos.extend(gramos)
+
+    def eliminar(self, fila):
+        """Quita la fila; las siguientes se corren un lugar"""
+        for columna in (self.hileras, self.posiciones, self.litros, self.gramos, self.nombre_ids):
+            del columna[fila]
+
+    def nombre(self, fila):
+        return self.nombres[self.nombre_ids[fila]]
+
+    def planta(self, fila):
+        return Planta(
+            self.nombres[self.nombre_ids[fila]], self.hileras[fila], self.posiciones[fila],
+            self.litros[fila], self.gramos[fila]
+        )
+
+    def iter(self):
+        for fila in range(len(self.hileras)):
+            yield self.planta(fila)
+
+    @property
+    def tamano(self):
+        return len(self.hileras)
+
+    def __len__(self):
+        return len(self.hileras)
+
+    def __getitem__(self, fila):
+        if fila < 0 or fila >= len(self.hileras):
+            raise IndexError("Índice fuera de rango")
+        return self.planta(fila)
+
+    def __str__(self):
+        return "[" + ", ".join(str(planta) for planta in self.iter()) + "]"
+
+
+class PlanRiego:
+    """
+    Plan de riego compilado: columnas enteras paralelas (hilera, posicion)
+    listas para simular sin volver a interpretar el texto del plan
+    """
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.hileras = array('i')
+        self.posiciones = array('i')
+        self.errores = ListaEnlazada()  # Tuplas (entrada, texto, motivo) descartadas al cargar
+
+    def agregar(self, hilera, posicion):
+        """Agrega una instrucción válida al final del plan"""
+        self.hileras.append(hilera)
+        self.posiciones.append(posicion)
+
+    def insertar(self, indice, hilera, posicion):
+        """Inserta una instrucción antes de la entrada indice"""
+        self.hileras.insert(indice, hilera)
+        self.posiciones.insert(indice, posicion)
+
+    def reemplazar(self, indice, hilera, posicion):
+        """Reemplaza la instrucción de la entrada indice"""
+        self.hileras[indice] = hilera
+        self.posiciones[indice] = posicion
+
+    def copiar(self):
+        """Plan nuevo con sus propias columnas (los errores de carga se comparten)"""
+        copia = PlanRiego(self.nombre)
+        copia.hileras = array('i', self.hileras)
+        copia.posiciones = array('i', self.posiciones)
+        copia.errores = self.errores
+        return copia
+
+    def agregar_error(self, numero_entrada, texto, motivo):
+        """Registra una entrada descartada en el reporte del plan"""
+        self.errores.append((numero_entrada, texto, motivo))
+
+    def pares(self):
+        """Recorre las instrucciones como tuplas (hilera, posicion)"""
+        return zip(self.hileras, self.posiciones)
+
+    def iter(self):
+        """Recorre las instrucciones en su forma textual (ej: "H1-P2")"""
+        for hilera, posicion in self.pares():
+            yield f"H{hilera}-P{posicion}"
+
+    def __len__(self):
+        return len(self.hileras)
+
+    def __getitem__(self, index):
+        return self.hileras[index], self.posiciones[index]
+
+    def __str__(self):
+        return f"Plan {self.nombre} ({len(self)} instrucciones, {self.errores.tamano} descartadas)"
+
+
 class Invernadero:
     """Representa un invernadero con sus plantas, drones y planes de riego"""
+    __slots__ = (
+        "nombre", "numero_hileras", "plantas_por_hilera", "plantas", "drones", "planes",
+        "indice_plantas", "indice_drones", "indice_planes",
+    )
+
     def __init__(self, nombre):
         self.nombre = nombre
         self.numero_hileras = 0
         self.plantas_por_hilera = 0
-        self.plantas = ListaEnlazada()  # Lista de todas las plantas
-        self.drones = ListaEnlazada()  # Lista de drones asignados
-        self.planes = ListaEnlazada()  # Lista de tuplas (nombre_plan, secuencia)
+        self.plantas = TablaPlantas()  # Todas las plantas, por columnas
+        self.drones = ArregloDinamico()  # Lista de drones asignados
+        self.planes = ArregloDinamico()  # Lista de tuplas (nombre_plan, PlanRiego)
+        # Índices hash para búsquedas O(1)
+        self.indice_plantas = TablaHash()  # (hilera, posicion) -> fila en plantas
+        self.indice_drones = TablaHash()  # hilera -> Dron
+        self.indice_planes = TablaHash()  # nombre_plan -> PlanRiego
+
+    def agregar_planta(self, planta):
+        """Agrega una planta y la registra en el índice"""
+        fila = self.plantas.agregar(planta.nombre, planta.hilera, planta.posicion, planta.litros, planta.gramos)
+        clave = (planta.hilera, planta.posicion)
+        # Si hay duplicados se conserva la primera, igual que la búsqueda lineal
+        if clave not in self.indice_plantas:
+            self.indice_plantas.put(clave, fila)
+
+    def agregar_plantas(self, nombres, hileras, posiciones, litros, gramos):
+        """Agrega muchas plantas desde columnas paralelas (carga de una instantánea)"""
+        inicio = self.plantas.tamano
+        self.plantas.extender(nombres, hileras, posiciones, litros, gramos)
+        self.indice_plantas.reservar(self.plantas.tamano)
+        self._indexar_plantas(inicio)
+
+    def _indexar_plantas(self, desde=0):
+        indice = self.indice_plantas
+        for fila in range(desde, self.plantas.tamano):
+            clave = (self.plantas.hileras[fila], self.plantas.posiciones[fila])
+            if clave not in indice:
+                indice.put(clave, fila)
+
+    def eliminar_planta(self, planta):
+        """Elimina la primera planta igual a esa (mismos datos) y actualiza el índice"""
+        plantas = self.plantas
+        for fila in range(plantas.tamano):
+            if (
+                plantas.hileras[fila] == planta.hilera and plantas.posiciones[fila] == planta.posicion
+                and plantas.litros[fila] == planta.litros and plantas.gramos[fila] == planta.gramos
+                and plantas.nombre(fila) == planta.nombre
+            ):
+                plantas.eliminar(fila)
+                # Las filas siguientes cambiaron de número: rehacer el índice
+                self.indice_plantas = TablaHash()
+                self.indice_plantas.reservar(plantas.tamano)
+                self._indexar_plantas()
+                return True
+        return False
+
+    def agregar_dron(self, dron):
+        """Agrega un dron asignado y lo registra en el índice por hilera"""
+        self.drones.append(dron)
+        if dron.hilera not in self.indice_drones:
+            self.indice_drones.put(dron.hilera, dron)
+
+    def eliminar_dron(self, dron):
+        """Elimina un dron y actualiza el índice por hilera"""
+        if not self.drones.remove(dron):
+            return False
+        if self.indice_drones.get(dron.hilera) is dron:
+            self.indice_drones.remove(dron.hilera)
+            for otro in self.drones.iter():
+                if otro.hilera == dron.hilera:
+                    self.indice_drones.put(dron.hilera, otro)
+                    break
+        return True
+
+    def agregar_plan(self, nombre_plan, secuencia):
+        """Agrega un plan de riego y lo registra en el índice por nombre"""
+        self.planes.append((nombre_plan, secuencia))
+        if nombre_plan not in self.indice_planes:
+            self.indice_planes.put(nombre_plan, secuencia)
+
+    def eliminar_plan(self, nombre_plan):
+        """Elimina el primer plan con ese nombre y actualiza el índice"""
+        for plan in self.planes.iter():
+            if plan[0] == nombre_plan:
+                self.planes.remove(plan)
+                self.indice_planes.remove(nombre_plan)
+                for otro_nombre, otra_secuencia in self.planes.iter():
+                    if otro_nombre == nombre_plan:
+                        self.indice_planes.put(nombre_plan, otra_secuencia)
+                        break
+                return True
+        return False
 
     def buscar_plan(self, nombre_plan):
         """Busca un plan de riego por nombre"""
-        for plan_nombre, secuencia in self.planes.iter():
-            if plan_nombre == nombre_plan:
-                return secuencia
-        return None
+        return self.indice_planes.get(nombre_plan)
 
     def buscar_planta(self, hilera, posicion):
         """Busca una planta específica por hilera y posición"""
-        for planta in self.plantas.iter():
-            if planta.hilera == hilera and planta.posicion == posicion:
-                return planta
-        return None
+        fila = self.indice_plantas.get((hilera, posicion))
+        return None if fila is None else self.plantas.planta(fila)
+
+    def fila_planta(self, hilera, posicion):
+        """Fila de la planta en las columnas de plantas (sin armar el objeto), o None"""
+        return self.indice_plantas.get((hilera, posicion))
 
     def buscar_dron_por_hilera(self, hilera):
         """Busca el dron asignado a una hilera específica"""
-        for dron in self.drones.iter():
-            if dron.hilera == hilera:
-                return dron
-        return None
+        return self.indice_drones.get(hilera)
 
-    def reiniciar_drones(self):
-        """Reinicia las posiciones y totales de todos los drones"""
-        for dron in self.drones.iter():
-            dron.posicion_actual = 1
-            dron.litros_total = 0
-            dron.gramos_total = 0
+    def validar_instruccion(self, hilera, posicion):
+        """Devuelve el motivo por el que (hilera, posicion) no es regable, o None"""
+        if hilera < 1 or hilera > self.numero_hileras:
+            return "hilera fuera de rango"
+        if posicion < 1 or posicion > self.plantas_por_hilera:
+            return "posición fuera de rango"
+        if self.buscar_dron_por_hilera(hilera) is None:
+            return "hilera sin dron asignado"
+        if self.fila_planta(hilera, posicion) is None:
+            return "planta inexistente"
+        return None
 
-    def simular_plan(self, plan_nombre):
+    def simular_plan(self, plan_nombre, motor=None, regresar_inicio=False, progreso=None):
         """
         Simula la ejecución de un plan de riego siguiendo las reglas:
         1. Los drones demoran 1 segundo en moverse 1 metro
         2. Los drones demoran 1 segundo en regar
         3. Solo 1 dron puede regar a la vez
         4. Se debe seguir el orden del plan
+        motor: nombre en simulator.motores.MOTORES ("eventos" por defecto).
+        progreso: progreso(entradas_simuladas, entradas_totales), opcional.
+        Las acciones por segundo se generan solo al recorrer linea_tiempo.
+        No modifica el invernadero: posiciones y totales quedan en resultado['estado']
         """
-        # Reiniciar drones antes de la simulación
-        self.reiniciar_drones()
-        
         # Obtener secuencia del plan
         secuencia = self.buscar_plan(plan_nombre)
-        if not secuencia:
+        if secuencia is None:
             return None
 
-        # Estructura para almacenar acciones por segundo
-        acciones_por_tiempo = {}  # {segundo: [(nombre_dron, accion), ...]}
-        
-        # Control de tiempo para cada dron y para el riego global
-        tiempo_disponible_dron = {}  # Cuándo estará libre cada dron
-        tiempo_riego_global = 0  # Cuándo se podrá regar nuevamente (constraint de 1 riego a la vez)
-        
-        # Inicializar tiempos de drones
-        for dron in self.drones.iter():
-            tiempo_disponible_dron[dron.nombre] = 1
-
-        def agregar_accion(segundo, nombre_dron, accion):
-            """Helper para agregar una acción en un segundo específico"""
-            if segundo not in acciones_por_tiempo:
-                acciones_por_tiempo[segundo] = []
-            acciones_por_tiempo[segundo].append((nombre_dron, accion))
-
-        # Procesar cada instrucción del plan
-        for entrada in secuencia.iter():
-            # Parsear entrada tipo "H1-P2"
-            try:
-                partes = entrada.replace('H', '').replace('P', '').replace(' ', '').split('-')
-                hilera = int(partes[0])
-                posicion = int(partes[1])
-            except:
-                continue  # Ignorar entradas mal formadas
-
-            # Buscar dron y planta correspondientes
-            dron = self.buscar_dron_por_hilera(hilera)
-            planta = self.buscar_planta(hilera, posicion)
-            
-            if not dron or not planta:
-                continue
-
-            # Calcular tiempo de movimiento
-            distancia = abs(dron.posicion_actual - posicion)
-            inicio_movimiento = tiempo_disponible_dron[dron.nombre]
-            
-            # Registrar movimiento (cada metro = 1 segundo)
-            tiempo_actual = inicio_movimiento
-            pos_actual = dron.posicion_actual
-            
-            if distancia > 0:
-                # Determinar dirección
-                if posicion > pos_actual:
-                    # Moverse hacia adelante
-                    for p in range(pos_actual + 1, posicion + 1):
-                        agregar_accion(tiempo_actual, dron.nombre, f"Adelante (H{hilera}P{p})")
-                        tiempo_actual += 1
-                else:
-                    # Moverse hacia atrás
-                    for p in range(pos_actual - 1, posicion - 1, -1):
-                        agregar_accion(tiempo_actual, dron.nombre, f"Atras (H{hilera}P{p})")
-                        tiempo_actual += 1
-            
-            # Actualizar posición del dron
-            dron.posicion_actual = posicion
-            
-            # El dron llega en tiempo_actual, pero debe esperar si hay otro regando
-            tiempo_llegada = tiempo_actual
-            tiempo_inicio_riego = max(tiempo_llegada, tiempo_riego_global)
-            
-            # Si hay espera, registrar "Esperar"
-            if tiempo_inicio_riego > tiempo_llegada:
-                for t in range(tiempo_llegada, tiempo_inicio_riego):
-                    agregar_accion(t, dron.nombre, "Esperar")
-            
-            # Registrar riego
-            agregar_accion(tiempo_inicio_riego, dron.nombre, "Regar")
-            
-            # Actualizar totales del dron
-            dron.litros_total += planta.litros
-            dron.gramos_total += planta.gramos
-            
-            # Actualizar tiempos (riego dura 1 segundo)
-            tiempo_disponible_dron[dron.nombre] = tiempo_inicio_riego + 1
-            tiempo_riego_global = tiempo_inicio_riego + 1
-
-        # Tiempo óptimo es el máximo tiempo usado
-        tiempo_optimo = max(tiempo_disponible_dron.values()) if tiempo_disponible_dron else 0
-
-        # Convertir diccionario a lista ordenada
-        acciones_lista = []
-        for segundo in sorted(acciones_por_tiempo.keys()):
-            acciones_lista.append((segundo, acciones_por_tiempo[segundo]))
+        with metricas.medir("simular_plan"):
+            linea_tiempo, estado = crear_motor(motor, regresar_inicio, progreso).simular(self, secuencia)
+        if metricas.activo:
+            metricas.incrementar("entradas_plan", "Entradas de planes procesadas", len(secuencia))
+            metricas.incrementar(
+                "entradas_omitidas", "Entradas sin dron o planta omitidas al simular",
+                len(secuencia) - estado.instrucciones,
+            )
+            metricas.incrementar("acciones", "Acciones (dron x segundo) emitidas", linea_tiempo.contar_acciones())
+            metricas.incrementar("segundos_espera", "Segundos de espera por turno de riego", estado.segundos_espera)
 
         # Construir resultado
         resultado = {
             'invernadero': self,
             'plan_nombre': plan_nombre,
-            'tiempo_optimo': tiempo_optimo,
-            'acciones_lista': acciones_lista
+            'tiempo_optimo': estado.tiempo_optimo(),
+            'linea_tiempo': linea_tiempo,
+            'estado': estado
         }
 
         return resultado
 
+    def con_plan(self, secuencia_anterior, secuencia):
+        """
+        Invernadero nuevo igual a este pero con secuencia en lugar de
+        secuencia_anterior. Comparte plantas y drones (solo lectura); este
+        invernadero no cambia
+        """
+        copia = Invernadero(self.nombre)
+        copia.numero_hileras = self.numero_hileras
+        copia.plantas_por_hilera = self.plantas_por_hilera
+        copia.plantas = self.plantas
+        copia.drones = self.drones
+        copia.indice_plantas = self.indice_plantas
+        copia.indice_drones = self.indice_drones
+        for nombre_plan, plan in self.planes.iter():
+            copia.agregar_plan(nombre_plan, secuencia if plan is secuencia_anterior else plan)
+        return copia
+
+    def editar_plan(self, plan_nombre, accion, hilera, posicion, indice=None):
+        """
+        Edita una copia del plan. accion: "agregar", "insertar" o "reemplazar"
+        (estas dos sobre la entrada indice). Devuelve (invernadero con el plan
+        editado, índice de la primera entrada que cambió); este invernadero no
+        cambia. ValueError si el plan, la acción o la instrucción no son válidos
+        """
+        anterior = self.buscar_plan(plan_nombre)
+        if anterior is None:
+            raise ValueError(f"Plan '{plan_nombre}' no encontrado")
+        motivo = self.validar_instruccion(hilera, posicion)
+        if motivo:
+            raise ValueError(f"H{hilera}-P{posicion}: {motivo}")
+
+        if accion == "agregar":
+            indice = len(anterior)
+        elif indice is None:
+            raise ValueError("Falta el número de entrada")
+        elif indice < 0 or indice > len(anterior) or (accion == "reemplazar" and indice == len(anterior)):
+            raise ValueError(f"Entrada {indice + 1} fuera del plan ({len(anterior)} entradas)")
+        elif accion not in ("insertar", "reemplazar"):
+            raise ValueError(f"Acción desconocida: {accion}")
+
+        secuencia = anterior.copiar()
+        if accion == "agregar":
+            secuencia.agregar(hilera, posicion)
+        elif accion == "insertar":
+            secuencia.insertar(indice, hilera, posicion)
+        else:
+            secuencia.reemplazar(indice, hilera, posicion)
+        return self.con_plan(anterior, secuencia), indice
+
+    def resimular_plan(self, resultado, desde_indice, motor=None, regresar_inicio=False, progreso=None):
+        """
+        Vuelve a simular un plan editado a partir de la entrada desde_indice,
+        reutilizando del resultado anterior los tramos y totales previos al
+        último punto de control. motor, regresar_inicio y progreso: como en
+        simular_plan. Devuelve un resultado nuevo, idéntico al de simular_plan;
+        el anterior no se modifica
+        """
+        secuencia = self.buscar_plan(resultado['plan_nombre'])
+        if secuencia is None:
+            return None
+
+        with metricas.medir("resimular_plan"):
+            linea_tiempo, estado = crear_motor(motor, regresar_inicio, progreso).resimular(
+                self, secuencia, resultado['linea_tiempo'], resultado['estado'], desde_indice
+            )
+        return {
+            'invernadero': self,
+            'plan_nombre': resultado['plan_nombre'],
+            'tiempo_optimo': estado.tiempo_optimo(),
+            'linea_tiempo': linea_tiempo,
+            'estado': estado
+        }
+
+    def estado_en(self, resultado, segundo, motor=None):
+        """
+        Estado de cada dron (posición, litros, gramos) y avance del plan al
+        terminar el segundo dado, a partir de los puntos de control del resultado.
+        motor: nombre en simulator.motores.MOTORES
+        """
+        secuencia = self.buscar_plan(resultado['plan_nombre'])
+        if secuencia is None:
+            return None
+        return crear_motor(motor).estado_en(
+            self, secuencia, resultado['linea_tiempo'], resultado['estado'], segundo
+        )
+
     def __str__(self):
         return f"Invernadero: {self.nombre} ({self.numero_hileras} hileras x {self.plantas_por_hilera} plantas)"
\ No newline at end of file
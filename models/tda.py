@@ -3,6 +3,8 @@
 # ===========================================
 
 class Nodo:
+    __slots__ = ("dato", "siguiente")  # Sin __dict__: las listas largas tienen un nodo por elemento
+
     def __init__(self, dato):
         self.dato = dato
         self.siguiente = None
@@ -88,6 +90,92 @@ class ListaEnlazada:
     def __str__(self):
         return "[" + ", ".join(str(x) for x in self.iter()) + "]"
 
+    def __getstate__(self):
+        # Serializar como arreglo plano: pickle recursivo de nodos desborda la pila en listas largas
+        return list(self.iter())
+
+    def __setstate__(self, datos):
+        self.__init__()
+        for dato in datos:
+            self.append(dato)
+
+
+# ===========================================
+# Arreglo Dinámico (misma interfaz que ListaEnlazada)
+# ===========================================
+
+class ArregloDinamico:
+    """
+    Lista sobre un arreglo contiguo que duplica su capacidad al llenarse.
+    Misma interfaz que ListaEnlazada, pero __getitem__ es O(1) y no hay un
+    nodo por elemento; prepend y remove desplazan los elementos (O(n))
+    """
+    __slots__ = ("datos", "tamano")
+
+    def __init__(self, capacidad=4):
+        self.datos = [None] * capacidad
+        self.tamano = 0
+
+    def _redimensionar(self, nueva_capacidad):
+        datos = [None] * nueva_capacidad
+        datos[:self.tamano] = self.datos[:self.tamano]
+        self.datos = datos
+
+    def append(self, dato):
+        """Agrega al final del arreglo"""
+        if self.tamano == len(self.datos):
+            self._redimensionar(max(2 * len(self.datos), 4))
+        self.datos[self.tamano] = dato
+        self.tamano += 1
+
+    def prepend(self, dato):
+        """Agrega al inicio del arreglo"""
+        if self.tamano == len(self.datos):
+            self._redimensionar(max(2 * len(self.datos), 4))
+        self.datos[1:self.tamano + 1] = self.datos[:self.tamano]
+        self.datos[0] = dato
+        self.tamano += 1
+
+    def remove(self, dato):
+        """Elimina el primer elemento con ese dato"""
+        for i in range(self.tamano):
+            if self.datos[i] == dato:
+                self.datos[i:self.tamano - 1] = self.datos[i + 1:self.tamano]
+                self.tamano -= 1
+                self.datos[self.tamano] = None
+                return True
+        return False
+
+    def find(self, dato):
+        """Busca un dato y lo devuelve si existe"""
+        for i in range(self.tamano):
+            if self.datos[i] == dato:
+                return self.datos[i]
+        return None
+
+    def iter(self):
+        """Permite recorrer con for-in"""
+        for i in range(self.tamano):
+            yield self.datos[i]
+
+    def __len__(self):
+        return self.tamano
+
+    def __getitem__(self, index):
+        if index < 0 or index >= self.tamano:
+            raise IndexError("Índice fuera de rango")
+        return self.datos[index]
+
+    def __str__(self):
+        return "[" + ", ".join(str(x) for x in self.iter()) + "]"
+
+    def __getstate__(self):
+        return self.datos[:self.tamano]
+
+    def __setstate__(self, datos):
+        self.datos = list(datos)
+        self.tamano = len(self.datos)
+
 
 # ===========================================
 # Pila (Stack) usando Lista Enlazada
@@ -124,31 +212,316 @@ class Pila:
 
 
 # ===========================================
-# Cola (Queue) usando Lista Enlazada
+# Cola (Queue) sobre un arreglo circular
 # ===========================================
 
 class Cola:
-    def __init__(self):
-        self.lista = ListaEnlazada()
+    """
+    Cola FIFO sobre un arreglo circular: encolar y desencolar son O(1) sin
+    un nodo por elemento. Sin capacidad, el arreglo se duplica al llenarse;
+    con capacidad fija, encolar en una cola llena lanza OverflowError
+    """
+    __slots__ = ("datos", "inicio", "tamano", "fija")
+
+    def __init__(self, capacidad=None):
+        self.datos = [None] * (8 if capacidad is None else capacidad)
+        self.inicio = 0  # Posición del frente en datos
+        self.tamano = 0
+        self.fija = capacidad is not None
+
+    @property
+    def capacidad(self):
+        return len(self.datos)
+
+    def _redimensionar(self, nueva_capacidad):
+        self.datos = self.a_lista() + [None] * (nueva_capacidad - self.tamano)
+        self.inicio = 0
+
+    def _reservar(self, cantidad):
+        if self.tamano + cantidad <= len(self.datos):
+            return
+        if self.fija:
+            raise OverflowError(f"Cola llena (capacidad {len(self.datos)})")
+        capacidad = len(self.datos)
+        while capacidad < self.tamano + cantidad:
+            capacidad *= 2
+        self._redimensionar(capacidad)
 
     def enqueue(self, dato):
-        self.lista.append(dato)
+        self._reservar(1)
+        self.datos[(self.inicio + self.tamano) % len(self.datos)] = dato
+        self.tamano += 1
+
+    def extend(self, datos):
+        """Encola todos los datos (una secuencia) copiando por tramos contiguos"""
+        datos = list(datos)
+        cantidad = len(datos)
+        self._reservar(cantidad)
+        capacidad = len(self.datos)
+        fin = (self.inicio + self.tamano) % capacidad
+        primero = min(cantidad, capacidad - fin)
+        self.datos[fin:fin + primero] = datos[:primero]
+        self.datos[:cantidad - primero] = datos[primero:]
+        self.tamano += cantidad
 
     def dequeue(self):
-        if not self.lista.cabeza:
+        if self.tamano == 0:
             return None
-        dato = self.lista.cabeza.dato
-        self.lista.cabeza = self.lista.cabeza.siguiente
-        self.lista.tamano -= 1
-        if self.lista.tamano == 0:
-            self.lista.cola = None
+        dato = self.datos[self.inicio]
+        self.datos[self.inicio] = None
+        self.inicio = (self.inicio + 1) % len(self.datos)
+        self.tamano -= 1
         return dato
 
+    def dequeue_varios(self, cantidad):
+        """Desencola hasta cantidad datos y los devuelve en una lista"""
+        cantidad = min(cantidad, self.tamano)
+        capacidad = len(self.datos)
+        primero = min(cantidad, capacidad - self.inicio)
+        resto = cantidad - primero
+        datos = self.datos[self.inicio:self.inicio + primero] + self.datos[:resto]
+        self.datos[self.inicio:self.inicio + primero] = [None] * primero
+        self.datos[:resto] = [None] * resto
+        self.inicio = (self.inicio + cantidad) % capacidad
+        self.tamano -= cantidad
+        return datos
+
+    def peek(self):
+        return self.datos[self.inicio] if self.tamano else None
+
     def is_empty(self):
-        return self.lista.tamano == 0
+        return self.tamano == 0
+
+    def is_full(self):
+        return self.fija and self.tamano == len(self.datos)
+
+    def clear(self):
+        self.datos[:] = [None] * len(self.datos)
+        self.inicio = 0
+        self.tamano = 0
+
+    def a_lista(self):
+        """Datos del frente al final"""
+        fin = self.inicio + self.tamano
+        if fin <= len(self.datos):
+            return self.datos[self.inicio:fin]
+        return self.datos[self.inicio:] + self.datos[:fin - len(self.datos)]
+
+    def iter(self):
+        for i in range(self.tamano):
+            yield self.datos[(self.inicio + i) % len(self.datos)]
 
     def __len__(self):
-        return len(self.lista)
+        return self.tamano
+
+    def __str__(self):
+        return "Cola: [" + ", ".join(str(x) for x in self.iter()) + "]"
+
+    def __getstate__(self):
+        return (len(self.datos) if self.fija else None), self.a_lista()
+
+    def __setstate__(self, estado):
+        capacidad, datos = estado
+        self.__init__(capacidad)
+        self.extend(datos)
+
+
+# ===========================================
+# Tabla Hash (encadenamiento separado)
+# ===========================================
+
+class NodoHash:
+    __slots__ = ("clave", "valor", "siguiente")
+
+    def __init__(self, clave, valor):
+        self.clave = clave
+        self.valor = valor
+        self.siguiente = None
+
+
+class TablaHash:
+    def __init__(self, capacidad=16):
+        self.capacidad = capacidad
+        self.cubetas = [None] * capacidad
+        self.tamano = 0
+
+    def _indice(self, clave):
+        return hash(clave) % self.capacidad
+
+    def put(self, clave, valor):
+        """Inserta o reemplaza el valor asociado a la clave"""
+        indice = self._indice(clave)
+        actual = self.cubetas[indice]
+        while actual:
+            if actual.clave == clave:
+                actual.valor = valor
+                return
+            actual = actual.siguiente
+        nuevo = NodoHash(clave, valor)
+        nuevo.siguiente = self.cubetas[indice]
+        self.cubetas[indice] = nuevo
+        self.tamano += 1
+        # Mantener factor de carga <= 0.75
+        if self.tamano * 4 > self.capacidad * 3:
+            self._redimensionar(self.capacidad * 2)
+
+    def get(self, clave, defecto=None):
+        """Devuelve el valor de la clave o el valor por defecto"""
+        actual = self.cubetas[self._indice(clave)]
+        while actual:
+            if actual.clave == clave:
+                return actual.valor
+            actual = actual.siguiente
+        return defecto
+
+    def remove(self, clave):
+        """Elimina la clave si existe"""
+        indice = self._indice(clave)
+        actual = self.cubetas[indice]
+        anterior = None
+        while actual:
+            if actual.clave == clave:
+                if anterior:
+                    anterior.siguiente = actual.siguiente
+                else:
+                    self.cubetas[indice] = actual.siguiente
+                self.tamano -= 1
+                return True
+            anterior = actual
+            actual = actual.siguiente
+        return False
+
+    def contains(self, clave):
+        actual = self.cubetas[self._indice(clave)]
+        while actual:
+            if actual.clave == clave:
+                return True
+            actual = actual.siguiente
+        return False
+
+    def items(self):
+        """Recorre los pares (clave, valor)"""
+        for cubeta in self.cubetas:
+            actual = cubeta
+            while actual:
+                yield actual.clave, actual.valor
+                actual = actual.siguiente
+
+    def keys(self):
+        for clave, _ in self.items():
+            yield clave
+
+    def values(self):
+        for _, valor in self.items():
+            yield valor
+
+    def reservar(self, cantidad):
+        """Agranda la tabla para cantidad claves sin redimensionar al insertarlas"""
+        capacidad = self.capacidad
+        while cantidad * 4 > capacidad * 3:
+            capacidad *= 2
+        if capacidad != self.capacidad:
+            self._redimensionar(capacidad)
+
+    def _redimensionar(self, nueva_capacidad):
+        anteriores = self.cubetas
+        self.capacidad = nueva_capacidad
+        self.cubetas = [None] * nueva_capacidad
+        for cubeta in anteriores:
+            actual = cubeta
+            while actual:
+                siguiente = actual.siguiente
+                indice = self._indice(actual.clave)
+                actual.siguiente = self.cubetas[indice]
+                self.cubetas[indice] = actual
+                actual = siguiente
+
+    def __contains__(self, clave):
+        return self.contains(clave)
+
+    def __len__(self):
+        return self.tamano
+
+    def __str__(self):
+        return "{" + ", ".join(f"{k}: {v}" for k, v in self.items()) + "}"
+
+    def __getstate__(self):
+        return self.capacidad, list(self.items())
+
+    def __setstate__(self, estado):
+        capacidad, items = estado
+        self.__init__(capacidad)
+        for clave, valor in items:
+            self.put(clave, valor)
+
+
+# ===========================================
+# Cola de Prioridad (Montículo binario mínimo)
+# ===========================================
+
+class ColaPrioridad:
+    def __init__(self):
+        self.monticulo = []  # Arreglo de entradas [prioridad, orden_llegada, dato]
+        self.contador = 0  # Desempata prioridades iguales por orden de llegada
+
+    def push(self, dato, prioridad):
+        """Inserta un dato con su prioridad (menor sale primero)"""
+        self.monticulo.append((prioridad, self.contador, dato))
+        self.contador += 1
+        self._subir(len(self.monticulo) - 1)
+
+    def pop(self):
+        """Extrae el dato de menor prioridad"""
+        if not self.monticulo:
+            return None
+        ultimo = self.monticulo.pop()
+        if not self.monticulo:
+            return ultimo[2]
+        raiz = self.monticulo[0]
+        self.monticulo[0] = ultimo
+        self._bajar(0)
+        return raiz[2]
+
+    def peek(self):
+        return self.monticulo[0][2] if self.monticulo else None
+
+    def peek_prioridad(self):
+        return self.monticulo[0][0] if self.monticulo else None
+
+    def is_empty(self):
+        return len(self.monticulo) == 0
+
+    def _subir(self, i):
+        m = self.monticulo
+        entrada = m[i]
+        while i > 0:
+            padre = (i - 1) // 2
+            if entrada < m[padre]:
+                m[i] = m[padre]
+                i = padre
+            else:
+                break
+        m[i] = entrada
+
+    def _bajar(self, i):
+        m = self.monticulo
+        n = len(m)
+        entrada = m[i]
+        while True:
+            hijo = 2 * i + 1
+            if hijo >= n:
+                break
+            if hijo + 1 < n and m[hijo + 1] < m[hijo]:
+                hijo += 1
+            if m[hijo] < entrada:
+                m[i] = m[hijo]
+                i = hijo
+            else:
+                break
+        m[i] = entrada
+
+    def __len__(self):
+        return len(self.monticulo)
 
     def __str__(self):
-        return "Cola: " + str(self.lista)
+        return "ColaPrioridad: [" + ", ".join(str(e[2]) for e in sorted(self.monticulo)) + "]"
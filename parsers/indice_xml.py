@@ -0,0 +1,302 @@
+"""
+Carga diferida de invernaderos: una pasada de indexado con expat registra,
+por cada <invernadero>, su nombre, su rango de bytes en el archivo, sus
+medidas y los nombres de sus planes. Con eso alcanza para la página
+principal; el modelo completo de un invernadero se parsea recién cuando se
+pide (desde su instantánea si ya existe) y queda en una caché acotada.
+"""
+import os
+import threading
+from collections import OrderedDict
+from xml.parsers import expat
+
+from models.dominio import Invernadero
+from parsers.instantanea import cargar_instantanea, guardar_instantanea, ruta_instantanea
+from parsers.xml_parser import XMLParser
+from services.metricas import metricas
+
+BLOQUE_LECTURA = 64 * 1024
+
+
+class ResumenInvernadero:
+    """Lo que el índice sabe de un invernadero sin construir su modelo"""
+
+    def __init__(self, nombre, inicio, cierre=None, numero_hileras=0, plantas_por_hilera=0, planes=None):
+        self.nombre = nombre
+        self.inicio = inicio  # Byte donde empieza <invernadero ...>
+        self.cierre = cierre  # Byte donde empieza </invernadero> (o donde termina <invernadero .../>)
+        self.numero_hileras = numero_hileras
+        self.plantas_por_hilera = plantas_por_hilera
+        self.planes = planes if planes is not None else []
+
+    def nombres_planes(self):
+        return self.planes
+
+    def a_dict(self):
+        return {
+            "nombre": self.nombre,
+            "inicio": self.inicio,
+            "cierre": self.cierre,
+            "numero_hileras": self.numero_hileras,
+            "plantas_por_hilera": self.plantas_por_hilera,
+            "planes": self.planes,
+        }
+
+
+class IndiceXML:
+    """Índice de un archivo de entrada: codificación, drones globales y resúmenes"""
+
+    def __init__(self, codificacion="utf-8", drones=None, invernaderos=None):
+        self.codificacion = codificacion
+        self.drones = drones if drones is not None else []  # (id, nombre) de <listaDrones>
+        self.invernaderos = invernaderos if invernaderos is not None else []  # ResumenInvernadero
+
+    def a_dict(self):
+        return {
+            "codificacion": self.codificacion,
+            "drones": self.drones,
+            "invernaderos": [resumen.a_dict() for resumen in self.invernaderos],
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(
+            datos["codificacion"],
+            [tuple(dron) for dron in datos["drones"]],
+            [ResumenInvernadero(**resumen) for resumen in datos["invernaderos"]],
+        )
+
+
+class IndexadorXML:
+    """
+    Construye el IndiceXML a medida que recibe bloques de bytes (sirve para
+    indexar una subida mientras llega). Sigue las mismas reglas que
+    XMLParser: valen la primera <listaDrones> y la primera <listaInvernaderos>
+    hijas de la raíz, los invernaderos son los hijos directos de esa lista y
+    dentro de cada uno cuentan el primer numeroHileras, plantasXhilera y planesRiego
+    """
+
+    def __init__(self):
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.XmlDeclHandler = self._declaracion
+        self.parser.StartElementHandler = self._inicio
+        self.parser.EndElementHandler = self._fin
+        self.indice = IndiceXML()
+        self.elementos = 0
+        self.pila = []  # Etiquetas abiertas
+        self.en_drones = False  # Dentro de la <listaDrones> que cuenta
+        self.drones_cargados = False
+        self.en_lista = False  # Dentro de la <listaInvernaderos> que cuenta
+        self.invernaderos_cargados = False
+        self.actual = None  # ResumenInvernadero en curso
+        self.nivel_invernadero = 0
+        self.vistos = set()  # Hijos del invernadero ya leídos (solo cuenta el primero)
+        self.en_planes = False
+        self.campo = None  # numeroHileras / plantasXhilera cuyo texto se está leyendo
+        self.partes = []
+
+    def alimentar(self, bloque):
+        self.parser.Parse(bloque, False)
+
+    def terminar(self):
+        """Cierra el documento (falla si no está bien formado) y devuelve el índice"""
+        self.parser.Parse(b"", True)
+        return self.indice
+
+    def _declaracion(self, version, codificacion, standalone):
+        if codificacion:
+            self.indice.codificacion = codificacion
+
+    def _inicio(self, etiqueta, atributos):
+        self.pila.append(etiqueta)
+        self.elementos += 1
+        if self.actual is None:
+            nivel = len(self.pila)  # La raíz es el nivel 1
+            if nivel == 2 and etiqueta == "listaDrones" and not self.drones_cargados:
+                self.en_drones = True
+            elif nivel == 2 and etiqueta == "listaInvernaderos" and not self.invernaderos_cargados:
+                self.en_lista = True
+            elif nivel == 3 and etiqueta == "dron" and self.en_drones:
+                self.indice.drones.append((atributos.get("id"), atributos.get("nombre")))
+            elif nivel == 3 and etiqueta == "invernadero" and self.en_lista:
+                self.actual = ResumenInvernadero(atributos.get("nombre"), self.parser.CurrentByteIndex)
+                self.nivel_invernadero = nivel
+                self.vistos = set()
+            return
+
+        relativo = len(self.pila) - self.nivel_invernadero
+        if relativo == 1 and etiqueta not in self.vistos:
+            self.vistos.add(etiqueta)
+            if etiqueta in ("numeroHileras", "plantasXhilera"):
+                self.campo = etiqueta
+                self.partes = []
+                self.parser.CharacterDataHandler = self._texto  # Solo mientras se lee el campo
+            elif etiqueta == "planesRiego":
+                self.en_planes = True
+        elif relativo == 2 and etiqueta == "plan" and self.en_planes:
+            self.actual.planes.append(atributos.get("nombre"))
+
+    def _fin(self, etiqueta):
+        nivel = len(self.pila)
+        if self.actual is not None:
+            if nivel == self.nivel_invernadero:
+                self.actual.cierre = self.parser.CurrentByteIndex
+                self.indice.invernaderos.append(self.actual)
+                self.actual = None
+            elif nivel == self.nivel_invernadero + 1:
+                if etiqueta == self.campo:
+                    valor = int("".join(self.partes).strip())
+                    if etiqueta == "numeroHileras":
+                        self.actual.numero_hileras = valor
+                    else:
+                        self.actual.plantas_por_hilera = valor
+                    self.campo = None
+                    self.parser.CharacterDataHandler = None
+                elif etiqueta == "planesRiego":
+                    self.en_planes = False
+        elif nivel == 2 and self.en_drones:
+            self.en_drones = False
+            self.drones_cargados = True
+        elif nivel == 2 and self.en_lista:
+            self.en_lista = False
+            self.invernaderos_cargados = True
+        self.pila.pop()
+
+    def _texto(self, texto):
+        self.partes.append(texto)
+
+
+@metricas.cronometrar("indexar")
+def indexar(stream, progreso=None, total=None):
+    """
+    Indexa un stream binario (o una ruta) leyéndolo por bloques.
+    progreso(bytes_leidos, bytes_totales, elementos) tras cada bloque
+    """
+    if isinstance(stream, str):
+        with open(stream, "rb") as archivo:
+            return _indexar(archivo, progreso, os.fstat(archivo.fileno()).st_size)
+    return _indexar(stream, progreso, total)
+
+
+def _indexar(stream, progreso, total):
+    indexador = IndexadorXML()
+    leidos = 0
+    for bloque in iter(lambda: stream.read(BLOQUE_LECTURA), b""):
+        indexador.alimentar(bloque)
+        leidos += len(bloque)
+        if progreso:
+            progreso(leidos, total, indexador.elementos)
+    return indexador.terminar()
+
+
+def _leer_fragmento(archivo, resumen):
+    """Bytes de <invernadero>...</invernadero> según el rango del índice"""
+    archivo.seek(resumen.cierre)
+    if archivo.read(2) != b"</":
+        # <invernadero .../>: expat informa el cierre justo después de "/>"
+        archivo.seek(resumen.inicio)
+        return archivo.read(resumen.cierre - resumen.inicio)
+    archivo.seek(resumen.cierre)
+    fin = resumen.cierre
+    while True:
+        bloque = archivo.read(256)
+        if not bloque:
+            break
+        posicion = bloque.find(b">")
+        if posicion >= 0:
+            fin += posicion + 1
+            break
+        fin += len(bloque)
+    archivo.seek(resumen.inicio)
+    return archivo.read(fin - resumen.inicio)
+
+
+class InvernaderosDiferidos:
+    """
+    Invernaderos de un archivo indexado. La lista (nombres, medidas, planes)
+    sale del índice; el modelo de cada invernadero se construye al pedirlo
+    con buscar() o iter() y se guardan a lo sumo max_modelos en memoria.
+    Cada invernadero parseado deja su instantánea junto al XML para el
+    próximo proceso
+    """
+
+    def __init__(self, ruta_xml, indice, origen=None, max_modelos=8):
+        self.ruta_xml = ruta_xml
+        self.indice = indice
+        self.origen = origen  # sha256 del XML: valida las instantáneas
+        self.max_modelos = max_modelos
+        self.modelos = OrderedDict()  # posición -> Invernadero; el final es lo más reciente
+        self.lock = threading.Lock()
+        self.posiciones = {}  # nombre -> primera posición (igual que la búsqueda lineal)
+        for posicion, resumen in enumerate(indice.invernaderos):
+            self.posiciones.setdefault(resumen.nombre, posicion)
+        self._parser = None
+
+    @property
+    def tamano(self):
+        return len(self.indice.invernaderos)
+
+    def __len__(self):
+        return self.tamano
+
+    def resumenes(self):
+        return self.indice.invernaderos
+
+    def buscar(self, nombre):
+        """Modelo del invernadero con ese nombre (se carga si hace falta), o None"""
+        posicion = self.posiciones.get(nombre)
+        return None if posicion is None else self.obtener(posicion)
+
+    def cargado(self, nombre):
+        """Modelo del invernadero solo si ya está en memoria (no lo carga)"""
+        with self.lock:
+            return self.modelos.get(self.posiciones.get(nombre))
+
+    def iter(self):
+        """Recorre los modelos en el orden del archivo, cargándolos de a uno"""
+        for posicion in range(self.tamano):
+            yield self.obtener(posicion)
+
+    def obtener(self, posicion):
+        with self.lock:
+            modelo = self.modelos.get(posicion)
+            if modelo is not None:
+                self.modelos.move_to_end(posicion)
+                return modelo
+        modelo = self._cargar(posicion)
+        with self.lock:
+            modelo = self.modelos.setdefault(posicion, modelo)
+            self.modelos.move_to_end(posicion)
+            while len(self.modelos) > self.max_modelos:
+                self.modelos.popitem(last=False)
+        return modelo
+
+    def _cargar(self, posicion):
+        resumen = self.indice.invernaderos[posicion]
+        ruta = ruta_instantanea(self.ruta_xml, posicion)
+        if self.origen:
+            guardados = cargar_instantanea(ruta, self.origen)
+            if guardados is not None and guardados.tamano == 1:
+                return guardados[0]
+
+        with metricas.medir("cargar_invernadero"):
+            if resumen.cierre == resumen.inicio:
+                modelo = Invernadero(resumen.nombre)  # <invernadero .../> vacío
+            else:
+                with open(self.ruta_xml, "rb") as archivo:
+                    fragmento = _leer_fragmento(archivo, resumen)
+                declaracion = f'<?xml version="1.0" encoding="{self.indice.codificacion}"?>\n'.encode("ascii")
+                modelo = self._parser_drones().parsear_fragmento(declaracion + fragmento)
+        if self.origen:
+            guardar_instantanea([modelo], ruta, self.origen)
+        return modelo
+
+    def _parser_drones(self):
+        """XMLParser con la lista global de drones del índice (para asignarlos)"""
+        if self._parser is None:
+            parser = XMLParser(self.ruta_xml)
+            for dron_id, nombre in self.indice.drones:
+                parser.agregar_dron_global(dron_id, nombre)
+            self._parser = parser
+        return self._parser
@@ -0,0 +1,224 @@
+"""
+Instantánea binaria de invernaderos ya parseados, para volver a cargarlos
+sin tocar el XML (reinicio de un worker, otro worker, una carga repetida).
+InvernaderosDiferidos deja una por invernadero junto al XML y el almacén
+compartido guarda así los invernaderos editados.
+
+Formato (little-endian):
+  encabezado  MAGIA, VERSION_FORMATO, sha256 del XML de origen,
+              sha256 del cuerpo y largo del cuerpo
+  cuerpo      tabla de cadenas (cantidad, largos int32, bytes UTF-8
+              rellenos a múltiplo de 4) seguida de un único flujo int32:
+              por invernadero, columnas de plantas (nombre, hilera,
+              posicion, litros, gramos), columnas de drones (id, nombre,
+              hilera) y cada plan compilado (hileras, posiciones y errores).
+              Las cadenas se guardan como índice en la tabla (-1 = None)
+
+Una instantánea con otra versión de formato, otro XML de origen o un
+cuerpo que no coincide con su hash se considera vieja y se reconstruye.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from models.dominio import Invernadero, Dron, PlanRiego
+from models.tda import ArregloDinamico
+
+MAGIA = b"GRIN"
+VERSION_FORMATO = 1
+EXTENSION = ".gri"
+ENCABEZADO = struct.Struct("<4sI32s32sQ")
+
+
+class InstantaneaInvalida(ValueError):
+    """La instantánea no sirve: versión, origen o contenido no coinciden"""
+
+
+def ruta_instantanea(ruta_xml, posicion):
+    """Ruta de la instantánea del invernadero en esa posición, junto al XML"""
+    return f"{os.path.splitext(ruta_xml)[0]}.{posicion}{EXTENSION}"
+
+
+def _origen_bytes(origen):
+    return bytes.fromhex(origen) if origen else bytes(32)
+
+
+def serializar(invernaderos, origen=None):
+    """Bytes de la instantánea; origen es el sha256 (hex) del XML del que salió"""
+    cadenas = {}  # texto -> índice
+
+    def cadena(texto):
+        if texto is None:
+            return -1
+        indice = cadenas.get(texto)
+        if indice is None:
+            indice = cadenas[texto] = len(cadenas)
+        return indice
+
+    enteros = array("i")
+    lista = list(invernaderos.iter()) if hasattr(invernaderos, "iter") else list(invernaderos)
+    enteros.append(len(lista))
+    for inv in lista:
+        enteros.extend((cadena(inv.nombre), inv.numero_hileras, inv.plantas_por_hilera))
+
+        plantas = inv.plantas
+        ids = [cadena(nombre) for nombre in plantas.nombres]
+        enteros.append(plantas.tamano)
+        enteros.extend(ids[nombre_id] for nombre_id in plantas.nombre_ids)
+        for columna in (plantas.hileras, plantas.posiciones, plantas.litros, plantas.gramos):
+            enteros.extend(columna)
+
+        columnas = [array("i") for _ in range(3)]
+        for dron in inv.drones.iter():
+            columnas[0].append(cadena(dron.id))
+            columnas[1].append(cadena(dron.nombre))
+            columnas[2].append(dron.hilera)
+        enteros.append(inv.drones.tamano)
+        for columna in columnas:
+            enteros.extend(columna)
+
+        enteros.append(inv.planes.tamano)
+        for nombre_plan, plan in inv.planes.iter():
+            enteros.extend((cadena(nombre_plan), len(plan)))
+            enteros.extend(plan.hileras)
+            enteros.extend(plan.posiciones)
+            enteros.append(plan.errores.tamano)
+            for numero, texto, motivo in plan.errores.iter():
+                enteros.extend((numero, cadena(texto), cadena(motivo)))
+
+    textos = [texto.encode("utf-8") for texto in cadenas]
+    largos = array("i", (len(texto) for texto in textos))
+    blob = b"".join(textos)
+    if sys.byteorder == "big":
+        largos.byteswap()
+        enteros.byteswap()
+    cuerpo = b"".join((
+        struct.pack("<I", len(textos)),
+        largos.tobytes(),
+        blob,
+        bytes(-len(blob) % 4),
+        enteros.tobytes(),
+    ))
+    encabezado = ENCABEZADO.pack(
+        MAGIA, VERSION_FORMATO, _origen_bytes(origen), hashlib.sha256(cuerpo).digest(), len(cuerpo)
+    )
+    return encabezado + cuerpo
+
+
+def deserializar(buffer, origen=None):
+    """
+    Reconstruye la lista (ArregloDinamico) de invernaderos desde un buffer (bytes o
+    mmap). Si se da origen, debe coincidir con el guardado
+    """
+    with memoryview(buffer) as vista:
+        if len(vista) < ENCABEZADO.size:
+            raise InstantaneaInvalida("archivo incompleto")
+        magia, version, guardado, hash_cuerpo, largo = ENCABEZADO.unpack_from(vista)
+        if magia != MAGIA:
+            raise InstantaneaInvalida("no es una instantánea")
+        if version != VERSION_FORMATO:
+            raise InstantaneaInvalida(f"versión de formato {version}, se esperaba {VERSION_FORMATO}")
+        if origen and guardado != _origen_bytes(origen):
+            raise InstantaneaInvalida("generada desde otro XML")
+        inicio = ENCABEZADO.size
+        if len(vista) != inicio + largo or hashlib.sha256(vista[inicio:]).digest() != hash_cuerpo:
+            raise InstantaneaInvalida("contenido dañado")
+
+        (cantidad,) = struct.unpack_from("<I", vista, inicio)
+        pos = inicio + 4
+        largos = array("i")
+        largos.frombytes(vista[pos:pos + 4 * cantidad])
+        if sys.byteorder == "big":
+            largos.byteswap()
+        pos += 4 * cantidad
+        cadenas = []
+        for n in largos:
+            cadenas.append(str(vista[pos:pos + n], "utf-8"))
+            pos += n
+        pos += -pos % 4
+        enteros = array("i")
+        enteros.frombytes(vista[pos:])
+    if sys.byteorder == "big":
+        enteros.byteswap()
+    return _construir(enteros, cadenas)
+
+
+def _construir(enteros, cadenas):
+    cadenas.append(None)  # Índice -1
+    invernaderos = ArregloDinamico()
+    i = 0
+
+    def columnas(cantidad, n):
+        nonlocal i
+        partes = [enteros[i + k * n:i + (k + 1) * n] for k in range(cantidad)]
+        i += cantidad * n
+        return partes
+
+    total = enteros[i]
+    i += 1
+    for _ in range(total):
+        inv = Invernadero(cadenas[enteros[i]])
+        inv.numero_hileras = enteros[i + 1]
+        inv.plantas_por_hilera = enteros[i + 2]
+        n = enteros[i + 3]
+        i += 4
+        nombres, hileras, posiciones, litros, gramos = columnas(5, n)
+        inv.agregar_plantas((cadenas[k] for k in nombres), hileras, posiciones, litros, gramos)
+
+        n = enteros[i]
+        i += 1
+        for dron_id, nombre, hilera in zip(*columnas(3, n)):
+            dron = Dron(cadenas[dron_id], cadenas[nombre])
+            dron.hilera = hilera
+            inv.agregar_dron(dron)
+
+        planes = enteros[i]
+        i += 1
+        for _ in range(planes):
+            plan = PlanRiego(cadenas[enteros[i]])
+            n = enteros[i + 1]
+            i += 2
+            plan.hileras, plan.posiciones = columnas(2, n)
+            errores = enteros[i]
+            i += 1
+            for _ in range(errores):
+                plan.agregar_error(enteros[i], cadenas[enteros[i + 1]], cadenas[enteros[i + 2]])
+                i += 3
+            inv.agregar_plan(plan.nombre, plan)
+        invernaderos.append(inv)
+    return invernaderos
+
+
+def guardar_instantanea(invernaderos, ruta, origen=None):
+    """
+    Escribe la instantánea de forma atómica: archivo temporal con nombre
+    único en la misma carpeta (no choca entre hilos ni procesos) y reemplazo
+    """
+    datos = serializar(invernaderos, origen)
+    carpeta, nombre = os.path.split(os.path.abspath(ruta))
+    temporal = tempfile.NamedTemporaryFile(dir=carpeta, prefix=f"{nombre}.", suffix=".tmp", delete=False)
+    try:
+        with temporal:
+            temporal.write(datos)
+        os.replace(temporal.name, ruta)
+    except BaseException:
+        os.remove(temporal.name)
+        raise
+    return ruta
+
+
+def cargar_instantanea(ruta, origen=None):
+    """Invernaderos de la instantánea (leída con mmap), o None si no existe o está vieja"""
+    try:
+        with open(ruta, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return deserializar(mapa, origen)
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError) as e:
+        print(f"✗ Instantánea {ruta} descartada: {str(e)}")
+        return None
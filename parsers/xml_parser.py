@@ -1,29 +1,51 @@
+import os
+import re
 import xml.etree.ElementTree as ET
-from models.dominio import Invernadero, Planta, Dron
-from models.tda import ListaEnlazada
+from models.dominio import Invernadero, Planta, Dron, PlanRiego
+from models.tda import ArregloDinamico, TablaHash
+from services.metricas import metricas
+
+# Instrucción de un plan: "H1-P2" (se toleran espacios alrededor del guion)
+PATRON_INSTRUCCION = re.compile(r"H\s*(\d+)\s*-\s*P\s*(\d+)")
+
 
 class XMLParser:
     """Parser para archivos XML de configuración de invernaderos"""
     
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.drones_globales = ListaEnlazada()  # Drones disponibles globalmente
-        self.invernaderos = ListaEnlazada()  # Lista de invernaderos cargados
+    def __init__(self, filepath, streaming=True, progreso=None, total=None):
+        self.filepath = filepath  # Ruta o stream binario con read() (p. ej. el cuerpo de una subida)
+        self.total = total  # Bytes esperados de un stream (Content-Length), para el progreso
+        self.streaming = streaming  # iterparse incremental; False usa el árbol completo
+        self.progreso = progreso  # progreso(bytes_leidos, bytes_totales, elementos) en modo streaming
+        self.elementos = 0  # Elementos XML procesados
+        self.drones_globales = ArregloDinamico()  # Drones disponibles globalmente
+        self.indice_drones_globales = TablaHash()  # id -> Dron
+        self.invernaderos = ArregloDinamico()  # Lista de invernaderos cargados
 
+    @metricas.cronometrar("parse")
     def parse(self):
         """Parsea el archivo XML y construye las estructuras de datos"""
+        if self.streaming:
+            self._parse_streaming()
+        else:
+            self._parse_arbol()
+
+        if metricas.activo:
+            invalidas = 0
+            for inv in self.invernaderos.iter():
+                for _, plan in inv.planes.iter():
+                    invalidas += plan.errores.tamano
+            metricas.incrementar("entradas_invalidas", "Entradas de planes descartadas al cargar", invalidas)
+
+    def _parse_arbol(self):
+        """Carga el árbol completo en memoria y luego construye los modelos"""
         tree = ET.parse(self.filepath)
         root = tree.getroot()
 
         # 1. Parsear lista global de drones
         lista_drones = root.find("listaDrones")
         if lista_drones is not None:
-            for nodo_dron in lista_drones.findall("dron"):
-                dron = Dron(
-                    id=nodo_dron.get("id"),
-                    nombre=nodo_dron.get("nombre")
-                )
-                self.drones_globales.append(dron)
+            self._parsear_drones_globales(lista_drones)
 
         # 2. Parsear invernaderos
         lista_invernaderos = root.find("listaInvernaderos")
@@ -32,6 +54,91 @@ class XMLParser:
                 inv = self._parsear_invernadero(nodo_inv)
                 self.invernaderos.append(inv)
 
+    def _parse_streaming(self):
+        """
+        Parsea con iterparse: cada <invernadero> se convierte en modelo al
+        cerrarse y luego se descarta, así la memoria pico depende del
+        invernadero más grande y no del archivo completo
+        """
+        if hasattr(self.filepath, "read"):
+            # Stream: se construye el modelo a medida que llegan los bytes
+            self._recorrer(self.filepath, self.total)
+            return
+        with open(self.filepath, "rb") as archivo:
+            self._recorrer(archivo, os.fstat(archivo.fileno()).st_size)
+
+    def _recorrer(self, archivo, total):
+        """
+        Mismas reglas que _parse_arbol: solo cuentan la primera <listaDrones> y la
+        primera <listaInvernaderos> hijas de la raíz, y los <invernadero> hijos directos
+        de esa lista. Cada hijo de la raíz se descarta al cerrarse
+        """
+        contexto = ET.iterparse(archivo, events=("start", "end"))
+        _, root = next(contexto)
+        profundidad = 1  # La raíz ya está abierta
+        padre_invernaderos = None  # <listaInvernaderos> en curso, si es la que cuenta
+        invernaderos_cargados = False
+        drones_cargados = False
+        pendientes = []  # Invernaderos vistos antes de <listaDrones>
+
+        for evento, elem in contexto:
+            if evento == "start":
+                profundidad += 1
+                if profundidad == 2 and elem.tag == "listaInvernaderos" and not invernaderos_cargados:
+                    padre_invernaderos = elem
+                continue
+
+            self.elementos += 1
+            if self.progreso and self.elementos % 10000 == 0:
+                self.progreso(archivo.tell(), total, self.elementos)
+
+            if profundidad == 3 and padre_invernaderos is not None:
+                if elem.tag != "invernadero":
+                    padre_invernaderos.remove(elem)
+                elif drones_cargados:
+                    # La asignación de drones necesita la lista global ya cargada
+                    self.invernaderos.append(self._parsear_invernadero(elem))
+                    padre_invernaderos.remove(elem)
+                else:
+                    pendientes.append(elem)
+            elif profundidad == 2:
+                if elem.tag == "listaDrones" and not drones_cargados:
+                    self._parsear_drones_globales(elem)
+                    drones_cargados = True
+                    for nodo_inv in pendientes:
+                        self.invernaderos.append(self._parsear_invernadero(nodo_inv))
+                    pendientes = []
+                elif elem is padre_invernaderos:
+                    padre_invernaderos = None
+                    invernaderos_cargados = True
+                root.remove(elem)
+            profundidad -= 1
+
+        for nodo_inv in pendientes:
+            self.invernaderos.append(self._parsear_invernadero(nodo_inv))
+        if self.progreso:
+            fin = archivo.tell() if total is None else total
+            self.progreso(fin, fin, self.elementos)
+
+    def _parsear_drones_globales(self, lista_drones):
+        """Parsea los drones de <listaDrones>"""
+        for nodo_dron in lista_drones.findall("dron"):
+            self.agregar_dron_global(nodo_dron.get("id"), nodo_dron.get("nombre"))
+
+    def agregar_dron_global(self, dron_id, nombre):
+        """Registra un dron de la lista global (si el id se repite vale el primero)"""
+        dron = Dron(id=dron_id, nombre=nombre)
+        self.drones_globales.append(dron)
+        if dron.id not in self.indice_drones_globales:
+            self.indice_drones_globales.put(dron.id, dron)
+
+    def parsear_fragmento(self, fragmento):
+        """
+        Modelo de un único <invernadero> a partir de su XML (bytes), con
+        los drones globales ya registrados
+        """
+        return self._parsear_invernadero(ET.fromstring(fragmento))
+
     def _parsear_invernadero(self, nodo_inv):
         """Parsea un nodo de invernadero completo"""
         inv = Invernadero(nodo_inv.get("nombre"))
@@ -56,7 +163,7 @@ class XMLParser:
                     litros=int(nodo_planta.get("litrosAgua")),
                     gramos=int(nodo_planta.get("gramosFertilizante"))
                 )
-                inv.plantas.append(planta)
+                inv.agregar_planta(planta)
 
         # Parsear asignación de drones
         asignacion_drones = nodo_inv.find("asignacionDrones")
@@ -71,7 +178,7 @@ class XMLParser:
                     # Crear nueva instancia para este invernadero
                     dron_copia = Dron(dron_original.id, dron_original.nombre)
                     dron_copia.hilera = hilera_asignada
-                    inv.drones.append(dron_copia)
+                    inv.agregar_dron(dron_copia)
 
         # Parsear planes de riego (etiqueta correcta: planesRiego)
         planes_riego = nodo_inv.find("planesRiego")
@@ -80,29 +187,40 @@ class XMLParser:
                 nombre_plan = nodo_plan.get("nombre")
                 texto_plan = nodo_plan.text.strip()
                 
-                # Parsear secuencia del plan (ej: "H1-P2, H2-P1, H2-P2")
-                secuencia = self._parsear_secuencia_plan(texto_plan)
-                inv.planes.append((nombre_plan, secuencia))
+                # Compilar secuencia del plan (ej: "H1-P2, H2-P1, H2-P2")
+                plan = self._compilar_plan(inv, nombre_plan, texto_plan)
+                inv.agregar_plan(nombre_plan, plan)
 
         return inv
 
-    def _parsear_secuencia_plan(self, texto):
+    def _compilar_plan(self, inv, nombre_plan, texto):
         """
-        Convierte texto del plan en una lista de instrucciones
+        Convierte texto del plan en un PlanRiego compilado
         Entrada: "H1-P2, H2-P1, H2-P2"
-        Salida: ListaEnlazada con ["H1-P2", "H2-P1", "H2-P2"]
+        Salida: PlanRiego con hileras [1, 2, 2] y posiciones [2, 1, 2]
+        Las entradas inválidas quedan en plan.errores con su motivo
         """
-        secuencia = ListaEnlazada()
+        plan = PlanRiego(nombre_plan)
         # Dividir por comas y limpiar espacios
         items = [item.strip() for item in texto.split(',')]
+        numero = 0
         for item in items:
-            if item:  # Ignorar cadenas vacías
-                secuencia.append(item)
-        return secuencia
+            if not item:  # Ignorar cadenas vacías
+                continue
+            numero += 1
+            coincidencia = PATRON_INSTRUCCION.fullmatch(item)
+            if not coincidencia:
+                plan.agregar_error(numero, item, "sintaxis inválida")
+                continue
+            hilera = int(coincidencia.group(1))
+            posicion = int(coincidencia.group(2))
+            motivo = inv.validar_instruccion(hilera, posicion)
+            if motivo:
+                plan.agregar_error(numero, item, motivo)
+                continue
+            plan.agregar(hilera, posicion)
+        return plan
 
     def _buscar_dron_global(self, dron_id):
         """Busca un dron en la lista global por ID"""
-        for dron in self.drones_globales.iter():
-            if dron.id == dron_id:
-                return dron
-        return None
\ No newline at end of file
+        return self.indice_drones_globales.get(dron_id)
@@ -0,0 +1,407 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from parsers.indice_xml import IndiceXML, InvernaderosDiferidos
+from parsers.instantanea import serializar, deserializar
+from simulator.linea_tiempo import LineaTiempo
+from simulator.motor import EstadoSimulacion
+
+ESQUEMA = 4  # PRAGMA user_version; una base con otro esquema se vuelve a crear
+
+
+def id_resultado(configuracion, edicion, invernadero, plan):
+    """Id corto y estable de un resultado (para las rutas /api/resultado)"""
+    texto = "\x00".join((configuracion, edicion, invernadero, plan))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def resultado_a_json(resultado):
+    """Texto JSON del resultado sin el invernadero (se enlaza al leerlo)"""
+    return json.dumps(
+        {
+            "plan_nombre": resultado["plan_nombre"],
+            "tiempo_optimo": resultado["tiempo_optimo"],
+            "linea_tiempo": resultado["linea_tiempo"].a_dict(),
+            "estado": resultado["estado"].a_dict(),
+        },
+        separators=(",", ":"),
+    )
+
+
+def resultado_desde_json(texto):
+    datos = json.loads(texto)
+    datos["linea_tiempo"] = LineaTiempo.desde_dict(datos["linea_tiempo"])
+    datos["estado"] = EstadoSimulacion.desde_dict(datos["estado"])
+    return datos
+
+
+def edicion(config, nombre):
+    """
+    Qué versión del invernadero usa la configuración: "" si es la del XML o
+    "carga:versión" si esa carga lo editó. Junto con el sha256 del XML
+    identifica el modelo de un resultado
+    """
+    version = config["ediciones"].get(nombre)
+    return f"{config['carga']}:{version}" if version else ""
+
+
+# Almacenes abiertos en este proceso por abrir_invernaderos (procesos del pool de simulación)
+_almacenes = {}
+
+
+def abrir_invernaderos(ruta_db, config_id, carga):
+    """Invernaderos de una carga (o del XML si carga es None) leídos desde otro proceso"""
+    almacen = _almacenes.get(ruta_db)
+    if almacen is None:
+        almacen = _almacenes[ruta_db] = AlmacenCompartido(ruta_db)
+    config = almacen.configuracion(carga) if carga else almacen.configuracion_original(config_id)
+    if config is None:
+        raise ValueError("La configuración ya no está disponible")
+    return config["invernaderos"]
+
+
+class InvernaderosEditados:
+    """
+    Invernaderos de una carga: los del XML (compartidos por todas las cargas
+    del mismo archivo) salvo los que esa carga editó, que se leen del almacén
+    al pedirlos. Expone lo mismo que InvernaderosDiferidos
+    """
+
+    def __init__(self, base, ediciones, cargar_editado):
+        self.base = base
+        self.ediciones = ediciones  # nombre -> versión de la edición vigente
+        self.cargar_editado = cargar_editado  # cargar_editado(nombre) -> Invernadero
+        self.modelos = {}  # nombre -> (versión, Invernadero) de los editados ya leídos
+        self.lock = threading.Lock()
+
+    @property
+    def tamano(self):
+        return self.base.tamano
+
+    def __len__(self):
+        return self.tamano
+
+    def resumenes(self):
+        return self.base.resumenes()
+
+    def buscar(self, nombre):
+        """Modelo del invernadero con ese nombre (el editado si lo hay), o None"""
+        version = self.ediciones.get(nombre)
+        if version is None:
+            return self.base.buscar(nombre)
+        with self.lock:
+            guardado = self.modelos.get(nombre)
+        if guardado is not None and guardado[0] == version:
+            return guardado[1]
+        modelo = self.cargar_editado(nombre)
+        with self.lock:
+            self.modelos[nombre] = (version, modelo)
+        return modelo
+
+    def cargado(self, nombre):
+        """Modelo del invernadero solo si ya está en memoria (no lo carga)"""
+        if nombre not in self.ediciones:
+            return self.base.cargado(nombre)
+        with self.lock:
+            guardado = self.modelos.get(nombre)
+        return guardado[1] if guardado is not None and guardado[0] == self.ediciones[nombre] else None
+
+    def iter(self):
+        """Recorre los modelos en el orden del archivo, cargándolos de a uno"""
+        for posicion in range(self.tamano):
+            yield self.obtener(posicion)
+
+    def obtener(self, posicion):
+        """Modelo en esa posición del archivo (con un nombre repetido se edita el primero)"""
+        nombre = self.base.indice.invernaderos[posicion].nombre
+        if nombre in self.ediciones and self.base.posiciones[nombre] == posicion:
+            return self.buscar(nombre)
+        return self.base.obtener(posicion)
+
+    def heredar(self, anterior):
+        """Toma los editados ya leídos por otra versión de la misma carga que sigan vigentes"""
+        with anterior.lock:
+            modelos = dict(anterior.modelos)
+        with self.lock:
+            for nombre, (version, modelo) in modelos.items():
+                if self.ediciones.get(nombre) == version:
+                    self.modelos[nombre] = (version, modelo)
+
+
+class AlmacenCompartido:
+    """
+    Configuraciones cargadas y resultados de simulación guardados en SQLite,
+    visibles para todos los procesos (varios workers de gunicorn) sin volver
+    a parsear. Una configuración se identifica por el sha256 del XML subido
+    y guarda la ruta del XML y su índice (parsers.indice_xml); los
+    invernaderos se construyen al pedirlos. Cada subida crea una carga
+    (la que usa la sesión): las ediciones de planes son de la carga, con una
+    versión por invernadero, y se guardan con el formato de
+    parsers.instantanea. Así otra sesión con el mismo archivo no ve las
+    ediciones ajenas y volver a subirlo no borra nada. Los resultados se
+    identifican por (sha256, edición, invernadero, plan), de modo que los de
+    invernaderos sin editar sirven para todas las cargas del mismo archivo
+    """
+
+    def __init__(self, ruta_db, max_configuraciones=4, max_invernaderos=8, max_cargas=64):
+        self.ruta_db = ruta_db
+        self.max_configuraciones = max_configuraciones
+        self.max_invernaderos = max_invernaderos  # Modelos en memoria por configuración
+        self.max_cargas = max_cargas
+        self.configuraciones = OrderedDict()  # sha256 -> InvernaderosDiferidos de este proceso
+        self.cargas = OrderedDict()  # carga -> (versión, InvernaderosEditados) de este proceso
+        self.lock = threading.Lock()
+        self.local = threading.local()  # Una conexión SQLite por hilo
+        self._crear_tablas()
+
+    def _conexion(self):
+        conexion = getattr(self.local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.row_factory = sqlite3.Row
+            self.local.conexion = conexion
+        return conexion
+
+    def _crear_tablas(self):
+        conexion = self._conexion()
+        if conexion.execute("PRAGMA user_version").fetchone()[0] != ESQUEMA:
+            conexion.executescript(
+                """
+                DROP TABLE IF EXISTS configuraciones;
+                DROP TABLE IF EXISTS cargas;
+                DROP TABLE IF EXISTS invernaderos_editados;
+                DROP TABLE IF EXISTS resultados;
+                """
+            )
+        conexion.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS configuraciones (
+                id TEXT PRIMARY KEY,
+                archivo TEXT,
+                ruta TEXT NOT NULL,
+                indice TEXT NOT NULL,
+                actualizado REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cargas (
+                id TEXT PRIMARY KEY,
+                configuracion TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                actualizado REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS invernaderos_editados (
+                carga TEXT NOT NULL,
+                nombre TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                modelo BLOB NOT NULL,
+                PRIMARY KEY (carga, nombre)
+            );
+            CREATE TABLE IF NOT EXISTS resultados (
+                id TEXT PRIMARY KEY,
+                configuracion TEXT NOT NULL,
+                edicion TEXT NOT NULL,
+                invernadero TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                resultado TEXT NOT NULL,
+                actualizado REAL NOT NULL
+            );
+            PRAGMA user_version = {ESQUEMA};
+            """
+        )
+
+    def _transaccion(self, funcion):
+        """Ejecuta funcion(conexion) dentro de BEGIN IMMEDIATE ... COMMIT (ROLLBACK si falla)"""
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            valor = funcion(conexion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        return valor
+
+    def guardar_configuracion(self, config_id, ruta, indice, archivo=None):
+        """Registra (o vuelve a registrar) el XML con su índice; no toca las cargas ni sus ediciones"""
+        self._conexion().execute(
+            "INSERT INTO configuraciones (id, archivo, ruta, indice, actualizado) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET ruta = excluded.ruta, indice = excluded.indice, "
+            "archivo = COALESCE(excluded.archivo, archivo), actualizado = excluded.actualizado",
+            (config_id, archivo, ruta, json.dumps(indice.a_dict()), time.time()),
+        )
+
+    def crear_carga(self, config_id):
+        """Nueva carga (sin ediciones) de una configuración registrada; devuelve su id o None"""
+        carga = uuid.uuid4().hex
+
+        def crear(conexion):
+            ahora = time.time()
+            if not conexion.execute(
+                "UPDATE configuraciones SET actualizado = ? WHERE id = ?", (ahora, config_id)
+            ).rowcount:
+                return None
+            conexion.execute(
+                "INSERT INTO cargas (id, configuracion, version, actualizado) VALUES (?, ?, 0, ?)",
+                (carga, config_id, ahora),
+            )
+            return carga
+
+        return self._transaccion(crear)
+
+    def guardar_invernadero(self, carga, invernadero, version_anterior=0):
+        """
+        Guarda un invernadero editado en la carga si su edición vigente sigue
+        siendo version_anterior (0: sin editar). Devuelve la versión nueva, o
+        None si la carga no existe o alguien más lo editó mientras tanto
+        """
+        modelo = serializar([invernadero])
+
+        def guardar(conexion):
+            fila = conexion.execute(
+                "SELECT cargas.id, editados.version FROM cargas LEFT JOIN invernaderos_editados AS editados "
+                "ON editados.carga = cargas.id AND editados.nombre = ? WHERE cargas.id = ?",
+                (invernadero.nombre, carga),
+            ).fetchone()
+            if fila is None or (fila["version"] or 0) != version_anterior:
+                return None
+            conexion.execute(
+                "UPDATE cargas SET version = version + 1, actualizado = ? WHERE id = ?", (time.time(), carga)
+            )
+            conexion.execute(
+                "INSERT OR REPLACE INTO invernaderos_editados (carga, nombre, version, modelo) VALUES (?, ?, ?, ?)",
+                (carga, invernadero.nombre, version_anterior + 1, modelo),
+            )
+            return version_anterior + 1
+
+        return self._transaccion(guardar)
+
+    def _invernadero_editado(self, carga, nombre):
+        fila = self._conexion().execute(
+            "SELECT modelo FROM invernaderos_editados WHERE carga = ? AND nombre = ?", (carga, nombre)
+        ).fetchone()
+        return deserializar(fila["modelo"])[0] if fila else None
+
+    def _invernaderos(self, config_id):
+        """InvernaderosDiferidos del XML (sin ediciones), compartido por todas sus cargas; None si no existe"""
+        with self.lock:
+            invernaderos = self.configuraciones.get(config_id)
+            if invernaderos is not None:
+                self.configuraciones.move_to_end(config_id)
+                return invernaderos
+        fila = self._conexion().execute(
+            "SELECT ruta, indice FROM configuraciones WHERE id = ?", (config_id,)
+        ).fetchone()
+        if fila is None:
+            return None
+        invernaderos = InvernaderosDiferidos(
+            fila["ruta"],
+            IndiceXML.desde_dict(json.loads(fila["indice"])),
+            origen=config_id,
+            max_modelos=self.max_invernaderos,
+        )
+        with self.lock:
+            invernaderos = self.configuraciones.setdefault(config_id, invernaderos)
+            self.configuraciones.move_to_end(config_id)
+            while len(self.configuraciones) > self.max_configuraciones:
+                self.configuraciones.popitem(last=False)
+        return invernaderos
+
+    def configuracion_original(self, config_id):
+        """{"id", "carga", "ediciones", "invernaderos"} del XML tal cual (sin carga), o None"""
+        invernaderos = self._invernaderos(config_id)
+        if invernaderos is None:
+            return None
+        return {"id": config_id, "carga": None, "ediciones": {}, "invernaderos": invernaderos}
+
+    def configuracion(self, carga):
+        """{"id", "carga", "ediciones", "invernaderos"} de una carga, o None si no existe"""
+        conexion = self._conexion()
+        fila = conexion.execute("SELECT configuracion, version FROM cargas WHERE id = ?", (carga,)).fetchone()
+        if fila is None:
+            return None
+        base = self._invernaderos(fila["configuracion"])
+        if base is None:
+            return None
+        with self.lock:
+            recordado = self.cargas.get(carga)
+        if recordado is None or recordado[0] != fila["version"] or recordado[1].base is not base:
+            # La versión de la carga sube con cada edición: releer qué invernaderos editó
+            ediciones = dict(
+                conexion.execute(
+                    "SELECT nombre, version FROM invernaderos_editados WHERE carga = ?", (carga,)
+                ).fetchall()
+            )
+            invernaderos = InvernaderosEditados(
+                base, ediciones, lambda nombre: self._invernadero_editado(carga, nombre)
+            )
+            if recordado is not None:
+                invernaderos.heredar(recordado[1])
+            recordado = (fila["version"], invernaderos)
+            with self.lock:
+                self.cargas[carga] = recordado
+                self.cargas.move_to_end(carga)
+                while len(self.cargas) > self.max_cargas:
+                    self.cargas.popitem(last=False)
+        invernaderos = recordado[1]
+        return {
+            "id": fila["configuracion"],
+            "carga": carga,
+            "ediciones": invernaderos.ediciones,
+            "invernaderos": invernaderos,
+        }
+
+    def fuente(self, config):
+        """(funcion, argumentos) para obtener los invernaderos de config en otro proceso (ver simulator.lote)"""
+        return abrir_invernaderos, (self.ruta_db, config["id"], config["carga"])
+
+    def guardar_resultado(self, config, resultado):
+        """Guarda el resultado (sin el invernadero, que se enlaza al leerlo) y devuelve su id"""
+        invernadero = resultado["invernadero"].nombre
+        version = edicion(config, invernadero)
+        resultado_id = id_resultado(config["id"], version, invernadero, resultado["plan_nombre"])
+        self._conexion().execute(
+            "INSERT OR REPLACE INTO resultados (id, configuracion, edicion, invernadero, plan, resultado, actualizado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                resultado_id, config["id"], version, invernadero, resultado["plan_nombre"],
+                resultado_a_json(resultado), time.time(),
+            ),
+        )
+        return resultado_id
+
+    def cargar_resultado(self, config, invernadero, plan):
+        """Resultado guardado para ese invernadero (en la edición que usa config) y plan, sin invernadero, o None"""
+        fila = self._conexion().execute(
+            "SELECT resultado FROM resultados WHERE id = ?",
+            (id_resultado(config["id"], edicion(config, invernadero), invernadero, plan),),
+        ).fetchone()
+        return resultado_desde_json(fila["resultado"]) if fila else None
+
+    def buscar_resultado(self, resultado_id):
+        """(configuracion, edicion, invernadero, plan) de un id de resultado, o None"""
+        fila = self._conexion().execute(
+            "SELECT configuracion, edicion, invernadero, plan FROM resultados WHERE id = ?", (resultado_id,)
+        ).fetchone()
+        return (fila["configuracion"], fila["edicion"], fila["invernadero"], fila["plan"]) if fila else None
+
+    def limpiar(self, antiguedad=7 * 24 * 3600):
+        """Borra configuraciones, cargas y resultados sin cambios en antiguedad segundos"""
+        limite = time.time() - antiguedad
+        conexion = self._conexion()
+        conexion.execute("DELETE FROM resultados WHERE actualizado < ?", (limite,))
+        conexion.execute(
+            "DELETE FROM invernaderos_editados WHERE carga IN (SELECT id FROM cargas WHERE actualizado < ?)",
+            (limite,),
+        )
+        conexion.execute("DELETE FROM cargas WHERE actualizado < ?", (limite,))
+        cursor = conexion.execute(
+            "DELETE FROM configuraciones WHERE actualizado < ? "
+            "AND id NOT IN (SELECT configuracion FROM cargas)",
+            (limite,),
+        )
+        return cursor.rowcount
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import tempfile
+
+
+class LectorCopia:
+    """
+    Envuelve un stream binario de lectura (el cuerpo de la petición): cada
+    bloque que se lee se copia a un archivo temporal y se suma al sha256.
+    Así el parser puede consumir la subida mientras llega y, en la misma
+    pasada, queda guardada en un almacenamiento direccionado por contenido
+    (<carpeta>/<sha256>.xml): dos subidas con el mismo nombre no se pisan y
+    un archivo repetido no se duplica
+    """
+
+    def __init__(self, stream, carpeta, extension=".xml"):
+        self.stream = stream
+        self.carpeta = carpeta
+        self.extension = extension
+        self.sha = hashlib.sha256()
+        self.leidos = 0
+        descriptor, self.temporal = tempfile.mkstemp(dir=carpeta, suffix=".parcial")
+        self.copia = os.fdopen(descriptor, "wb")
+        self.ruta = None  # Ruta final, al terminar()
+        self.hash = None
+
+    def read(self, n=-1):
+        bloque = self.stream.read(n)
+        if bloque:
+            self.sha.update(bloque)
+            self.copia.write(bloque)
+            self.leidos += len(bloque)
+        return bloque
+
+    def tell(self):
+        return self.leidos
+
+    def terminar(self):
+        """Lee lo que el parser no consumió, cierra la copia y devuelve (ruta, sha256)"""
+        while self.read(1024 * 1024):
+            pass
+        self.copia.close()
+        self.hash = self.sha.hexdigest()
+        self.ruta = os.path.join(self.carpeta, self.hash + self.extension)
+        # Mismo nombre implica mismo contenido: reemplazar es inofensivo
+        os.replace(self.temporal, self.ruta)
+        return self.ruta, self.hash
+
+    def descartar(self):
+        """Borra la copia parcial (la subida falló o no era válida)"""
+        if not self.copia.closed:
+            self.copia.close()
+        if os.path.exists(self.temporal):
+            os.remove(self.temporal)
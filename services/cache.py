@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+
+def tamano_resultado(resultado):
+    """Tamaño aproximado en bytes de un resultado de simulación"""
+    if not resultado:
+        return 0
+    tamano = 512  # Diccionario, estado por dron y textos
+    estado = resultado["estado"]
+    tamano += 64 * len(estado.nombres)
+    tamano += 160 * len(estado.puntos_control) * (len(estado.nombres) + 1)  # Puntos de control
+    return tamano + resultado["linea_tiempo"].tamano_bytes()
+
+
+class CacheResultados:
+    """
+    Caché LRU de resultados de simulación, limitada por cantidad de entradas
+    y por memoria aproximada. La clave es (hash del XML, invernadero, plan)
+    """
+
+    def __init__(self, max_entradas=64, max_bytes=256 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.entradas = OrderedDict()  # clave -> (resultado, tamano); el final es lo más reciente
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.lock = threading.Lock()
+
+    def obtener(self, clave):
+        """Devuelve el resultado en caché o None"""
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, resultado):
+        """Guarda un resultado y desaloja los menos usados si se excede algún límite"""
+        tamano = tamano_resultado(resultado)
+        with self.lock:
+            anterior = self.entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes_usados -= anterior[1]
+            if tamano > self.max_bytes:
+                return
+            self.entradas[clave] = (resultado, tamano)
+            self.bytes_usados += tamano
+            while len(self.entradas) > self.max_entradas or self.bytes_usados > self.max_bytes:
+                _, (_, tamano_viejo) = self.entradas.popitem(last=False)
+                self.bytes_usados -= tamano_viejo
+                self.desalojos += 1
+
+    def obtener_o_calcular(self, clave, calcular):
+        """Devuelve el resultado en caché o lo calcula con calcular() y lo guarda"""
+        resultado = self.obtener(clave)
+        if resultado is None:
+            resultado = calcular()
+            if resultado is not None:
+                self.guardar(clave, resultado)
+        return resultado
+
+    def limpiar(self):
+        with self.lock:
+            self.entradas.clear()
+            self.bytes_usados = 0
+
+    def exportar_metricas(self, prefijo="guateriegos"):
+        """Líneas en formato Prometheus con los contadores de la caché"""
+        estadisticas = self.estadisticas()
+        lineas = []
+        for nombre, tipo, ayuda, valor in (
+            ("cache_aciertos_total", "counter", "Resultados servidos desde la caché", estadisticas["aciertos"]),
+            ("cache_fallos_total", "counter", "Resultados que hubo que simular", estadisticas["fallos"]),
+            ("cache_desalojos_total", "counter", "Resultados desalojados por los límites", estadisticas["desalojos"]),
+            ("cache_entradas", "gauge", "Resultados guardados en la caché", estadisticas["entradas"]),
+            ("cache_bytes", "gauge", "Memoria aproximada de la caché", estadisticas["bytes"]),
+        ):
+            lineas.append(f"# HELP {prefijo}_{nombre} {ayuda}")
+            lineas.append(f"# TYPE {prefijo}_{nombre} {tipo}")
+            lineas.append(f"{prefijo}_{nombre} {valor}")
+        return lineas
+
+    def estadisticas(self):
+        """Contadores para monitoreo"""
+        with self.lock:
+            return {
+                "entradas": len(self.entradas),
+                "bytes": self.bytes_usados,
+                "max_entradas": self.max_entradas,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+            }
+
+    def __contains__(self, clave):
+        with self.lock:
+            return clave in self.entradas
+
+    def __len__(self):
+        return len(self.entradas)
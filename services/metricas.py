@@ -0,0 +1,158 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Límites (segundos) de los histogramas de duración
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Contador:
+    """Contador monótono"""
+
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.valor = 0
+
+    def exportar(self):
+        return [
+            f"# HELP {self.nombre} {self.ayuda}",
+            f"# TYPE {self.nombre} counter",
+            f"{self.nombre} {self.valor}",
+        ]
+
+
+class Histograma:
+    """Histograma con cubetas acumulativas, suma y cantidad de observaciones"""
+
+    def __init__(self, nombre, ayuda, limites=LIMITES_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)  # La última es +Inf
+        self.suma = 0.0
+        self.cantidad = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cantidad += 1
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        acumulado = 0
+        for limite, cantidad in zip(self.limites, self.cubetas):
+            acumulado += cantidad
+            lineas.append(f'{self.nombre}_bucket{{le="{limite}"}} {acumulado}')
+        lineas.append(f'{self.nombre}_bucket{{le="+Inf"}} {self.cantidad}')
+        lineas.append(f"{self.nombre}_sum {self.suma}")
+        lineas.append(f"{self.nombre}_count {self.cantidad}")
+        return lineas
+
+
+class RegistroMetricas:
+    """
+    Métricas del proceso: un histograma de duración por etapa y contadores,
+    exportados en el formato de texto de Prometheus. Con activo = False
+    medir() e incrementar() no hacen nada. Además guarda las etapas de la
+    petición en curso (por hilo) para el encabezado Server-Timing
+    """
+
+    def __init__(self, prefijo="guateriegos"):
+        self.prefijo = prefijo
+        self.activo = True
+        self.histogramas = {}  # etapa -> Histograma
+        self.contadores = {}  # nombre -> Contador
+        self.colectores = {}  # nombre -> función que devuelve líneas extra al exportar
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def medir(self, etapa):
+        """Context manager que registra la duración de una etapa"""
+        if not self.activo:
+            return nullcontext()
+        return self._medir(etapa)
+
+    @contextmanager
+    def _medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio)
+
+    def cronometrar(self, etapa):
+        """Decorador: mide cada llamada a la función como la etapa dada"""
+        def decorador(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                with self.medir(etapa):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    def observar(self, etapa, segundos):
+        with self.lock:
+            histograma = self.histogramas.get(etapa)
+            if histograma is None:
+                histograma = Histograma(
+                    f"{self.prefijo}_{etapa}_segundos", f"Duración de la etapa {etapa} en segundos"
+                )
+                self.histogramas[etapa] = histograma
+            histograma.observar(segundos)
+        etapas = getattr(self.local, "etapas", None)
+        if etapas is not None:
+            etapas.append((etapa, segundos))
+
+    def incrementar(self, nombre, ayuda, cantidad=1):
+        """Suma cantidad al contador {prefijo}_{nombre}_total"""
+        if not self.activo:
+            return
+        with self.lock:
+            contador = self.contadores.get(nombre)
+            if contador is None:
+                contador = Contador(f"{self.prefijo}_{nombre}_total", ayuda)
+                self.contadores[nombre] = contador
+            contador.valor += cantidad
+
+    def registrar_colector(self, nombre, colector):
+        """colector() devuelve líneas de texto que se agregan al exportar (reemplaza al del mismo nombre)"""
+        self.colectores[nombre] = colector
+
+    def iniciar_peticion(self):
+        self.local.etapas = []
+        self.local.inicio = time.perf_counter()
+
+    def terminar_peticion(self):
+        """Devuelve el valor del encabezado Server-Timing de la petición en curso"""
+        etapas = getattr(self.local, "etapas", None)
+        if etapas is None:
+            return None
+        total = time.perf_counter() - self.local.inicio
+        self.local.etapas = None
+        partes = [f"{etapa};dur={segundos * 1000:.2f}" for etapa, segundos in etapas]
+        partes.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(partes)
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus"""
+        with self.lock:
+            lineas = []
+            for histograma in self.histogramas.values():
+                lineas.extend(histograma.exportar())
+            for contador in self.contadores.values():
+                lineas.extend(contador.exportar())
+        for colector in list(self.colectores.values()):
+            lineas.extend(colector())
+        return "\n".join(lineas) + "\n"
+
+    def limpiar(self):
+        with self.lock:
+            self.histogramas.clear()
+            self.contadores.clear()
+
+
+# Registro compartido por el parser, el motor, los generadores y la app
+metricas = RegistroMetricas()
@@ -0,0 +1,180 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Estados de un trabajo
+PENDIENTE = "pendiente"
+EN_CURSO = "en_curso"
+TERMINADO = "terminado"
+ERROR = "error"
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ColaTrabajos:
+    """
+    Cola de trabajos en segundo plano (carga de XML, simulaciones) guardada
+    en SQLite: enviar() devuelve un id al instante y el trabajo corre en un
+    pool de hilos, informando su progreso. Estado y resultado quedan en la
+    base, así sobreviven a un reinicio y cualquier proceso (varios workers de
+    gunicorn) puede consultarlos
+    """
+
+    def __init__(self, ruta_db, workers=2, intervalo_progreso=0.25):
+        self.ruta_db = ruta_db
+        self.intervalo_progreso = intervalo_progreso  # Segundos mínimos entre escrituras de progreso
+        self.funciones = {}  # tipo -> funcion(parametros, progreso) -> resultado
+        self.ejecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trabajo")
+        self.local = threading.local()  # Una conexión SQLite por hilo
+        self._crear_tabla()
+
+    def _conexion(self):
+        conexion = getattr(self.local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.row_factory = sqlite3.Row
+            self.local.conexion = conexion
+        return conexion
+
+    def _crear_tabla(self):
+        self._conexion().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS trabajos (
+                id TEXT PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                clave TEXT,
+                estado TEXT NOT NULL,
+                parametros TEXT NOT NULL,
+                progreso INTEGER NOT NULL DEFAULT 0,
+                total INTEGER,
+                detalle TEXT,
+                mensaje TEXT,
+                resultado BLOB,
+                pid INTEGER,
+                creado REAL NOT NULL,
+                actualizado REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS trabajos_tipo_clave ON trabajos (tipo, clave);
+            """
+        )
+
+    def registrar(self, tipo, funcion):
+        """funcion(parametros, progreso) devuelve un resultado serializable con pickle"""
+        self.funciones[tipo] = funcion
+
+    def enviar(self, tipo, parametros, clave=None):
+        """Encola un trabajo y devuelve su id sin esperar a que termine"""
+        if tipo not in self.funciones:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        trabajo_id = uuid.uuid4().hex
+        ahora = time.time()
+        self._conexion().execute(
+            "INSERT INTO trabajos (id, tipo, clave, estado, parametros, creado, actualizado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (trabajo_id, tipo, clave, PENDIENTE, json.dumps(parametros), ahora, ahora),
+        )
+        self.ejecutor.submit(self._ejecutar, trabajo_id)
+        return trabajo_id
+
+    def reanudar(self):
+        """
+        Vuelve a encolar los trabajos pendientes y los que quedaron en curso en
+        un proceso que ya no existe. Llamar después de registrar() los tipos
+        """
+        conexion = self._conexion()
+        filas = conexion.execute(
+            "SELECT id, estado, pid FROM trabajos WHERE estado IN (?, ?)", (PENDIENTE, EN_CURSO)
+        ).fetchall()
+        for fila in filas:
+            if fila["estado"] == EN_CURSO:
+                if _proceso_vivo(fila["pid"]):
+                    continue
+                # Solo un proceso logra devolverlo a pendiente
+                cursor = conexion.execute(
+                    "UPDATE trabajos SET estado = ?, actualizado = ? WHERE id = ? AND estado = ? AND pid = ?",
+                    (PENDIENTE, time.time(), fila["id"], EN_CURSO, fila["pid"]),
+                )
+                if cursor.rowcount == 0:
+                    continue
+            self.ejecutor.submit(self._ejecutar, fila["id"])
+
+    def _ejecutar(self, trabajo_id):
+        conexion = self._conexion()
+        # Tomar el trabajo; si otro proceso ya lo tomó no se hace nada
+        cursor = conexion.execute(
+            "UPDATE trabajos SET estado = ?, pid = ?, actualizado = ? WHERE id = ? AND estado = ?",
+            (EN_CURSO, os.getpid(), time.time(), trabajo_id, PENDIENTE),
+        )
+        if cursor.rowcount == 0:
+            return
+        fila = conexion.execute("SELECT tipo, parametros FROM trabajos WHERE id = ?", (trabajo_id,)).fetchone()
+
+        ultimo = [0.0]
+
+        def progreso(hechos, total=None, detalle=None):
+            ahora = time.time()
+            if ahora - ultimo[0] < self.intervalo_progreso and (total is None or hechos < total):
+                return
+            ultimo[0] = ahora
+            conexion.execute(
+                "UPDATE trabajos SET progreso = ?, total = ?, detalle = ?, actualizado = ? WHERE id = ?",
+                (hechos, total, detalle, ahora, trabajo_id),
+            )
+
+        try:
+            funcion = self.funciones[fila["tipo"]]
+            resultado = funcion(json.loads(fila["parametros"]), progreso)
+            conexion.execute(
+                "UPDATE trabajos SET estado = ?, resultado = ?, actualizado = ? WHERE id = ?",
+                (TERMINADO, pickle.dumps(resultado, pickle.HIGHEST_PROTOCOL), time.time(), trabajo_id),
+            )
+        except Exception as e:
+            print(f"✗ Error en trabajo {trabajo_id}: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            conexion.execute(
+                "UPDATE trabajos SET estado = ?, mensaje = ?, actualizado = ? WHERE id = ?",
+                (ERROR, str(e), time.time(), trabajo_id),
+            )
+
+    def estado(self, trabajo_id):
+        """Diccionario con el estado y el progreso del trabajo, o None si no existe"""
+        fila = self._conexion().execute(
+            "SELECT id, tipo, clave, estado, parametros, progreso, total, detalle, mensaje, creado, actualizado "
+            "FROM trabajos WHERE id = ?",
+            (trabajo_id,),
+        ).fetchone()
+        if fila is None:
+            return None
+        estado = dict(fila)
+        estado["parametros"] = json.loads(estado["parametros"])
+        estado["porcentaje"] = (
+            round(100 * estado["progreso"] / estado["total"], 1) if estado["total"] else None
+        )
+        return estado
+
+    def limpiar(self, antiguedad=24 * 3600):
+        """Borra los trabajos terminados o con error más viejos que antiguedad segundos"""
+        cursor = self._conexion().execute(
+            "DELETE FROM trabajos WHERE estado IN (?, ?) AND actualizado < ?",
+            (TERMINADO, ERROR, time.time() - antiguedad),
+        )
+        return cursor.rowcount
+
+    def cerrar(self, esperar=True):
+        self.ejecutor.shutdown(wait=esperar)
@@ -0,0 +1,121 @@
+"""
+Pruebas diferenciales entre motores de simulación: corre el mismo plan con
+dos motores (por defecto el de referencia, segundo a segundo, y el motor por
+eventos) sobre invernaderos aleatorios, y exige el mismo tiempo óptimo, los
+mismos totales y la misma línea de tiempo segundo a segundo. Las pruebas de
+tests/test_diferencial.py usan estas mismas funciones.
+
+Uso: python -m simulator.diferencial [casos] [semilla] [motor_a] [motor_b] [entradas]
+"""
+import random
+import sys
+
+from models.dominio import Invernadero, Planta, Dron, PlanRiego
+from simulator.motores import crear_motor
+
+
+def invernadero_aleatorio(azar, nombre="Inv", entradas=None):
+    """
+    Invernadero chico con casos borde: hileras sin dron, plantas faltantes,
+    dos drones en la misma hilera y planes vacíos o con entradas no regables
+    (se agregan sin validar para ejercitar las instrucciones que se omiten).
+    entradas: largo fijo de cada plan (p. ej. para planes largos)
+    """
+    inv = Invernadero(nombre)
+    inv.numero_hileras = azar.randint(1, 6)
+    inv.plantas_por_hilera = azar.randint(1, 12)
+    for h in range(1, inv.numero_hileras + 1):
+        for p in range(1, inv.plantas_por_hilera + 1):
+            if azar.random() < 0.9:
+                inv.agregar_planta(Planta(f"P{h}-{p}", h, p, azar.randint(0, 5), azar.randint(0, 300)))
+
+    numero = 0
+    for h in range(1, inv.numero_hileras + 1):
+        for _ in range(azar.choice((0, 1, 1, 1, 2))):
+            numero += 1
+            dron = Dron(str(numero), f"DR{numero:02d}")  # Nombres únicos: el estado se indexa por nombre
+            dron.hilera = h
+            inv.agregar_dron(dron)
+
+    for k in range(azar.randint(1, 3)):
+        plan = PlanRiego(f"Plan {k}")
+        for _ in range(entradas if entradas is not None else azar.choice((0, 1, 5, 20, 60))):
+            plan.agregar(
+                azar.randint(1, inv.numero_hileras + 1),
+                azar.randint(1, inv.plantas_por_hilera + 1),
+            )
+        inv.agregar_plan(plan.nombre, plan)
+    return inv
+
+
+def puntos_control(estado):
+    """Los puntos de control como datos comparables (solo los motores por eventos los guardan)"""
+    return [
+        (
+            punto.indice, punto.instrucciones, punto.segundos_espera, punto.fin_riego,
+            punto.posiciones, punto.litros, punto.gramos, punto.disponible, punto.tramos,
+        )
+        for punto in estado.puntos_control
+    ]
+
+
+def firma(resultado, con_puntos=False):
+    """Lo que dos motores deben producir igual para un mismo plan"""
+    estado = resultado["estado"]
+    linea = resultado["linea_tiempo"]
+    campos = {
+        "tiempo_optimo": resultado["tiempo_optimo"],
+        "eficiencia": list(estado.eficiencia()),
+        "total_litros": estado.total_litros(),
+        "total_gramos": estado.total_gramos(),
+        "instrucciones": estado.instrucciones,
+        "segundos_espera": estado.segundos_espera,
+        "linea_tiempo": list(linea.ventana()),
+        "segundos": len(linea),
+    }
+    if con_puntos:
+        campos["puntos_control"] = puntos_control(estado)
+    return campos
+
+
+def comparar(
+    invernadero, plan_nombre, motor_a="referencia", motor_b="eventos", regresar_inicio=False, con_puntos=False
+):
+    """
+    Devuelve la lista de campos de firma() en los que difieren los dos motores.
+    con_puntos: comparar también los puntos de control (motores por eventos)
+    """
+    a = firma(invernadero.simular_plan(plan_nombre, motor_a, regresar_inicio), con_puntos)
+    b = firma(invernadero.simular_plan(plan_nombre, motor_b, regresar_inicio), con_puntos)
+    return [campo for campo in a if a[campo] != b[campo]]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    casos = int(argv[0]) if argv else 300
+    semilla = int(argv[1]) if len(argv) > 1 else 0
+    motor_a = argv[2] if len(argv) > 2 else "referencia"
+    motor_b = argv[3] if len(argv) > 3 else "eventos"
+    entradas = int(argv[4]) if len(argv) > 4 else None
+    con_puntos = "referencia" not in (motor_a, motor_b)
+
+    azar = random.Random(semilla)
+    planes = 0
+    for caso in range(casos):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}", entradas)
+        for plan_nombre, _ in inv.planes.iter():
+            for regresar_inicio in (False, True):
+                diferencias = comparar(inv, plan_nombre, motor_a, motor_b, regresar_inicio, con_puntos)
+                if diferencias:
+                    print(
+                        f"✗ Caso {caso} (semilla {semilla}), {plan_nombre}, "
+                        f"regresar_inicio={regresar_inicio}: difieren {', '.join(diferencias)}"
+                    )
+                    return 1
+            planes += 1
+    print(f"✓ {casos} invernaderos, {planes} planes: {motor_a} y {motor_b} idénticos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+from array import array
+from bisect import bisect_right
+from models.tda import ColaPrioridad
+
+# Tipos de tramo de un dron
+MOVER = 0
+ESPERAR = 1
+REGAR = 2
+
+# Columnas de tramos de LineaTiempo (una lista de array('i') por columna, un array por pista)
+COLUMNAS = ("inicios", "fines", "tipos", "desdes", "hastas", "ordenes")
+
+
+class LineaTiempo:
+    """
+    Línea de tiempo comprimida por tramos (run-length) de una simulación.
+    Cada dron tiene una pista con tramos (inicio, fin, tipo, desde, hasta, orden)
+    guardados en columnas array('i'); un tramo cubre los segundos [inicio, fin).
+    Los textos por segundo ("Adelante (H1P7)", "Esperar", ...) solo se generan
+    al recorrerla o consultarla.
+    """
+    def __init__(self):
+        self.nombres = []  # Nombre del dron de cada pista
+        self.hileras = []  # Hilera del dron de cada pista
+        self.inicios = []
+        self.fines = []
+        self.tipos = []
+        self.desdes = []  # Posición al iniciar el tramo
+        self.hastas = []  # Posición al terminar el tramo
+        self.ordenes = []  # Índice de la instrucción del plan que generó el tramo
+        self._segundos = None
+
+    def agregar_pista(self, nombre, hilera):
+        """Crea la pista de un dron y devuelve su índice"""
+        self.nombres.append(nombre)
+        self.hileras.append(hilera)
+        for columna in (self.inicios, self.fines, self.tipos, self.desdes, self.hastas, self.ordenes):
+            columna.append(array('i'))
+        return len(self.nombres) - 1
+
+    def agregar_tramo(self, pista, inicio, fin, tipo, desde, hasta, orden):
+        """Agrega un tramo al final de la pista (los tramos llegan en orden de tiempo)"""
+        self.inicios[pista].append(inicio)
+        self.fines[pista].append(fin)
+        self.tipos[pista].append(tipo)
+        self.desdes[pista].append(desde)
+        self.hastas[pista].append(hasta)
+        self.ordenes[pista].append(orden)
+        self._segundos = None
+
+    def a_dict(self):
+        datos = {"nombres": self.nombres, "hileras": self.hileras}
+        for nombre in COLUMNAS:
+            datos[nombre] = [arreglo.tolist() for arreglo in getattr(self, nombre)]
+        return datos
+
+    @classmethod
+    def desde_dict(cls, datos):
+        linea = cls()
+        linea.nombres = list(datos["nombres"])
+        linea.hileras = list(datos["hileras"])
+        for nombre in COLUMNAS:
+            setattr(linea, nombre, [array('i', valores) for valores in datos[nombre]])
+        return linea
+
+    def prefijo(self, tramos):
+        """Copia de la línea con solo los primeros tramos[pista] tramos de cada pista"""
+        copia = LineaTiempo()
+        copia.nombres = list(self.nombres)
+        copia.hileras = list(self.hileras)
+        for nombre in COLUMNAS:
+            columna = getattr(self, nombre)
+            setattr(copia, nombre, [columna[pista][:n] for pista, n in enumerate(tramos)])
+        return copia
+
+    def tramos(self, pista):
+        """Recorre los tramos de una pista como tuplas (inicio, fin, tipo, desde, hasta, orden)"""
+        return zip(
+            self.inicios[pista], self.fines[pista], self.tipos[pista],
+            self.desdes[pista], self.hastas[pista], self.ordenes[pista],
+        )
+
+    def accion(self, pista, j, segundo):
+        """Texto de la acción del tramo j de la pista en un segundo dado"""
+        tipo = self.tipos[pista][j]
+        if tipo == REGAR:
+            return "Regar"
+        if tipo == ESPERAR:
+            return "Esperar"
+        desde = self.desdes[pista][j]
+        avance = segundo - self.inicios[pista][j] + 1
+        if self.hastas[pista][j] > desde:
+            return f"Adelante (H{self.hileras[pista]}P{desde + avance})"
+        return f"Atras (H{self.hileras[pista]}P{desde - avance})"
+
+    def posicion_en(self, pista, segundo):
+        """Posición del dron de la pista al terminar el segundo dado (1 antes de empezar)"""
+        j = bisect_right(self.inicios[pista], segundo) - 1
+        if j < 0:
+            return 1
+        if self.fines[pista][j] <= segundo or self.tipos[pista][j] != MOVER:
+            return self.hastas[pista][j]
+        avance = segundo - self.inicios[pista][j] + 1
+        if self.hastas[pista][j] > self.desdes[pista][j]:
+            return self.desdes[pista][j] + avance
+        return self.desdes[pista][j] - avance
+
+    def acciones_en(self, segundo):
+        """Acciones [(dron, accion), ...] de un segundo, en O(drones log tramos)"""
+        activos = []
+        for pista in range(len(self.nombres)):
+            j = bisect_right(self.inicios[pista], segundo) - 1
+            if j >= 0 and self.fines[pista][j] > segundo:
+                activos.append((self.ordenes[pista][j], pista, j))
+        activos.sort()
+        return [(self.nombres[p], self.accion(p, j, segundo)) for _, p, j in activos]
+
+    def ventana(self, desde=1, hasta=None):
+        """
+        Recorre (segundo, [(dron, accion), ...]) para los segundos con acciones
+        entre desde y hasta (inclusive). Mezcla las pistas con un montículo
+        """
+        pendientes = ColaPrioridad()
+        for pista in range(len(self.nombres)):
+            j = bisect_right(self.fines[pista], desde)  # Primer tramo que termina después de desde
+            if j < len(self.inicios[pista]):
+                pendientes.push((pista, j), self.inicios[pista][j])
+
+        activos = []  # [(orden, pista, j)] en el orden en que se emitieron en el plan
+        segundo = desde
+        while activos or not pendientes.is_empty():
+            if not activos:
+                segundo = max(segundo, pendientes.peek_prioridad())
+            if hasta is not None and segundo > hasta:
+                break
+            nuevos = False
+            while not pendientes.is_empty() and pendientes.peek_prioridad() <= segundo:
+                pista, j = pendientes.pop()
+                activos.append((self.ordenes[pista][j], pista, j))
+                nuevos = True
+                if j + 1 < len(self.inicios[pista]):
+                    pendientes.push((pista, j + 1), self.inicios[pista][j + 1])
+            if nuevos:
+                activos.sort()
+
+            yield segundo, [(self.nombres[p], self.accion(p, j, segundo)) for _, p, j in activos]
+
+            segundo += 1
+            activos = [a for a in activos if self.fines[a[1]][a[2]] > segundo]
+
+    def _cubiertos(self, desde=1, hasta=None):
+        """Recorre los intervalos [inicio, fin) sin solapar con al menos una acción entre desde y hasta"""
+        limite = hasta + 1 if hasta is not None else None
+        intervalos = []
+        for pista in range(len(self.nombres)):
+            for inicio, fin in zip(self.inicios[pista], self.fines[pista]):
+                inicio = max(inicio, desde)
+                if limite is not None:
+                    fin = min(fin, limite)
+                if fin > inicio:
+                    intervalos.append((inicio, fin))
+        intervalos.sort()
+        cubierto = desde
+        for inicio, fin in intervalos:
+            inicio = max(inicio, cubierto)
+            if fin > inicio:
+                yield inicio, fin
+                cubierto = fin
+
+    def contar_segundos(self, desde=1, hasta=None):
+        """Cantidad de segundos con al menos una acción entre desde y hasta (inclusive)"""
+        return sum(fin - inicio for inicio, fin in self._cubiertos(desde, hasta))
+
+    def contar_fuera(self, desde, hasta):
+        """(segundos con acciones antes de desde, segundos con acciones después de hasta), en un recorrido"""
+        antes = despues = 0
+        for inicio, fin in self._cubiertos():
+            antes += max(0, min(fin, desde) - inicio)
+            despues += max(0, fin - max(inicio, hasta + 1))
+        return antes, despues
+
+    def contar_acciones(self):
+        """Cantidad de acciones (dron x segundo) de toda la línea"""
+        return sum(sum(fines) - sum(inicios) for inicios, fines in zip(self.inicios, self.fines))
+
+    def tabla(self, desde=1, hasta=None):
+        """Tabla dron x segundo de la ventana, construida en O(celdas) al pedirla (no se guarda)"""
+        return TablaAcciones(self, desde, hasta)
+
+    def ultimo_segundo(self):
+        """Último segundo en el que algún dron tiene una acción (0 si no hay)"""
+        ultimo = 0
+        for fines in self.fines:
+            if len(fines):
+                ultimo = max(ultimo, fines[-1] - 1)
+        return ultimo
+
+    def tamano_bytes(self):
+        """Memoria aproximada de las columnas de tramos"""
+        total = 0
+        for columna in (self.inicios, self.fines, self.tipos, self.desdes, self.hastas, self.ordenes):
+            for arreglo in columna:
+                total += arreglo.itemsize * len(arreglo)
+        return total
+
+    def __iter__(self):
+        return self.ventana()
+
+    def __len__(self):
+        """Cantidad de segundos con al menos una acción"""
+        if self._segundos is None:
+            self._segundos = self.contar_segundos()
+        return self._segundos
+
+
+# Códigos de celda de TablaAcciones
+SIN_ACCION = 0
+ADELANTE = 1
+ATRAS = 2
+CODIGO_ESPERAR = 3
+CODIGO_REGAR = 4
+
+
+class TablaAcciones:
+    """
+    Tabla de acciones con una columna por dron y una fila por segundo, para
+    la ventana de segundos [desde, hasta]: por pista un array('b') de códigos y
+    un array('i') de posiciones. Se arma en O(celdas de la ventana), así una
+    página de un plan muy largo cuesta lo mismo que la de uno corto
+    """
+    def __init__(self, linea, desde=1, hasta=None):
+        self.nombres = list(linea.nombres)
+        self.hileras = list(linea.hileras)
+        ultimo = linea.ultimo_segundo()
+        if hasta is None or hasta > ultimo:
+            hasta = ultimo
+        desde = max(desde, 1)
+        self.desde = desde
+        self.hasta = hasta
+        n = max(0, hasta - desde + 1)
+
+        self.codigos = []
+        self.posiciones = []
+        ocupado = bytearray(n)  # ocupado[s - desde] == 1 si algún dron actúa en el segundo s
+        for pista in range(len(self.nombres)):
+            codigos = array('b', [SIN_ACCION]) * n
+            posiciones = array('i', [0]) * n
+            inicios = linea.inicios[pista]
+            j = bisect_right(linea.fines[pista], desde)  # Primer tramo que termina después de desde
+            while n and j < len(inicios) and inicios[j] <= hasta:
+                inicio = inicios[j]
+                tipo = linea.tipos[pista][j]
+                origen = linea.desdes[pista][j]
+                a = max(inicio, desde)
+                b = min(linea.fines[pista][j], hasta + 1)
+                if tipo == MOVER:
+                    paso = 1 if linea.hastas[pista][j] > origen else -1
+                    codigo = ADELANTE if paso == 1 else ATRAS
+                    for segundo in range(a, b):
+                        codigos[segundo - desde] = codigo
+                        posiciones[segundo - desde] = origen + paso * (segundo - inicio + 1)
+                else:
+                    codigo = CODIGO_REGAR if tipo == REGAR else CODIGO_ESPERAR
+                    for segundo in range(a, b):
+                        codigos[segundo - desde] = codigo
+                        posiciones[segundo - desde] = origen
+                ocupado[a - desde:b - desde] = b"\x01" * (b - a)
+                j += 1
+            self.codigos.append(codigos)
+            self.posiciones.append(posiciones)
+        self.segundos = array('i', (desde + i for i in range(n) if ocupado[i]))
+
+    def celda(self, pista, segundo):
+        """Texto de la celda (dron, segundo); '-' si el dron no actúa"""
+        codigo = self.codigos[pista][segundo - self.desde]
+        if codigo == SIN_ACCION:
+            return "-"
+        if codigo == CODIGO_REGAR:
+            return "Regar"
+        if codigo == CODIGO_ESPERAR:
+            return "Esperar"
+        direccion = "Adelante" if codigo == ADELANTE else "Atras"
+        return f"{direccion} (H{self.hileras[pista]}P{self.posiciones[pista][segundo - self.desde]})"
+
+    def filas(self):
+        """Recorre (segundo, [celda por dron]) para los segundos con acciones"""
+        pistas = range(len(self.nombres))
+        for segundo in self.segundos:
+            yield segundo, [self.celda(pista, segundo) for pista in pistas]
+
+    def __len__(self):
+        return len(self.segundos)
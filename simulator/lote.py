@@ -0,0 +1,155 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Invernaderos y motor de cada proceso trabajador (se envían una sola vez)
+_invernaderos_trabajador = None
+_motor_trabajador = None
+
+
+def _iniciar_trabajador(invernaderos, motor=None):
+    global _invernaderos_trabajador, _motor_trabajador
+    _invernaderos_trabajador = invernaderos
+    _motor_trabajador = motor
+
+
+def _simular_en_trabajador(tarea):
+    """Simula un plan dentro de un proceso trabajador"""
+    indice_inv, plan_nombre = tarea
+    resultado = _invernaderos_trabajador[indice_inv].simular_plan(plan_nombre, _motor_trabajador)
+    if resultado is not None:
+        # El invernadero ya existe en el proceso principal: no devolver la copia
+        del resultado["invernadero"]
+    return resultado
+
+
+def _simular_desde_fuente(tarea):
+    """
+    Simula un plan en un proceso del pool compartido: el invernadero se
+    carga aquí a partir de la fuente (funcion, argumentos), que devuelve la
+    colección de invernaderos en este proceso
+    """
+    (funcion, argumentos), posicion, plan_nombre, motor = tarea
+    resultado = funcion(*argumentos).obtener(posicion).simular_plan(plan_nombre, motor)
+    if resultado is not None:
+        # El invernadero ya existe en el proceso principal: no devolver la copia
+        del resultado["invernadero"]
+    return resultado
+
+
+def tareas_de(invernaderos):
+    """Lista de (indice_invernadero, plan_nombre) en el orden del archivo"""
+    tareas = []
+    for i, inv in enumerate(invernaderos):
+        for plan_nombre, _ in inv.planes.iter():
+            tareas.append((i, plan_nombre))
+    return tareas
+
+
+def tareas_indexadas(invernaderos):
+    """Como tareas_de, pero con los nombres de planes del índice (sin cargar los modelos)"""
+    tareas = []
+    for i, resumen in enumerate(invernaderos.resumenes()):
+        for plan_nombre in resumen.nombres_planes():
+            tareas.append((i, plan_nombre))
+    return tareas
+
+
+def simular_por_invernadero(invernaderos, motor=None):
+    """
+    Recorre (invernadero, resultados) donde resultados es un generador que
+    simula cada plan recién al pedirlo (para escribir salidas en streaming)
+    """
+    for inv in invernaderos.iter() if hasattr(invernaderos, "iter") else invernaderos:
+        nombres = [plan_nombre for plan_nombre, _ in inv.planes.iter()]
+        yield inv, (inv.simular_plan(plan_nombre, motor) for plan_nombre in nombres)
+
+
+def simular_todos(invernaderos, workers=None, modo="procesos", motor=None, ejecutor=None, fuente=None):
+    """
+    Simula todos los planes de todos los invernaderos (una lista o una
+    colección indexada con resumenes() y obtener(), cuyos modelos se cargan
+    al simularlos).
+    modo: "procesos" (ProcessPoolExecutor), "hilos" (ThreadPoolExecutor; la
+    simulación no modifica el modelo) o "secuencial".
+    motor: nombre del motor de simulación (ver simulator.motores).
+    ejecutor y fuente: pool de procesos ya creado (se reutiliza entre
+    llamadas) y (funcion, argumentos) picklable con la que cada proceso
+    obtiene la colección indexada; así cada invernadero se carga en el
+    proceso que lo simula. Sin ellos se crea un pool para esta llamada.
+    Devuelve los resultados en el orden de entrada: invernadero por invernadero,
+    plan por plan
+    """
+    workers = workers or os.cpu_count() or 1
+    if hasattr(invernaderos, "resumenes"):
+        # Colección indexada: los modelos se cargan al simular cada uno
+        tareas = tareas_indexadas(invernaderos)
+        modelo = invernaderos.obtener
+    else:
+        invernaderos = list(invernaderos)
+        tareas = tareas_de(invernaderos)
+        modelo = invernaderos.__getitem__
+
+    if modo == "secuencial" or workers == 1 or len(tareas) <= 1:
+        return [modelo(i).simular_plan(plan, motor) for i, plan in tareas]
+
+    if modo == "hilos":
+        with ThreadPoolExecutor(max_workers=workers) as hilos:
+            return list(hilos.map(lambda t: modelo(t[0]).simular_plan(t[1], motor), tareas))
+
+    if modo != "procesos":
+        raise ValueError(f"Modo de simulación desconocido: {modo}")
+
+    # Lotes de tareas por envío para no pagar un viaje entre procesos por plan
+    tamano_lote = max(1, len(tareas) // (workers * 4))
+    if ejecutor is not None and fuente is not None:
+        resultados = list(
+            ejecutor.map(
+                _simular_desde_fuente,
+                [(fuente, i, plan, motor) for i, plan in tareas],
+                chunksize=tamano_lote,
+            )
+        )
+    else:
+        if not isinstance(invernaderos, list):
+            invernaderos = list(invernaderos.iter())
+            modelo = invernaderos.__getitem__
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_iniciar_trabajador,
+            initargs=(invernaderos, motor),
+        ) as procesos:
+            resultados = list(procesos.map(_simular_en_trabajador, tareas, chunksize=tamano_lote))
+
+    for (i, _), resultado in zip(tareas, resultados):
+        if resultado is not None:
+            # Llegan en orden: cada modelo se carga (o se busca) una sola vez
+            resultado["invernadero"] = modelo(i)
+    return resultados
+
+
+def main(argv=None):
+    """Uso: python -m simulator.lote entrada.xml [workers] [procesos|hilos|secuencial]"""
+    from parsers.xml_parser import XMLParser
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(main.__doc__)
+        return 1
+    parser = XMLParser(argv[0])
+    parser.parse()
+    workers = int(argv[1]) if len(argv) > 1 else None
+    modo = argv[2] if len(argv) > 2 else "procesos"
+    for resultado in simular_todos(parser.invernaderos, workers, modo):
+        if resultado is None:
+            continue
+        estado = resultado["estado"]
+        print(
+            f"{resultado['invernadero'].nombre} - {resultado['plan_nombre']}: "
+            f"{resultado['tiempo_optimo']} s, {estado.total_litros()} L, {estado.total_gramos()} g"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
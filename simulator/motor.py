@@ -0,0 +1,306 @@
+from array import array
+from bisect import bisect_right
+from simulator.linea_tiempo import LineaTiempo, MOVER, ESPERAR, REGAR
+
+
+class PuntoControl:
+    """Copia del estado del motor justo antes de ejecutar la entrada `indice` del plan"""
+    def __init__(self, estado, indice, tramos):
+        self.indice = indice
+        self.instrucciones = estado.instrucciones
+        self.segundos_espera = estado.segundos_espera
+        self.fin_riego = estado.fin_riego  # Todos los riegos anteriores terminaron antes de este segundo
+        self.posiciones = list(estado.posiciones)
+        self.litros = list(estado.litros)
+        self.gramos = list(estado.gramos)
+        self.disponible = dict(estado.disponible)
+        self.tramos = tramos  # Cantidad de tramos de cada pista en ese momento
+
+    def a_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def desde_dict(cls, datos):
+        punto = cls.__new__(cls)
+        vars(punto).update(datos)
+        return punto
+
+
+class EstadoSimulacion:
+    """
+    Estado propio de una corrida: posición y totales de cada dron, relojes y
+    avance del plan. El Invernadero no se modifica, así varias simulaciones
+    pueden compartirlo en paralelo
+    """
+    # Lo que se guarda de un estado (a_dict); las columnas array('i') aparte
+    CAMPOS = (
+        "nombres", "hileras", "posiciones", "litros", "gramos", "disponible",
+        "fin_riego", "instrucciones", "segundos_espera", "indice",
+    )
+    COLUMNAS = ("segundos_control", "indices_control")
+
+    def __init__(self, invernadero=None):
+        self.nombres = []  # Por pista (mismo orden que invernadero.drones)
+        self.hileras = []
+        self.posiciones = []
+        self.litros = []
+        self.gramos = []
+        self.disponible = {}  # Cuándo estará libre cada dron (por nombre)
+        self.fin_riego = 0  # Cuándo se podrá regar nuevamente (1 riego a la vez)
+        self.instrucciones = 0  # Instrucciones del plan ya ejecutadas
+        self.segundos_espera = 0  # Segundos que los drones esperaron turno para regar
+        self.indice = 0  # Siguiente entrada del plan a procesar
+        self.puntos_control = []  # PuntoControl cada MotorEventos.intervalo_control entradas
+        self.segundos_control = array('i')  # fin_riego de cada punto (no decrece)
+        self.indices_control = array('i')  # Entrada del plan de cada punto (crece)
+        for dron in invernadero.drones.iter() if invernadero is not None else ():
+            self.nombres.append(dron.nombre)
+            self.hileras.append(dron.hilera)
+            self.posiciones.append(1)  # Todos inician en posición 1
+            self.litros.append(0)
+            self.gramos.append(0)
+            self.disponible[dron.nombre] = 1
+
+    def a_dict(self):
+        datos = {campo: getattr(self, campo) for campo in self.CAMPOS}
+        for campo in self.COLUMNAS:
+            datos[campo] = getattr(self, campo).tolist()
+        datos["puntos_control"] = [punto.a_dict() for punto in self.puntos_control]
+        return datos
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Estado guardado con a_dict (sin invernadero: los drones vienen en los datos)"""
+        estado = cls()
+        for campo in cls.CAMPOS:
+            setattr(estado, campo, datos[campo])
+        for campo in cls.COLUMNAS:
+            setattr(estado, campo, array('i', datos[campo]))
+        estado.puntos_control = [PuntoControl.desde_dict(punto) for punto in datos["puntos_control"]]
+        return estado
+
+    def guardar_punto(self, tramos):
+        """Registra un punto de control antes de la entrada actual del plan"""
+        self.puntos_control.append(PuntoControl(self, self.indice, tramos))
+        self.segundos_control.append(self.fin_riego)
+        self.indices_control.append(self.indice)
+
+    def punto_en_segundo(self, segundo):
+        """Último punto de control cuyos riegos previos terminaron hasta `segundo`, en O(log n)"""
+        i = bisect_right(self.segundos_control, segundo + 1) - 1
+        return self.puntos_control[i] if i >= 0 else None
+
+    def punto_en_indice(self, indice):
+        """Último punto de control tomado antes de la entrada indice del plan (o None), en O(log n)"""
+        i = bisect_right(self.indices_control, indice) - 1
+        return i if i >= 0 else None
+
+    def restaurar(self, punto):
+        """Vuelve este estado al de un punto de control"""
+        self.indice = punto.indice
+        self.instrucciones = punto.instrucciones
+        self.segundos_espera = punto.segundos_espera
+        self.fin_riego = punto.fin_riego
+        self.posiciones = list(punto.posiciones)
+        self.litros = list(punto.litros)
+        self.gramos = list(punto.gramos)
+        self.disponible = dict(punto.disponible)
+
+    def tiempo_optimo(self):
+        return max(self.disponible.values()) if self.disponible else 0
+
+    def eficiencia(self):
+        """Recorre (nombre_dron, litros, gramos) en el orden de los drones"""
+        return zip(self.nombres, self.litros, self.gramos)
+
+    def total_litros(self):
+        return sum(self.litros)
+
+    def total_gramos(self):
+        return sum(self.gramos)
+
+
+class MotorEventos:
+    """
+    Motor de simulación por eventos discretos.
+    Por cada instrucción del plan calcula un tramo de movimiento, uno de espera
+    y uno de riego en la línea de tiempo, sin recorrer segundo a segundo.
+    Cada intervalo_control entradas del plan guarda un punto de control para
+    consultar el estado en un segundo t sin volver a simular desde el inicio
+    """
+    def __init__(self, regresar_inicio=False, intervalo_control=256, progreso=None):
+        self.regresar_inicio = regresar_inicio  # Los drones vuelven a la posición 1 al terminar
+        self.intervalo_control = intervalo_control
+        self.progreso = progreso  # progreso(entradas_simuladas, entradas_totales) en cada punto de control
+
+    def simular(self, invernadero, plan):
+        """
+        Ejecuta el plan sobre el invernadero siguiendo las reglas:
+        1. Los drones demoran 1 segundo en moverse 1 metro
+        2. Los drones demoran 1 segundo en regar
+        3. Solo 1 dron puede regar a la vez
+        4. Se debe seguir el orden del plan
+        Devuelve (linea_tiempo, estado) sin modificar el invernadero
+        """
+        linea = LineaTiempo()
+        estado = EstadoSimulacion(invernadero)
+        for dron in invernadero.drones.iter():
+            linea.agregar_pista(dron.nombre, dron.hilera)
+
+        self._ejecutar(invernadero, plan, estado, linea)
+        if self.regresar_inicio:
+            self._regresar(estado, linea)
+        if self.progreso:
+            self.progreso(len(plan), len(plan))
+        return linea, estado
+
+    def resimular(self, invernadero, plan, linea, estado, desde_indice):
+        """
+        Simula de nuevo un plan cuyas entradas cambiaron a partir de desde_indice
+        (los drones y plantas deben ser los mismos). Copia la línea de tiempo y
+        los puntos de control hasta el último punto anterior al cambio y
+        continúa desde ahí: el resultado es idéntico al de simular(). No modifica
+        linea ni estado
+        """
+        i = estado.punto_en_indice(desde_indice)
+        if i is None:
+            return self.simular(invernadero, plan)
+
+        punto = estado.puntos_control[i]
+        nueva_linea = linea.prefijo(punto.tramos)
+        nuevo_estado = EstadoSimulacion(invernadero)
+        # El punto i se vuelve a registrar al retomar la simulación desde él
+        nuevo_estado.puntos_control = estado.puntos_control[:i]
+        nuevo_estado.segundos_control = estado.segundos_control[:i]
+        nuevo_estado.indices_control = estado.indices_control[:i]
+        nuevo_estado.restaurar(punto)
+
+        self._ejecutar(invernadero, plan, nuevo_estado, nueva_linea)
+        if self.regresar_inicio:
+            self._regresar(nuevo_estado, nueva_linea)
+        if self.progreso:
+            self.progreso(len(plan), len(plan))
+        return nueva_linea, nuevo_estado
+
+    def _pistas(self, invernadero):
+        """Pista de cada dron en la línea de tiempo y en el estado"""
+        pistas = {}
+        for pista, dron in enumerate(invernadero.drones.iter()):
+            pistas[dron] = pista
+        return pistas
+
+    def _despachar(self, invernadero, plan, desde, hasta, pistas, rutas):
+        """
+        Resuelve las entradas [desde, hasta) del plan a (pista, indice,
+        posicion, fila), en el orden del plan. El dron y las plantas de cada
+        hilera se buscan una sola vez por corrida (rutas: hilera -> (pista,
+        {posicion: fila})); las entradas sin dron o sin planta se omiten
+        """
+        turnos = []
+        hileras = plan.hileras
+        posiciones = plan.posiciones
+        for indice in range(desde, hasta):
+            hilera = hileras[indice]
+            ruta = rutas.get(hilera)
+            if ruta is None:
+                dron = invernadero.buscar_dron_por_hilera(hilera)
+                ruta = rutas[hilera] = (pistas[dron] if dron else None, {})
+            pista, filas = ruta
+            if pista is None:
+                continue
+            posicion = posiciones[indice]
+            if posicion in filas:
+                fila = filas[posicion]
+            else:
+                fila = filas[posicion] = invernadero.fila_planta(hilera, posicion)
+            if fila is None:
+                continue
+            turnos.append((pista, indice, posicion, fila))
+        return turnos
+
+    def _ejecutar(self, invernadero, plan, estado, linea, hasta_segundo=None):
+        """
+        Ejecuta el plan desde estado.indice. Si linea es None solo avanza el
+        estado (repetición desde un punto de control) y se detiene en la primera
+        instrucción que riega después de hasta_segundo.
+        El plan se procesa por bloques entre puntos de control: cada bloque se
+        resuelve a pistas y plantas de una vez y luego se riega en el orden
+        del plan
+        """
+        pistas = self._pistas(invernadero)
+        nombres = estado.nombres
+        disponible = estado.disponible
+        posiciones = estado.posiciones
+        litros = invernadero.plantas.litros
+        gramos = invernadero.plantas.gramos
+        intervalo = self.intervalo_control
+        rutas = {}
+        total = len(plan)
+        orden = estado.instrucciones
+        indice = estado.indice
+        while indice < total:
+            if linea is not None and indice % intervalo == 0:
+                estado.indice = indice
+                estado.instrucciones = orden
+                estado.guardar_punto([len(inicios) for inicios in linea.inicios])
+                if self.progreso:
+                    self.progreso(indice, total)
+
+            fin = min(total, (indice // intervalo + 1) * intervalo)
+            for pista, entrada, posicion, fila in self._despachar(invernadero, plan, indice, fin, pistas, rutas):
+                inicio = disponible[nombres[pista]]
+                llegada = inicio + abs(posiciones[pista] - posicion)
+                inicio_riego = max(llegada, estado.fin_riego)
+                if hasta_segundo is not None and inicio_riego > hasta_segundo:
+                    estado.indice = entrada
+                    estado.instrucciones = orden
+                    return
+                estado.segundos_espera += inicio_riego - llegada
+
+                if linea is not None:
+                    if llegada > inicio:
+                        linea.agregar_tramo(pista, inicio, llegada, MOVER, posiciones[pista], posicion, orden)
+                    if inicio_riego > llegada:
+                        linea.agregar_tramo(pista, llegada, inicio_riego, ESPERAR, posicion, posicion, orden)
+                    linea.agregar_tramo(pista, inicio_riego, inicio_riego + 1, REGAR, posicion, posicion, orden)
+
+                posiciones[pista] = posicion
+                estado.litros[pista] += litros[fila]
+                estado.gramos[pista] += gramos[fila]
+                disponible[nombres[pista]] = inicio_riego + 1
+                estado.fin_riego = inicio_riego + 1
+                orden += 1
+            indice = fin
+        estado.indice = total
+        estado.instrucciones = orden
+
+    def _regresar(self, estado, linea):
+        """Agrega el regreso de cada dron a la posición 1"""
+        disponible = estado.disponible
+        posiciones = estado.posiciones
+        orden = estado.instrucciones
+        for pista, nombre in enumerate(estado.nombres):
+            if posiciones[pista] != 1:
+                inicio = disponible[nombre]
+                fin = inicio + posiciones[pista] - 1
+                linea.agregar_tramo(pista, inicio, fin, MOVER, posiciones[pista], 1, orden)
+                disponible[nombre] = fin
+                posiciones[pista] = 1
+                orden += 1
+
+    def estado_en(self, invernadero, plan, linea, estado, segundo):
+        """
+        Estado al terminar el segundo dado: busca el punto de control previo
+        (búsqueda binaria) y repite a lo sumo intervalo_control entradas del plan.
+        Las posiciones salen de la línea de tiempo, así son exactas también a
+        mitad de un movimiento. Devuelve un EstadoSimulacion con .segundo
+        """
+        consulta = EstadoSimulacion(invernadero)
+        punto = estado.punto_en_segundo(segundo)
+        if punto is not None:  # Sin puntos el plan está vacío: vale el estado inicial
+            consulta.restaurar(punto)
+        self._ejecutar(invernadero, plan, consulta, None, hasta_segundo=segundo)
+        for pista in range(len(consulta.posiciones)):
+            consulta.posiciones[pista] = linea.posicion_en(pista, segundo)
+        consulta.segundo = segundo
+        return consulta
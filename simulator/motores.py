@@ -0,0 +1,19 @@
+from simulator.motor import MotorEventos
+from simulator.referencia import MotorReferencia
+from simulator.vectorial import MotorVectorial
+
+# Motores de simulación disponibles; todos exponen simular(invernadero, plan) -> (linea_tiempo, estado)
+MOTORES = {
+    "eventos": MotorEventos,  # Por eventos: un tramo por movimiento, espera y riego
+    "referencia": MotorReferencia,  # Segundo a segundo, para comparar resultados
+    "vectorial": MotorVectorial,  # Por eventos con NumPy en planes largos (sin NumPy, igual a "eventos")
+}
+MOTOR_PREDETERMINADO = "eventos"
+
+
+def crear_motor(nombre=None, regresar_inicio=False, progreso=None):
+    """Crea el motor con ese nombre (o el predeterminado); ValueError si no existe"""
+    nombre = nombre or MOTOR_PREDETERMINADO
+    if nombre not in MOTORES:
+        raise ValueError(f"Motor de simulación desconocido: {nombre}")
+    return MOTORES[nombre](regresar_inicio=regresar_inicio, progreso=progreso)
@@ -0,0 +1,127 @@
+from simulator.linea_tiempo import LineaTiempo, MOVER, ESPERAR, REGAR
+from models.tda import Cola
+from simulator.motor import EstadoSimulacion
+
+
+class MotorReferencia:
+    """
+    Motor de referencia: avanza segundo a segundo aplicando las reglas tal
+    cual están escritas. Es lento (segundos x drones) pero fácil de revisar;
+    sirve para comparar contra MotorEventos (ver simulator.diferencial)
+    """
+    def __init__(self, regresar_inicio=False, progreso=None):
+        self.regresar_inicio = regresar_inicio  # Los drones vuelven a la posición 1 al terminar
+        self.progreso = progreso  # progreso(entradas_simuladas, entradas_totales) al terminar
+
+    def simular(self, invernadero, plan):
+        """
+        Ejecuta el plan sobre el invernadero siguiendo las reglas:
+        1. Los drones demoran 1 segundo en moverse 1 metro
+        2. Los drones demoran 1 segundo en regar
+        3. Solo 1 dron puede regar a la vez
+        4. Se debe seguir el orden del plan
+        Devuelve (linea_tiempo, estado) sin modificar el invernadero
+        """
+        return self._correr(invernadero, plan)
+
+    def estado_en(self, invernadero, plan, linea, estado, segundo):
+        """
+        Estado al terminar el segundo dado (como MotorEventos.estado_en). Sin
+        puntos de control repite el plan segundo a segundo desde el inicio
+        """
+        _, consulta = self._correr(invernadero, plan, hasta_segundo=segundo)
+        # Las posiciones salen de la línea del resultado (incluye el regreso a la posición 1)
+        for pista in range(len(consulta.posiciones)):
+            consulta.posiciones[pista] = linea.posicion_en(pista, segundo)
+        consulta.segundo = segundo
+        return consulta
+
+    def _correr(self, invernadero, plan, hasta_segundo=None):
+        """simular() hasta terminar o, con hasta_segundo, hasta ese segundo inclusive"""
+        linea = LineaTiempo()
+        estado = EstadoSimulacion(invernadero)
+        pistas = {}
+        for dron in invernadero.drones.iter():
+            pistas[dron] = linea.agregar_pista(dron.nombre, dron.hilera)
+
+        # Instrucciones (orden, posicion, fila de la planta) de cada dron, en el orden del plan
+        colas = [Cola() for _ in estado.nombres]
+        ultima = [1] * len(colas)  # Posición de la última instrucción de cada dron
+        entradas = []  # Entrada del plan de cada orden
+        orden = 0
+        for indice, (hilera, posicion) in enumerate(plan.pares()):
+            dron = invernadero.buscar_dron_por_hilera(hilera)
+            fila = invernadero.fila_planta(hilera, posicion)
+            if not dron or fila is None:
+                continue
+            colas[pistas[dron]].enqueue((orden, posicion, fila))
+            ultima[pistas[dron]] = posicion
+            entradas.append(indice)
+            orden += 1
+        estado.instrucciones = orden
+        estado.indice = len(plan)
+
+        # El regreso a la posición 1 va después de todas las instrucciones
+        orden_regreso = {}
+        if self.regresar_inicio:
+            for pista, cola in enumerate(colas):
+                if not cola.is_empty() and ultima[pista] != 1:
+                    orden_regreso[pista] = orden
+                    orden += 1
+
+        turno = 0  # Orden de la instrucción a la que le toca regar
+        posiciones = estado.posiciones
+        esperas = [0] * len(colas)  # Espera de la instrucción en curso; se suma al regar
+        regado_hasta = [1] * len(colas)  # Fin del último riego de cada dron
+        segundo = 1
+        while hasta_segundo is None or segundo <= hasta_segundo:
+            regado = False  # Solo un riego por segundo
+            activo = False
+            for pista, cola in enumerate(colas):
+                posicion = posiciones[pista]
+                if not cola.is_empty():
+                    orden, destino, fila = cola.peek()
+                elif pista in orden_regreso and posicion != 1:
+                    orden, destino, fila = orden_regreso[pista], 1, None
+                else:
+                    continue
+
+                if posicion != destino:
+                    paso = 1 if destino > posicion else -1
+                    linea.agregar_tramo(pista, segundo, segundo + 1, MOVER, posicion, posicion + paso, orden)
+                    posiciones[pista] = posicion + paso
+                elif orden == turno and not regado:
+                    linea.agregar_tramo(pista, segundo, segundo + 1, REGAR, posicion, posicion, orden)
+                    estado.litros[pista] += invernadero.plantas.litros[fila]
+                    estado.gramos[pista] += invernadero.plantas.gramos[fila]
+                    estado.fin_riego = segundo + 1
+                    estado.segundos_espera += esperas[pista]
+                    esperas[pista] = 0
+                    regado_hasta[pista] = segundo + 1
+                    cola.dequeue()
+                    turno += 1
+                    regado = True
+                else:
+                    linea.agregar_tramo(pista, segundo, segundo + 1, ESPERAR, posicion, posicion, orden)
+                    esperas[pista] += 1
+                estado.disponible[estado.nombres[pista]] = segundo + 1
+                activo = True
+
+            if not activo:
+                break
+            segundo += 1
+        else:
+            # Cortado en hasta_segundo: el estado queda antes del siguiente riego
+            estado.instrucciones = turno
+            estado.indice = entradas[turno] if turno < len(entradas) else len(plan)
+            for pista, nombre in enumerate(estado.nombres):
+                estado.disponible[nombre] = regado_hasta[pista]
+            return linea, estado
+
+        if self.progreso:
+            self.progreso(len(plan), len(plan))
+        return linea, estado
+
+    def resimular(self, invernadero, plan, linea, estado, desde_indice):
+        """Sin puntos de control no hay prefijo que reutilizar: simula todo el plan de nuevo"""
+        return self.simular(invernadero, plan)
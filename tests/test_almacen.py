@@ -0,0 +1,140 @@
+import io
+import os
+import random
+import re
+import shutil
+
+import pytest
+
+from app import create_app
+from parsers.indice_xml import indexar
+from services.almacen import AlmacenCompartido, resultado_a_json, resultado_desde_json
+from simulator.diferencial import firma, invernadero_aleatorio
+
+ENTRADA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "entrada.xml")
+INVERNADERO = "Invernadero Santa Rosa"
+PLAN = "Semana 1"
+HASH = "ab" * 32
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    # Copia del XML: las instantáneas de los invernaderos quedan junto a él
+    ruta = shutil.copy(ENTRADA, str(tmp_path / "entrada.xml"))
+    almacen = AlmacenCompartido(str(tmp_path / "almacen.db"))
+    almacen.guardar_configuracion(HASH, ruta, indexar(ruta), "entrada.xml")
+    return almacen
+
+
+def editar(almacen, carga, instruccion=(1, 1)):
+    """Agrega una instrucción al plan en la carga, como /editar_plan"""
+    config = almacen.configuracion(carga)
+    invernadero = config["invernaderos"].buscar(INVERNADERO)
+    editado, _ = invernadero.editar_plan(PLAN, "agregar", *instruccion)
+    return almacen.guardar_invernadero(carga, editado, config["ediciones"].get(INVERNADERO, 0))
+
+
+def tiempo(almacen, carga):
+    config = almacen.configuracion(carga)
+    return config["invernaderos"].buscar(INVERNADERO).simular_plan(PLAN)["tiempo_optimo"]
+
+
+def test_ediciones_por_carga(almacen):
+    a = almacen.crear_carga(HASH)
+    b = almacen.crear_carga(HASH)
+    assert editar(almacen, a) == 1
+    assert tiempo(almacen, a) == 9
+    assert tiempo(almacen, b) == 7
+
+    # Volver a subir el mismo archivo no borra las ediciones de otra carga
+    ruta = almacen.configuracion(a)["invernaderos"].base.ruta_xml
+    almacen.guardar_configuracion(HASH, ruta, indexar(ruta), "entrada.xml")
+    c = almacen.crear_carga(HASH)
+    assert tiempo(almacen, a) == 9
+    assert tiempo(almacen, c) == 7
+
+
+def test_edicion_concurrente(almacen):
+    carga = almacen.crear_carga(HASH)
+    config = almacen.configuracion(carga)
+    invernadero = config["invernaderos"].buscar(INVERNADERO)
+    primero, _ = invernadero.editar_plan(PLAN, "agregar", 1, 1)
+    segundo, _ = invernadero.editar_plan(PLAN, "agregar", 2, 1)
+    assert almacen.guardar_invernadero(carga, primero, 0) == 1
+    # Partió del mismo modelo que la primera: no la pisa
+    assert almacen.guardar_invernadero(carga, segundo, 0) is None
+    assert almacen.configuracion(carga)["ediciones"] == {INVERNADERO: 1}
+    assert tiempo(almacen, carga) == 9
+
+
+def test_carga_inexistente(almacen):
+    assert almacen.crear_carga("cd" * 32) is None
+    assert almacen.configuracion("no-existe") is None
+    invernadero = almacen.configuracion_original(HASH)["invernaderos"].buscar(INVERNADERO)
+    assert almacen.guardar_invernadero("no-existe", invernadero) is None
+
+
+def test_resultados_compartidos_sin_ediciones(almacen):
+    a = almacen.crear_carga(HASH)
+    b = almacen.crear_carga(HASH)
+    config_a = almacen.configuracion(a)
+    resultado = config_a["invernaderos"].buscar(INVERNADERO).simular_plan(PLAN)
+    resultado_id = almacen.guardar_resultado(config_a, resultado)
+    assert almacen.cargar_resultado(almacen.configuracion(b), INVERNADERO, PLAN)["tiempo_optimo"] == 7
+
+    editar(almacen, a)
+    assert almacen.cargar_resultado(almacen.configuracion(a), INVERNADERO, PLAN) is None
+    assert almacen.buscar_resultado(resultado_id) == (HASH, "", INVERNADERO, PLAN)
+
+
+@pytest.mark.parametrize("motor", ["eventos", "referencia", "vectorial"])
+def test_resultado_json(motor):
+    azar = random.Random(18)
+    for caso in range(5):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}", 600)
+        for plan_nombre, _ in inv.planes.iter():
+            resultado = inv.simular_plan(plan_nombre, motor, regresar_inicio=caso % 2 == 1)
+            leido = resultado_desde_json(resultado_a_json(resultado))
+            leido["invernadero"] = inv
+            assert firma(leido, con_puntos=True) == firma(resultado, con_puntos=True)
+            # Lo leído sirve para retomar la simulación y para consultar el estado en t
+            assert firma(inv.resimular_plan(leido, 400, motor)) == firma(inv.simular_plan(plan_nombre, motor))
+            segundo = resultado["tiempo_optimo"] // 2
+            assert vars(inv.estado_en(leido, segundo, motor)) == vars(inv.estado_en(resultado, segundo, motor))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+def subir(cliente):
+    with open(ENTRADA, "rb") as archivo:
+        datos = archivo.read()
+    respuesta = cliente.post(
+        "/upload", data={"file": (io.BytesIO(datos), "entrada.xml")}, content_type="multipart/form-data"
+    )
+    assert respuesta.status_code == 200
+
+
+def tiempo_reporte(respuesta):
+    return int(re.search(r"Tiempo Óptimo de Riego: (\d+) segundos", respuesta.get_data(as_text=True)).group(1))
+
+
+def test_sesiones_no_comparten_ediciones(app):
+    a = app.test_client()
+    b = app.test_client()
+    subir(a)
+    subir(b)
+    formulario = {"invernadero": INVERNADERO, "plan": PLAN}
+
+    editado = a.post("/editar_plan", data={**formulario, "accion": "agregar", "instruccion": "H1-P1"})
+    assert tiempo_reporte(editado) == 9
+    assert tiempo_reporte(b.post("/simulate", data=formulario)) == 7
+
+    subir(b)
+    assert tiempo_reporte(a.post("/simulate", data=formulario)) == 9
+    assert tiempo_reporte(b.post("/simulate", data=formulario)) == 7
@@ -0,0 +1,130 @@
+import random
+import threading
+
+import pytest
+
+from app import create_app
+from services.cache import CacheResultados, tamano_resultado
+from simulator.diferencial import invernadero_aleatorio
+from test_almacen import INVERNADERO, PLAN, subir, tiempo_reporte
+
+
+@pytest.fixture(scope="module")
+def resultados():
+    """Resultados reales de simulación, de tamaños distintos"""
+    azar = random.Random(10)
+    resultados = []
+    for caso in range(6):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}", 50 * (caso + 1))
+        resultados.append(inv.simular_plan(inv.planes[0][0]))
+    return resultados
+
+
+def test_desaloja_el_menos_usado(resultados):
+    cache = CacheResultados(max_entradas=3)
+    for i in range(3):
+        cache.guardar(i, resultados[i])
+    assert cache.obtener(0) is resultados[0]  # 0 pasa a ser el más reciente
+    cache.guardar(3, resultados[3])
+    assert 1 not in cache
+    assert [clave for clave in (0, 2, 3) if clave in cache] == [0, 2, 3]
+
+    # Reemplazar una clave no cuenta como entrada nueva
+    cache.guardar(2, resultados[4])
+    assert len(cache) == 3
+    assert cache.obtener(2) is resultados[4]
+    estadisticas = cache.estadisticas()
+    assert estadisticas["desalojos"] == 1
+    assert estadisticas["bytes"] == sum(tamano_resultado(resultados[i]) for i in (0, 4, 3))
+
+
+def test_limite_de_memoria(resultados):
+    resultado = resultados[-1]
+    tamano = tamano_resultado(resultado)
+    cache = CacheResultados(max_bytes=2 * tamano + tamano // 2)  # Caben dos
+    cache.guardar("a", resultado)
+    cache.guardar("b", resultado)
+    cache.obtener("a")
+    cache.guardar("c", resultado)
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.estadisticas()["bytes"] == 2 * tamano
+
+    # Un resultado más grande que todo el límite no se guarda (y no desaloja nada)
+    cache.max_bytes = tamano - 1
+    cache.guardar("d", resultado)
+    assert "d" not in cache
+    assert len(cache) == 2
+
+
+def test_obtener_o_calcular(resultados):
+    cache = CacheResultados()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return resultados[0]
+
+    assert cache.obtener_o_calcular("a", calcular) is resultados[0]
+    assert cache.obtener_o_calcular("a", calcular) is resultados[0]
+    assert len(llamadas) == 1
+    # Un plan inexistente (None) no se guarda
+    assert cache.obtener_o_calcular("b", lambda: None) is None
+    assert "b" not in cache
+    estadisticas = cache.estadisticas()
+    assert (estadisticas["aciertos"], estadisticas["fallos"]) == (1, 2)
+
+    cache.limpiar()
+    assert len(cache) == 0
+    assert cache.estadisticas()["bytes"] == 0
+    assert "guateriegos_cache_aciertos_total 1" in cache.exportar_metricas()
+
+
+def test_hilos(resultados):
+    cache = CacheResultados(max_entradas=4)
+    errores = []
+
+    def trabajar(semilla):
+        azar = random.Random(semilla)
+        try:
+            for _ in range(300):
+                clave = azar.randint(0, 9)
+                resultado = cache.obtener_o_calcular(clave, lambda: resultados[clave % len(resultados)])
+                assert resultado is resultados[clave % len(resultados)]
+        except AssertionError as error:
+            errores.append(error)
+
+    hilos = [threading.Thread(target=trabajar, args=(semilla,)) for semilla in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert not errores
+    # Los contadores quedan consistentes con lo guardado
+    assert len(cache) <= 4
+    assert cache.estadisticas()["bytes"] == sum(tamano for _, tamano in cache.entradas.values())
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+def test_app_usa_la_cache(app):
+    cliente = app.test_client()
+    subir(cliente)
+    formulario = {"invernadero": INVERNADERO, "plan": PLAN}
+    assert tiempo_reporte(cliente.post("/simulate", data=formulario)) == 7
+    antes = cliente.get("/cache_stats").get_json()
+    assert tiempo_reporte(cliente.post("/simulate", data=formulario)) == 7
+    despues = cliente.get("/cache_stats").get_json()
+    assert despues["aciertos"] > antes["aciertos"]
+    assert despues["entradas"] == antes["entradas"]
+
+    # La edición cambia la clave: no se sirve el resultado anterior
+    editado = cliente.post("/editar_plan", data={**formulario, "accion": "agregar", "instruccion": "H1-P1"})
+    assert tiempo_reporte(editado) == 9
+    assert tiempo_reporte(cliente.post("/simulate", data=formulario)) == 9
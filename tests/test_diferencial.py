@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from simulator.diferencial import comparar, invernadero_aleatorio
+from simulator.vectorial import MotorVectorial
+
+
+def casos(semilla, cantidad, entradas=None):
+    """(invernadero, plan) aleatorios, siempre los mismos para una semilla"""
+    azar = random.Random(semilla)
+    for caso in range(cantidad):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}", entradas)
+        for plan_nombre, _ in inv.planes.iter():
+            yield inv, plan_nombre
+
+
+@pytest.mark.parametrize("regresar_inicio", [False, True])
+def test_referencia_igual_a_eventos(regresar_inicio):
+    for inv, plan_nombre in casos(2024, 150):
+        assert comparar(inv, plan_nombre, "referencia", "eventos", regresar_inicio) == [], (inv.nombre, plan_nombre)
+
+
+@pytest.mark.parametrize("regresar_inicio", [False, True])
+def test_vectorial_igual_a_eventos(regresar_inicio, monkeypatch):
+    pytest.importorskip("numpy")
+
+    # Con planes de al menos minimo_entradas el motor vectorial no debe volver al cálculo por eventos
+    def sin_respaldo(*args, **kwargs):
+        raise AssertionError("MotorVectorial usó el cálculo por eventos")
+
+    monkeypatch.setattr(MotorVectorial, "_ejecutar", sin_respaldo)
+    entradas = MotorVectorial.minimo_entradas
+    for inv, plan_nombre in casos(2025, 12, entradas + 500):
+        diferencias = comparar(inv, plan_nombre, "eventos", "vectorial", regresar_inicio, con_puntos=True)
+        assert diferencias == [], (inv.nombre, plan_nombre)
@@ -0,0 +1,87 @@
+import random
+
+from models.dominio import Dron, Invernadero, Planta, PlanRiego
+from simulator.diferencial import invernadero_aleatorio
+
+
+def planta_lineal(inv, hilera, posicion):
+    """Primera planta en (hilera, posicion) recorriendo todas, como antes del índice"""
+    for planta in inv.plantas.iter():
+        if planta.hilera == hilera and planta.posicion == posicion:
+            return planta
+    return None
+
+
+def dron_lineal(inv, hilera):
+    for dron in inv.drones.iter():
+        if dron.hilera == hilera:
+            return dron
+    return None
+
+
+def plan_lineal(inv, nombre_plan):
+    for nombre, secuencia in inv.planes.iter():
+        if nombre == nombre_plan:
+            return secuencia
+    return None
+
+
+def datos_planta(planta):
+    return None if planta is None else (planta.nombre, planta.hilera, planta.posicion, planta.litros, planta.gramos)
+
+
+def revisar_indices(inv):
+    """Los índices hash dan lo mismo que la búsqueda lineal en todo el rango (y un poco fuera)"""
+    for hilera in range(0, inv.numero_hileras + 2):
+        assert inv.buscar_dron_por_hilera(hilera) is dron_lineal(inv, hilera)
+        for posicion in range(0, inv.plantas_por_hilera + 2):
+            assert datos_planta(inv.buscar_planta(hilera, posicion)) == datos_planta(
+                planta_lineal(inv, hilera, posicion)
+            )
+    for nombre in ["Plan 0", "Plan 1", "Plan 2", "Plan 3", "otro"]:
+        assert inv.buscar_plan(nombre) is plan_lineal(inv, nombre)
+
+
+def test_indices_igual_a_busqueda_lineal():
+    azar = random.Random(1)
+    for caso in range(40):
+        revisar_indices(invernadero_aleatorio(azar, f"Inv {caso}"))
+
+
+def test_duplicados_y_eliminaciones():
+    inv = Invernadero("Dup")
+    inv.numero_hileras = 2
+    inv.plantas_por_hilera = 2
+    primera = Planta("tomate", 1, 1, 1, 100)
+    segunda = Planta("chile", 1, 1, 2, 200)
+    inv.agregar_planta(primera)
+    inv.agregar_planta(Planta("maíz", 2, 2, 3, 300))
+    inv.agregar_planta(segunda)
+    primero = Dron("1", "DR01")
+    primero.hilera = 1
+    otro = Dron("2", "DR02")
+    otro.hilera = 1
+    inv.agregar_dron(primero)
+    inv.agregar_dron(otro)
+    plan_a = PlanRiego("P")
+    plan_b = PlanRiego("P")
+    inv.agregar_plan("P", plan_a)
+    inv.agregar_plan("P", plan_b)
+    # Con duplicados el índice conserva el primero, igual que la búsqueda lineal
+    revisar_indices(inv)
+    assert inv.buscar_planta(1, 1).nombre == "tomate"
+
+    # Al eliminar el primero, el índice pasa al siguiente con la misma clave
+    assert inv.eliminar_planta(primera)
+    assert inv.eliminar_dron(primero)
+    assert inv.eliminar_plan("P")
+    revisar_indices(inv)
+    assert inv.buscar_planta(1, 1).nombre == "chile"
+    assert inv.buscar_planta(2, 2).nombre == "maíz"  # Cambió de fila
+    assert inv.buscar_dron_por_hilera(1) is otro
+    assert inv.buscar_plan("P") is plan_b
+
+    assert inv.eliminar_dron(otro)
+    assert inv.eliminar_plan("P")
+    revisar_indices(inv)
+    assert not inv.eliminar_plan("P")
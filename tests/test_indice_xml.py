@@ -0,0 +1,123 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from benchmarks.generar_entrada import generar_entrada
+from models.tda import ArregloDinamico
+from parsers.indice_xml import IndexadorXML, InvernaderosDiferidos, indexar
+from parsers.instantanea import ruta_instantanea
+from parsers.xml_parser import XMLParser
+from test_xml_parser import ENTRADA, VARIAS_LISTAS, modelo, modelo_invernaderos
+
+
+def archivo(tmp_path, contenido):
+    ruta = tmp_path / "entrada.xml"
+    ruta.write_bytes(contenido)
+    return str(ruta)
+
+
+@pytest.fixture(params=["entrada", "varias_listas"])
+def ruta_xml(request, tmp_path):
+    with open(ENTRADA, "rb") as f:
+        contenido = f.read() if request.param == "entrada" else VARIAS_LISTAS
+    return archivo(tmp_path, contenido)
+
+
+def test_indice_igual_al_parser(ruta_xml):
+    parser = XMLParser(ruta_xml)
+    parser.parse()
+    drones, invernaderos = modelo(parser)
+
+    indice = indexar(ruta_xml)
+    assert indice.drones == drones
+    assert [resumen.nombre for resumen in indice.invernaderos] == [inv[0] for inv in invernaderos]
+    assert [(resumen.numero_hileras, resumen.plantas_por_hilera) for resumen in indice.invernaderos] == [
+        (inv[1], inv[2]) for inv in invernaderos
+    ]
+    assert [resumen.planes for resumen in indice.invernaderos] == [[plan[0] for plan in inv[6]] for inv in invernaderos]
+
+
+def test_diferidos_igual_al_parser(ruta_xml):
+    parser = XMLParser(ruta_xml)
+    parser.parse()
+    esperado = modelo_invernaderos(parser.invernaderos)
+
+    with open(ruta_xml, "rb") as f:
+        origen = hashlib.sha256(f.read()).hexdigest()
+    # Primero desde el XML (deja las instantáneas) y luego desde las instantáneas
+    for _ in range(2):
+        diferidos = InvernaderosDiferidos(ruta_xml, indexar(ruta_xml), origen=origen)
+        assert modelo_invernaderos(diferidos) == esperado
+
+
+def test_indexar_por_bloques_igual_a_una_pasada(ruta_xml):
+    with open(ruta_xml, "rb") as f:
+        contenido = f.read()
+    indexador = IndexadorXML()
+    for inicio in range(0, len(contenido), 7):
+        indexador.alimentar(contenido[inicio:inicio + 7])
+    assert indexador.terminar().a_dict() == indexar(ruta_xml).a_dict()
+
+
+def test_varias_listas_solo_las_primeras(tmp_path):
+    diferidos = InvernaderosDiferidos(archivo(tmp_path, VARIAS_LISTAS), indexar(archivo(tmp_path, VARIAS_LISTAS)))
+    assert [resumen.nombre for resumen in diferidos.resumenes()] == ["A", "B"]
+    assert [(dron.id, dron.nombre, dron.hilera) for dron in diferidos.buscar("A").drones.iter()] == [
+        ("1", "DR01", 1), ("2", "DR02", 2),
+    ]
+    assert diferidos.buscar("C") is None
+
+
+def sintetico(semilla):
+    """Configuración sintética con 12 invernaderos chicos"""
+    texto = io.StringIO()
+    generar_entrada(texto, invernaderos=12, hileras=3, plantas=5, planes=2, instrucciones=30, semilla=semilla)
+    return texto.getvalue().encode("utf-8")
+
+
+def esperado_y_origen(ruta_xml):
+    parser = XMLParser(ruta_xml)
+    parser.parse()
+    with open(ruta_xml, "rb") as f:
+        return modelo_invernaderos(parser.invernaderos), hashlib.sha256(f.read()).hexdigest()
+
+
+def test_carga_diferida_con_limite(tmp_path):
+    ruta = archivo(tmp_path, sintetico(1))
+    esperado, origen = esperado_y_origen(ruta)
+    diferidos = InvernaderosDiferidos(ruta, indexar(ruta), origen=origen, max_modelos=3)
+    nombres = [resumen.nombre for resumen in diferidos.resumenes()]
+    assert len(diferidos) == 12
+    assert all(diferidos.cargado(nombre) is None for nombre in nombres)
+
+    # Solo se construye el invernadero pedido
+    uno = ArregloDinamico()
+    uno.append(diferidos.buscar(nombres[5]))
+    assert modelo_invernaderos(uno) == [esperado[5]]
+    assert [nombre for nombre in nombres if diferidos.cargado(nombre) is not None] == [nombres[5]]
+
+    # Recorrer todos deja en memoria solo los últimos max_modelos
+    assert modelo_invernaderos(diferidos) == esperado
+    assert [nombre for nombre in nombres if diferidos.cargado(nombre) is not None] == nombres[-3:]
+    assert all(os.path.exists(ruta_instantanea(ruta, posicion)) for posicion in range(12))
+
+
+def test_instantaneas_de_otro_xml(tmp_path):
+    ruta = archivo(tmp_path, sintetico(1))
+    _, origen = esperado_y_origen(ruta)
+    assert modelo_invernaderos(InvernaderosDiferidos(ruta, indexar(ruta), origen=origen))
+
+    # Otro contenido en la misma ruta: las instantáneas anteriores no sirven
+    archivo(tmp_path, sintetico(2))
+    esperado, otro_origen = esperado_y_origen(ruta)
+    assert otro_origen != origen
+    assert modelo_invernaderos(InvernaderosDiferidos(ruta, indexar(ruta), origen=otro_origen)) == esperado
+
+
+def test_sin_origen_no_deja_instantaneas(tmp_path):
+    ruta = archivo(tmp_path, sintetico(3))
+    esperado, _ = esperado_y_origen(ruta)
+    assert modelo_invernaderos(InvernaderosDiferidos(ruta, indexar(ruta))) == esperado
+    assert os.listdir(tmp_path) == ["entrada.xml"]
@@ -0,0 +1,116 @@
+import io
+import os
+import random
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from models.dominio import Planta, PlanRiego
+from models.tda import ArregloDinamico
+from parsers.instantanea import (
+    ENCABEZADO, InstantaneaInvalida, cargar_instantanea, deserializar, guardar_instantanea, serializar,
+)
+from parsers.xml_parser import XMLParser
+from simulator.diferencial import firma, invernadero_aleatorio
+from test_xml_parser import ENTRADA, VARIAS_LISTAS, modelo_invernaderos
+
+ORIGEN = "ab" * 32
+
+
+@pytest.fixture(scope="module")
+def invernaderos():
+    parser = XMLParser(ENTRADA)
+    parser.parse()
+    return parser.invernaderos
+
+
+def test_escrituras_simultaneas(invernaderos, tmp_path):
+    ruta = str(tmp_path / "entrada.gri")
+
+    def guardar(_):
+        return guardar_instantanea(invernaderos, ruta, ORIGEN)
+
+    # Cada escritura usa su propio temporal: ninguna pisa el archivo de otra a medias
+    with ThreadPoolExecutor(max_workers=8) as hilos:
+        assert list(hilos.map(guardar, range(64))) == [ruta] * 64
+    assert os.listdir(tmp_path) == ["entrada.gri"]
+    assert modelo_invernaderos(cargar_instantanea(ruta, ORIGEN)) == modelo_invernaderos(invernaderos)
+
+
+def aleatorios(semilla, cantidad):
+    """Invernaderos al azar con nombres no ASCII, plantas sin nombre y planes con errores"""
+    azar = random.Random(semilla)
+    invernaderos = ArregloDinamico()
+    for caso in range(cantidad):
+        inv = invernadero_aleatorio(azar, f"Invernadero ñandú {caso}")
+        inv.agregar_planta(Planta(None, 1, 1, 2, 50))  # Duplicada y sin nombre
+        plan = PlanRiego("Con errores")
+        plan.agregar(1, 1)
+        plan.agregar_error(2, "H0-P1", "hilera fuera de rango")
+        plan.agregar_error(3, "¿?", None)
+        inv.agregar_plan(plan.nombre, plan)
+        invernaderos.append(inv)
+    return invernaderos
+
+
+def test_ida_y_vuelta(invernaderos):
+    for originales in (invernaderos, aleatorios(21, 30), ArregloDinamico()):
+        leidos = deserializar(serializar(originales, ORIGEN), ORIGEN)
+        assert modelo_invernaderos(leidos) == modelo_invernaderos(originales)
+
+    # Los índices se rehacen: lo leído simula igual que lo parseado
+    for original, leido in zip(aleatorios(22, 10).iter(), deserializar(serializar(aleatorios(22, 10))).iter()):
+        assert leido.buscar_planta(1, 1).nombre == original.buscar_planta(1, 1).nombre
+        for plan_nombre, _ in original.planes.iter():
+            assert firma(leido.simular_plan(plan_nombre)) == firma(original.simular_plan(plan_nombre))
+
+
+def test_varias_listas():
+    parser = XMLParser(io.BytesIO(VARIAS_LISTAS))
+    parser.parse()
+    datos = serializar(parser.invernaderos)
+    assert modelo_invernaderos(deserializar(datos)) == modelo_invernaderos(parser.invernaderos)
+
+
+def alterar(datos, posicion):
+    return datos[:posicion] + bytes([datos[posicion] ^ 0xFF]) + datos[posicion + 1:]
+
+
+def test_instantaneas_invalidas(invernaderos):
+    datos = serializar(invernaderos, ORIGEN)
+    otra_version = datos[:4] + struct.pack("<I", 99) + datos[8:]
+    for invalidos, motivo in (
+        (b"", "incompleto"),
+        (datos[:ENCABEZADO.size - 1], "incompleto"),
+        (b"XXXX" + datos[4:], "no es una instantánea"),
+        (otra_version, "versión"),
+        (datos[:-1], "dañado"),
+        (datos + b"\0", "dañado"),
+        (alterar(datos, ENCABEZADO.size + 10), "dañado"),
+        (alterar(datos, len(datos) - 1), "dañado"),
+    ):
+        with pytest.raises(InstantaneaInvalida, match=motivo):
+            deserializar(invalidos, ORIGEN)
+
+    with pytest.raises(InstantaneaInvalida, match="otro XML"):
+        deserializar(datos, "cd" * 32)
+    # Sin origen que comparar se acepta la de cualquier XML
+    assert modelo_invernaderos(deserializar(datos)) == modelo_invernaderos(invernaderos)
+
+
+def test_cargar_descarta_las_viejas(invernaderos, tmp_path):
+    ruta = str(tmp_path / "entrada.1.gri")
+    assert cargar_instantanea(ruta, ORIGEN) is None  # No existe
+
+    guardar_instantanea(invernaderos, ruta, ORIGEN)
+    assert modelo_invernaderos(cargar_instantanea(ruta, ORIGEN)) == modelo_invernaderos(invernaderos)
+    assert cargar_instantanea(ruta, "cd" * 32) is None
+
+    with open(ruta, "r+b") as archivo:
+        archivo.seek(-1, os.SEEK_END)
+        archivo.write(b"\xff")
+    assert cargar_instantanea(ruta, ORIGEN) is None
+
+    open(ruta, "wb").close()  # Vacía (un corte a medias sin reemplazo atómico)
+    assert cargar_instantanea(ruta, ORIGEN) is None
@@ -0,0 +1,141 @@
+import random
+
+import pytest
+
+from simulator.diferencial import invernadero_aleatorio
+from simulator.linea_tiempo import ESPERAR, MOVER, REGAR, LineaTiempo
+
+
+def expandir(linea):
+    """Línea expandida segundo a segundo a la fuerza: {segundo: [(orden, pista, accion, posicion)]}"""
+    segundos = {}
+    for pista in range(len(linea.nombres)):
+        for inicio, fin, tipo, desde, hasta, orden in linea.tramos(pista):
+            for segundo in range(inicio, fin):
+                if tipo == MOVER:
+                    paso = 1 if hasta > desde else -1
+                    posicion = desde + paso * (segundo - inicio + 1)
+                    direccion = "Adelante" if paso == 1 else "Atras"
+                    accion = f"{direccion} (H{linea.hileras[pista]}P{posicion})"
+                else:
+                    posicion = desde
+                    accion = "Regar" if tipo == REGAR else "Esperar"
+                segundos.setdefault(segundo, []).append((orden, pista, accion, posicion))
+    for acciones in segundos.values():
+        acciones.sort()
+    return segundos
+
+
+def acciones(linea, expandida, segundo):
+    return [(linea.nombres[pista], accion) for _, pista, accion, _ in expandida.get(segundo, [])]
+
+
+def lineas(semilla, cantidad):
+    """Líneas de simulaciones al azar, con y sin regreso a la posición 1"""
+    azar = random.Random(semilla)
+    for caso in range(cantidad):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}")
+        for plan_nombre, _ in inv.planes.iter():
+            yield inv.simular_plan(plan_nombre, regresar_inicio=caso % 2 == 1)["linea_tiempo"]
+
+
+def linea_chica():
+    """Dos drones: DR01 va de 1 a 3, riega y regresa; DR02 espera y riega en la posición 2"""
+    linea = LineaTiempo()
+    linea.agregar_pista("DR01", 1)
+    linea.agregar_pista("DR02", 2)
+    linea.agregar_tramo(0, 1, 3, MOVER, 1, 3, 0)
+    linea.agregar_tramo(0, 3, 4, REGAR, 3, 3, 0)
+    linea.agregar_tramo(0, 6, 8, MOVER, 3, 1, 2)
+    linea.agregar_tramo(1, 2, 3, MOVER, 1, 2, 1)
+    linea.agregar_tramo(1, 3, 4, ESPERAR, 2, 2, 1)
+    linea.agregar_tramo(1, 4, 5, REGAR, 2, 2, 1)
+    return linea
+
+
+def test_linea_chica():
+    linea = linea_chica()
+    assert list(linea) == [
+        (1, [("DR01", "Adelante (H1P2)")]),
+        (2, [("DR01", "Adelante (H1P3)"), ("DR02", "Adelante (H2P2)")]),
+        (3, [("DR01", "Regar"), ("DR02", "Esperar")]),
+        (4, [("DR02", "Regar")]),
+        (6, [("DR01", "Atras (H1P2)")]),  # El segundo 5 no tiene acciones
+        (7, [("DR01", "Atras (H1P1)")]),
+    ]
+    assert len(linea) == 6
+    assert linea.ultimo_segundo() == 7
+    assert linea.contar_acciones() == 8
+    assert linea.contar_fuera(3, 4) == (2, 2)
+    assert [linea.posicion_en(0, s) for s in range(0, 9)] == [1, 2, 3, 3, 3, 3, 2, 1, 1]
+
+
+@pytest.mark.parametrize("desde, hasta", [(1, None), (1, 1), (3, 6), (5, 5), (8, 20)])
+def test_ventana_y_tabla_de_la_linea_chica(desde, hasta):
+    linea = linea_chica()
+    esperado = [(s, fila) for s, fila in linea if s >= desde and (hasta is None or s <= hasta)]
+    assert list(linea.ventana(desde, hasta)) == esperado
+    tabla = linea.tabla(desde, hasta)
+    assert [s for s, _ in tabla.filas()] == [s for s, _ in esperado]
+
+
+def test_consultas_igual_a_expandir():
+    for linea in lineas(5, 40):
+        expandida = expandir(linea)
+        ultimo = max(expandida, default=0)
+        assert linea.ultimo_segundo() == ultimo
+        assert len(linea) == len(expandida)
+        assert linea.contar_acciones() == sum(len(a) for a in expandida.values())
+        assert list(linea) == [(s, acciones(linea, expandida, s)) for s in sorted(expandida)]
+
+        for segundo in range(0, ultimo + 2):
+            assert linea.acciones_en(segundo) == acciones(linea, expandida, segundo)
+        for pista in range(len(linea.nombres)):
+            posicion = 1
+            for segundo in range(0, ultimo + 2):
+                for _, otra, _, nueva in expandida.get(segundo, []):
+                    if otra == pista:
+                        posicion = nueva
+                assert linea.posicion_en(pista, segundo) == posicion
+
+
+def test_ventanas_igual_a_expandir():
+    azar = random.Random(6)
+    for linea in lineas(6, 30):
+        expandida = expandir(linea)
+        ultimo = max(expandida, default=0)
+        for _ in range(5):
+            desde = azar.randint(1, ultimo + 2)
+            hasta = azar.choice((None, desde + azar.randint(0, 30)))
+            dentro = [s for s in sorted(expandida) if s >= desde and (hasta is None or s <= hasta)]
+            assert list(linea.ventana(desde, hasta)) == [(s, acciones(linea, expandida, s)) for s in dentro]
+            assert linea.contar_segundos(desde, hasta) == len(dentro)
+            if hasta is not None:
+                assert linea.contar_fuera(desde, hasta) == (
+                    sum(1 for s in expandida if s < desde), sum(1 for s in expandida if s > hasta)
+                )
+
+            # La tabla dron x segundo tiene las mismas acciones en su columna
+            tabla = linea.tabla(desde, hasta)
+            filas = list(tabla.filas())
+            assert [s for s, _ in filas] == dentro
+            for segundo, celdas in filas:
+                por_dron = dict(acciones(linea, expandida, segundo))
+                assert celdas == [por_dron.get(nombre, "-") for nombre in linea.nombres]
+
+
+def test_prefijo_y_dict():
+    for linea in lineas(7, 20):
+        copia = LineaTiempo.desde_dict(linea.a_dict())
+        assert list(copia) == list(linea)
+        assert copia.a_dict() == linea.a_dict()
+
+        tramos = [len(inicios) // 2 for inicios in linea.inicios]
+        prefijo = linea.prefijo(tramos)
+        assert [len(inicios) for inicios in prefijo.inicios] == tramos
+        for pista, n in enumerate(tramos):
+            assert list(prefijo.tramos(pista)) == list(linea.tramos(pista))[:n]
+        # La copia no comparte columnas con la original
+        if linea.nombres:
+            prefijo.agregar_tramo(0, 10 ** 6, 10 ** 6 + 1, REGAR, 1, 1, 0)
+            assert linea.ultimo_segundo() < 10 ** 6
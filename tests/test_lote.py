@@ -0,0 +1,51 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from parsers.indice_xml import indexar
+from services.almacen import AlmacenCompartido
+from simulator.lote import simular_todos
+
+ENTRADA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "entrada.xml")
+HASH = "ab" * 32
+
+
+def resumen(resultados):
+    return [
+        (r["invernadero"].nombre, r["plan_nombre"], r["tiempo_optimo"], r["estado"].total_litros())
+        for r in resultados
+    ]
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Carga de entrada.xml con un plan editado (el pool debe leer la edición del almacén)"""
+    ruta = shutil.copy(ENTRADA, str(tmp_path / "entrada.xml"))  # Las instantáneas quedan junto a la copia
+    almacen = AlmacenCompartido(str(tmp_path / "almacen.db"))
+    almacen.guardar_configuracion(HASH, ruta, indexar(ruta))
+    carga = almacen.crear_carga(HASH)
+    invernadero = almacen.configuracion(carga)["invernaderos"].buscar("Invernadero Santa Rosa")
+    editado, _ = invernadero.editar_plan("Semana 1", "agregar", 1, 1)
+    almacen.guardar_invernadero(carga, editado)
+    return almacen, almacen.configuracion(carga)
+
+
+def test_pool_compartido_igual_a_secuencial(config):
+    almacen, config = config
+    esperado = resumen(simular_todos(config["invernaderos"], modo="secuencial"))
+    assert esperado[0][:3] == ("Invernadero Santa Rosa", "Semana 1", 9)
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for _ in range(2):  # El mismo pool sirve para varias llamadas
+            resultados = simular_todos(
+                config["invernaderos"], workers=2, ejecutor=pool, fuente=almacen.fuente(config)
+            )
+            assert resumen(resultados) == esperado
+
+
+def test_hilos_igual_a_secuencial(config):
+    _, config = config
+    esperado = resumen(simular_todos(config["invernaderos"], modo="secuencial"))
+    assert resumen(simular_todos(config["invernaderos"], workers=2, modo="hilos")) == esperado
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from simulator.diferencial import invernadero_aleatorio
+from simulator.linea_tiempo import REGAR
+from simulator.motor import MotorEventos
+from simulator.motores import MOTORES
+
+
+def estado_esperado(inv, linea, segundo):
+    """(litros, gramos, riegos) de cada dron al terminar el segundo, sumando los riegos de la línea"""
+    litros = [0] * len(linea.nombres)
+    gramos = [0] * len(linea.nombres)
+    riegos = 0
+    for pista in range(len(linea.nombres)):
+        for inicio, _, tipo, desde, _, _ in linea.tramos(pista):
+            if tipo == REGAR and inicio <= segundo:
+                planta = inv.buscar_planta(linea.hileras[pista], desde)
+                litros[pista] += planta.litros
+                gramos[pista] += planta.gramos
+                riegos += 1
+    return litros, gramos, riegos
+
+
+def casos(semilla, cantidad, entradas=None):
+    azar = random.Random(semilla)
+    for caso in range(cantidad):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}", entradas)
+        for plan_nombre, plan in inv.planes.iter():
+            yield inv, plan_nombre, plan
+
+
+def revisar(inv, consultar, linea):
+    for segundo in range(0, linea.ultimo_segundo() + 2):
+        estado = consultar(segundo)
+        litros, gramos, riegos = estado_esperado(inv, linea, segundo)
+        assert (estado.litros, estado.gramos, estado.instrucciones) == (litros, gramos, riegos), segundo
+        assert estado.posiciones == [linea.posicion_en(p, segundo) for p in range(len(linea.nombres))]
+        assert estado.segundo == segundo
+
+
+@pytest.mark.parametrize("motor", sorted(MOTORES))
+@pytest.mark.parametrize("regresar_inicio", [False, True])
+def test_estado_en_igual_a_sumar_la_linea(motor, regresar_inicio):
+    for inv, plan_nombre, _ in casos(13, 15):
+        resultado = inv.simular_plan(plan_nombre, motor, regresar_inicio)
+        revisar(inv, lambda segundo: inv.estado_en(resultado, segundo, motor), resultado["linea_tiempo"])
+
+
+def test_estado_en_con_muchos_puntos():
+    # Un punto cada 4 entradas: la consulta arranca casi siempre desde un punto intermedio
+    motor = MotorEventos(intervalo_control=4)
+    for inv, _, plan in casos(31, 6, entradas=80):
+        linea, estado = motor.simular(inv, plan)
+        assert len(estado.puntos_control) == 20
+        revisar(inv, lambda segundo: motor.estado_en(inv, plan, linea, estado, segundo), linea)
+
+
+def test_busqueda_de_puntos():
+    motor = MotorEventos(intervalo_control=8)
+    for inv, _, plan in casos(32, 6, entradas=200):
+        _, estado = motor.simular(inv, plan)
+        puntos = estado.puntos_control
+        assert [punto.indice for punto in puntos] == list(range(0, 200, 8))
+        # Búsqueda binaria igual a recorrer los puntos en orden
+        for segundo in range(-1, estado.fin_riego + 2):
+            anteriores = [punto for punto in puntos if punto.fin_riego <= segundo + 1]
+            assert estado.punto_en_segundo(segundo) is (anteriores[-1] if anteriores else None)
+        for indice in range(-1, 202):
+            anteriores = [i for i, punto in enumerate(puntos) if punto.indice <= indice]
+            assert estado.punto_en_indice(indice) == (anteriores[-1] if anteriores else None)
+
+
+def test_restaurar_no_comparte_listas():
+    motor = MotorEventos(intervalo_control=8)
+    inv, _, plan = next(casos(33, 1, entradas=40))
+    _, estado = motor.simular(inv, plan)
+    punto = estado.puntos_control[2]
+    litros = list(punto.litros)
+    estado.restaurar(punto)
+    estado.litros[0] += 1
+    estado.disponible[estado.nombres[0]] = -1
+    assert punto.litros == litros
+    assert punto.disponible[estado.nombres[0]] != -1
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from app import create_app
+from parsers.xml_parser import XMLParser
+from simulator.diferencial import firma, invernadero_aleatorio
+from simulator.motor import MotorEventos
+from simulator.motores import MOTORES
+from test_almacen import ENTRADA, INVERNADERO, PLAN, subir, tiempo_reporte
+
+# Planes con varios puntos de control (uno cada MotorEventos.intervalo_control entradas)
+ENTRADAS = 3 * 256 + 40
+
+
+def editar(azar, invernadero, plan_nombre, indice=None):
+    """Edita una entrada (al azar si no se indica) con una instrucción válida; devuelve (editado, desde)"""
+    largo = len(invernadero.buscar_plan(plan_nombre))
+    while True:
+        accion = azar.choice(("agregar", "insertar", "reemplazar"))
+        hilera = azar.randint(1, invernadero.numero_hileras)
+        posicion = azar.randint(1, invernadero.plantas_por_hilera)
+        try:
+            return invernadero.editar_plan(
+                plan_nombre, accion, hilera, posicion, azar.randint(0, largo - 1) if indice is None else indice
+            )
+        except ValueError:
+            continue  # Hilera sin dron o sin planta en esa posición
+
+
+def casos(semilla, cantidad):
+    azar = random.Random(semilla)
+    for caso in range(cantidad):
+        inv = invernadero_aleatorio(azar, f"Inv {caso}", ENTRADAS)
+        if not inv.plantas_por_hilera or inv.drones.tamano == 0:
+            continue
+        yield azar, inv, inv.planes[0][0]
+
+
+@pytest.mark.parametrize("motor", sorted(MOTORES))
+@pytest.mark.parametrize("regresar_inicio", [False, True])
+def test_resimular_igual_a_simular(motor, regresar_inicio):
+    con_puntos = motor != "referencia"
+    for azar, inv, plan_nombre in casos(14, 8):
+        anterior = inv.simular_plan(plan_nombre, motor, regresar_inicio)
+        for _ in range(3):
+            editado, desde = editar(azar, inv, plan_nombre)
+            resultado = editado.resimular_plan(anterior, desde, motor, regresar_inicio)
+            completo = editado.simular_plan(plan_nombre, motor, regresar_inicio)
+            assert firma(resultado, con_puntos) == firma(completo, con_puntos), (inv.nombre, desde)
+            inv, anterior = editado, resultado
+
+
+def test_retoma_desde_el_punto_de_control():
+    for azar, inv, plan_nombre in casos(15, 6):
+        anterior = inv.simular_plan(plan_nombre, regresar_inicio=True)
+        editado, desde = editar(azar, inv, plan_nombre, ENTRADAS - 10)
+        avance = []
+        resultado = editado.resimular_plan(
+            anterior, desde, regresar_inicio=True, progreso=lambda hechos, total: avance.append((hechos, total))
+        )
+
+        # Los puntos anteriores al cambio se reutilizan y solo se simula desde el último
+        intervalo = MotorEventos().intervalo_control
+        ultimo = desde // intervalo
+        puntos = resultado["estado"].puntos_control
+        assert puntos[:ultimo] == anterior["estado"].puntos_control[:ultimo]
+        assert puntos[ultimo] is not anterior["estado"].puntos_control[ultimo]
+        total = len(editado.buscar_plan(plan_nombre))
+        assert avance[0] == (ultimo * intervalo, total)
+        assert avance[-1] == (total, total)
+
+        # El regreso a la posición 1 se agrega también al retomar
+        assert all(posicion == 1 for posicion in resultado["estado"].posiciones)
+        completo = editado.simular_plan(plan_nombre, regresar_inicio=True)
+        assert firma(resultado, con_puntos=True) == firma(completo, con_puntos=True)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+def test_editar_plan_en_la_app(app):
+    parser = XMLParser(ENTRADA)
+    parser.parse()
+    local = next(inv for inv in parser.invernaderos.iter() if inv.nombre == INVERNADERO)
+    cliente = app.test_client()
+    subir(cliente)
+    formulario = {"invernadero": INVERNADERO, "plan": PLAN}
+    cliente.post("/simulate", data=formulario)  # Resultado anterior en la caché
+
+    for accion, hilera, posicion, entrada in (
+        ("insertar", 2, 2, 1), ("reemplazar", 1, 2, 2), ("agregar", 2, 1, None), ("insertar", 1, 1, 1)
+    ):
+        datos = {**formulario, "accion": accion, "instruccion": f"H{hilera}-P{posicion}"}
+        if entrada is not None:
+            datos["entrada"] = str(entrada)
+        local, _ = local.editar_plan(PLAN, accion, hilera, posicion, None if entrada is None else entrada - 1)
+        # El resultado retomado es igual a simular el plan editado desde el inicio
+        esperado = local.simular_plan(PLAN)["tiempo_optimo"]
+        assert tiempo_reporte(cliente.post("/editar_plan", data=datos)) == esperado
+        assert tiempo_reporte(cliente.post("/simulate", data=formulario)) == esperado
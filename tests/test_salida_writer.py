@@ -0,0 +1,106 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from xml.dom import minidom
+
+import pytest
+
+from generators.salida_writer import SalidaWriter
+from parsers.xml_parser import XMLParser
+
+ENTRADA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "entrada.xml")
+
+
+def salida_minidom(grupos):
+    """
+    La salida como se generaba antes de SalidaWriter por streaming: árbol
+    ElementTree completo, ET.tostring y minidom.toprettyxml(indent="  ")
+    """
+    root = ET.Element("datosSalida")
+    lista_inv = ET.SubElement(root, "listaInvernaderos")
+    for invernadero, resultados in grupos:
+        inv_elem = ET.SubElement(lista_inv, "invernadero", {"nombre": invernadero.nombre})
+        lista_planes = ET.SubElement(inv_elem, "listaPlanes")
+        for result in resultados:
+            plan_elem = ET.SubElement(lista_planes, "plan", {"nombre": result["plan_nombre"]})
+            ET.SubElement(plan_elem, "tiempoOptimoSegundos").text = str(result["tiempo_optimo"])
+
+            estado = result["estado"]
+            eficiencia_elem = ET.SubElement(plan_elem, "eficienciaDronesRegadores")
+            for nombre, litros, gramos in estado.eficiencia():
+                ET.SubElement(
+                    eficiencia_elem,
+                    "dron",
+                    {"nombre": nombre, "litrosAgua": str(litros), "gramosFertilizante": str(gramos)},
+                )
+            ET.SubElement(plan_elem, "aguaRequeridaLitros").text = str(estado.total_litros())
+            ET.SubElement(plan_elem, "fertilizanteRequeridoGramos").text = str(estado.total_gramos())
+
+            instrucciones_elem = ET.SubElement(plan_elem, "instrucciones")
+            for segundo, acciones in result["linea_tiempo"]:
+                tiempo_elem = ET.SubElement(instrucciones_elem, "tiempo", {"segundos": str(segundo)})
+                for dron_nombre, accion in acciones:
+                    ET.SubElement(tiempo_elem, "dron", {"nombre": dron_nombre, "accion": accion})
+    return minidom.parseString(ET.tostring(root)).toprettyxml(indent="  ").encode("utf-8")
+
+
+@pytest.fixture(scope="module")
+def grupos():
+    parser = XMLParser(ENTRADA)
+    parser.parse()
+    return [
+        (inv, [inv.simular_plan(nombre) for nombre, _ in inv.planes.iter()])
+        for inv in parser.invernaderos.iter()
+    ]
+
+
+def leer(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
+
+
+def test_un_plan_igual_a_minidom(grupos, tmp_path):
+    for invernadero, resultados in grupos:
+        for result in resultados:
+            ruta = SalidaWriter().write(result, str(tmp_path / "salida.xml"))
+            assert leer(ruta) == salida_minidom([(invernadero, [result])])
+
+
+def test_varios_invernaderos_igual_a_minidom(grupos, tmp_path):
+    ruta = SalidaWriter().write_varios(grupos, str(tmp_path / "salida.xml"))
+    assert leer(ruta) == salida_minidom(grupos)
+
+
+def test_stream_binario_igual_al_archivo(grupos, tmp_path):
+    invernadero, resultados = grupos[0]
+    stream = io.BytesIO()
+    SalidaWriter().write_stream(resultados[0], stream)
+    assert stream.getvalue() == leer(SalidaWriter().write(resultados[0], str(tmp_path / "salida.xml")))
+
+
+def test_caracteres_escapados_igual_a_minidom(grupos, tmp_path):
+    invernadero, resultados = grupos[0]
+    result = dict(resultados[0], plan_nombre='Riego & "poda" <noche> ñ')
+    ruta = SalidaWriter().write(result, str(tmp_path / "salida.xml"))
+    assert leer(ruta) == salida_minidom([(invernadero, [result])])
+
+
+def test_descargas_simultaneas(grupos, tmp_path, monkeypatch):
+    from app import create_app
+
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    esperado = salida_minidom(grupos)
+
+    def descargar(_):
+        cliente = app.test_client()
+        with open(ENTRADA, "rb") as archivo:
+            cliente.post("/upload", data={"file": (archivo, "entrada.xml")}, content_type="multipart/form-data")
+        with cliente.post("/generar_salida_completa") as respuesta:
+            return respuesta.get_data()
+
+    # Cada petición escribe en su propio archivo temporal, que no queda en outputs/
+    with ThreadPoolExecutor(max_workers=4) as hilos:
+        assert list(hilos.map(descargar, range(8))) == [esperado] * 8
+    assert not [nombre for nombre in os.listdir(tmp_path / "outputs") if nombre.endswith(".xml")]
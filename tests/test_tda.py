@@ -0,0 +1,172 @@
+import pickle
+import random
+from collections import deque
+
+import pytest
+
+from models.tda import Cola, ColaPrioridad, TablaHash
+
+
+class ClaveChocona:
+    """Clave con hash constante: todas caen en la misma cubeta"""
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __hash__(self):
+        return 7
+
+    def __eq__(self, otra):
+        return isinstance(otra, ClaveChocona) and self.valor == otra.valor
+
+
+def test_tabla_hash_igual_a_dict():
+    azar = random.Random(1)
+    tabla = TablaHash(capacidad=2)
+    esperado = {}
+    for _ in range(3000):
+        clave = (azar.randint(1, 30), azar.randint(1, 30))  # Como (hilera, posicion)
+        operacion = azar.random()
+        if operacion < 0.6:
+            tabla.put(clave, operacion)
+            esperado[clave] = operacion
+        elif operacion < 0.8:
+            assert tabla.remove(clave) == (esperado.pop(clave, None) is not None)
+        else:
+            assert tabla.get(clave, "nada") == esperado.get(clave, "nada")
+            assert (clave in tabla) == (clave in esperado)
+    assert len(tabla) == len(esperado)
+    assert dict(tabla.items()) == esperado
+    assert sorted(tabla.keys()) == sorted(esperado)
+    # Factor de carga <= 0.75 después de crecer
+    assert tabla.tamano * 4 <= tabla.capacidad * 3
+
+
+def test_tabla_hash_colisiones():
+    tabla = TablaHash()
+    claves = [ClaveChocona(i) for i in range(20)]
+    for i, clave in enumerate(claves):
+        tabla.put(clave, i)
+    tabla.put(ClaveChocona(5), "otro")  # Reemplaza, no agrega
+    assert len(tabla) == 20
+    assert tabla.get(ClaveChocona(5)) == "otro"
+
+    # Quitar del medio, del frente y del final de la cadena
+    for valor in (10, 19, 0):
+        assert tabla.remove(ClaveChocona(valor))
+        assert not tabla.remove(ClaveChocona(valor))
+        assert ClaveChocona(valor) not in tabla
+    assert len(tabla) == 17
+    assert tabla.get(ClaveChocona(1)) == 1
+
+
+def test_tabla_hash_reservar():
+    tabla = TablaHash()
+    tabla.put("a", 1)
+    tabla.reservar(1000)
+    capacidad = tabla.capacidad
+    assert capacidad * 3 >= 1000 * 4
+    for i in range(999):
+        tabla.put(i, i)
+    # Ya tenía espacio: insertar no redimensiona
+    assert tabla.capacidad == capacidad
+    assert tabla.get("a") == 1
+    assert tabla.get(998) == 998
+
+
+def test_tabla_hash_pickle():
+    tabla = TablaHash()
+    for i in range(50):
+        tabla.put(f"Plan {i}", i)
+    copia = pickle.loads(pickle.dumps(tabla))
+    assert copia.capacidad == tabla.capacidad
+    assert dict(copia.items()) == dict(tabla.items())
+
+
+def test_cola_prioridad_ordena_y_desempata_por_llegada():
+    azar = random.Random(4)
+    cola = ColaPrioridad()
+    esperado = []
+    for llegada in range(2000):
+        if esperado and azar.random() < 0.3:
+            esperado.sort()
+            prioridad, _, dato = esperado.pop(0)
+            assert cola.peek_prioridad() == prioridad
+            assert cola.peek() == dato
+            assert cola.pop() == dato
+        else:
+            prioridad = azar.randint(0, 50)  # Muchas prioridades repetidas
+            cola.push({"llegada": llegada}, prioridad)  # Datos no comparables entre sí
+            esperado.append((prioridad, llegada, {"llegada": llegada}))
+        assert len(cola) == len(esperado)
+
+    # Lo que queda sale por prioridad y, a igual prioridad, en orden de llegada
+    esperado.sort(key=lambda entrada: entrada[:2])
+    assert [cola.pop() for _ in range(len(cola))] == [dato for _, _, dato in esperado]
+    assert cola.is_empty()
+
+
+def test_cola_prioridad_vacia():
+    cola = ColaPrioridad()
+    assert cola.pop() is None
+    assert cola.peek() is None
+    assert cola.peek_prioridad() is None
+    cola.push("a", 3)
+    assert cola.pop() == "a"
+    assert cola.is_empty()
+
+
+def test_cola_igual_a_deque():
+    azar = random.Random(24)
+    cola = Cola()
+    esperado = deque()
+    for paso in range(5000):
+        operacion = azar.random()
+        if operacion < 0.4:
+            cola.enqueue(paso)
+            esperado.append(paso)
+        elif operacion < 0.5:
+            datos = range(paso, paso + azar.randint(0, 20))
+            cola.extend(datos)
+            esperado.extend(datos)
+        elif operacion < 0.85:
+            assert cola.dequeue() == (esperado.popleft() if esperado else None)
+        else:
+            cantidad = azar.randint(0, 15)
+            assert cola.dequeue_varios(cantidad) == [esperado.popleft() for _ in range(min(cantidad, len(esperado)))]
+        assert len(cola) == len(esperado)
+        assert cola.peek() == (esperado[0] if esperado else None)
+    assert cola.a_lista() == list(esperado) == list(cola.iter())
+    # Los desencolados no quedan referenciados en el arreglo
+    assert sum(dato is not None for dato in cola.datos) == len(cola)
+
+
+def test_cola_capacidad_fija():
+    cola = Cola(capacidad=4)
+    cola.extend("abc")
+    assert cola.dequeue() == "a"
+    cola.extend("de")  # Da la vuelta al final del arreglo
+    assert cola.is_full()
+    with pytest.raises(OverflowError):
+        cola.enqueue("f")
+    with pytest.raises(OverflowError):
+        cola.extend("f")
+    assert cola.capacidad == 4
+    assert cola.a_lista() == ["b", "c", "d", "e"]
+
+    cola.clear()
+    assert cola.is_empty() and not cola.is_full()
+    assert cola.dequeue() is None
+    assert cola.dequeue_varios(3) == []
+
+
+@pytest.mark.parametrize("capacidad", [None, 6])
+def test_cola_pickle(capacidad):
+    cola = Cola(capacidad)
+    cola.extend(range(5))
+    cola.dequeue_varios(3)
+    cola.extend(range(5, 9))  # Frente a mitad del arreglo
+    copia = pickle.loads(pickle.dumps(cola))
+    assert copia.a_lista() == cola.a_lista() == [3, 4, 5, 6, 7, 8]
+    assert copia.fija == cola.fija
+    if capacidad:
+        assert copia.is_full()
@@ -0,0 +1,104 @@
+import io
+import os
+
+import pytest
+
+from parsers.xml_parser import XMLParser
+
+ENTRADA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "entrada.xml")
+
+# Dos <listaInvernaderos> (solo cuenta la primera), un <invernadero> anidado que no es
+# hijo directo de la lista, una <listaDrones> anidada que no cuenta y la lista de drones
+# después de los invernaderos
+VARIAS_LISTAS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<configuracion>
+  <listaInvernaderos>
+    <invernadero nombre="A">
+      <numeroHileras>2</numeroHileras>
+      <plantasXhilera>2</plantasXhilera>
+      <listaPlantas>
+        <planta hilera="1" posicion="1" litrosAgua="1" gramosFertilizante="100">tomate</planta>
+        <planta hilera="2" posicion="2" litrosAgua="2" gramosFertilizante="200">chile</planta>
+      </listaPlantas>
+      <asignacionDrones>
+        <dron id="1" hilera="1"/>
+        <dron id="2" hilera="2"/>
+      </asignacionDrones>
+      <planesRiego>
+        <plan nombre="P">H1-P1, H2-P2, H3-P1, X</plan>
+      </planesRiego>
+    </invernadero>
+    <grupo>
+      <invernadero nombre="anidado"><numeroHileras>1</numeroHileras></invernadero>
+      <listaDrones><dron id="9" nombre="DR09"/></listaDrones>
+    </grupo>
+    <invernadero nombre="B"/>
+  </listaInvernaderos>
+  <listaInvernaderos>
+    <invernadero nombre="C"/>
+  </listaInvernaderos>
+  <listaDrones>
+    <dron id="1" nombre="DR01"/>
+    <dron id="2" nombre="DR02"/>
+  </listaDrones>
+  <listaDrones>
+    <dron id="3" nombre="DR03"/>
+  </listaDrones>
+</configuracion>
+"""
+
+
+def modelo_invernaderos(invernaderos):
+    """Los invernaderos (cualquier colección con iter()) como datos comparables"""
+    resultado = []
+    for inv in invernaderos.iter():
+        plantas = inv.plantas
+        resultado.append((
+            inv.nombre,
+            inv.numero_hileras,
+            inv.plantas_por_hilera,
+            [plantas.nombre(fila) for fila in range(plantas.tamano)],
+            [list(columna) for columna in (plantas.hileras, plantas.posiciones, plantas.litros, plantas.gramos)],
+            [(dron.id, dron.nombre, dron.hilera) for dron in inv.drones.iter()],
+            [
+                (nombre, list(plan.hileras), list(plan.posiciones), list(plan.errores.iter()))
+                for nombre, plan in inv.planes.iter()
+            ],
+        ))
+    return resultado
+
+
+def modelo(parser):
+    """Todo lo que el parser construye, como datos comparables"""
+    drones = [(dron.id, dron.nombre) for dron in parser.drones_globales.iter()]
+    return drones, modelo_invernaderos(parser.invernaderos)
+
+
+def parsear(origen, streaming):
+    parser = XMLParser(origen, streaming=streaming)
+    parser.parse()
+    return parser
+
+
+def test_entrada_streaming_igual_al_arbol():
+    streaming = modelo(parsear(ENTRADA, True))
+    assert streaming == modelo(parsear(ENTRADA, False))
+    assert streaming[1]
+
+
+def test_stream_igual_a_ruta():
+    with open(ENTRADA, "rb") as archivo:
+        desde_stream = modelo(parsear(archivo, True))
+    assert desde_stream == modelo(parsear(ENTRADA, True))
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_solo_cuentan_las_primeras_listas(streaming):
+    drones, invernaderos = modelo(parsear(io.BytesIO(VARIAS_LISTAS), streaming))
+    assert drones == [("1", "DR01"), ("2", "DR02")]
+    assert [inv[0] for inv in invernaderos] == ["A", "B"]
+    assert invernaderos[0][5] == [("1", "DR01", 1), ("2", "DR02", 2)]
+
+
+def test_varias_listas_streaming_igual_al_arbol():
+    assert modelo(parsear(io.BytesIO(VARIAS_LISTAS), True)) == modelo(parsear(io.BytesIO(VARIAS_LISTAS), False))